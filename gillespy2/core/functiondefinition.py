@@ -20,6 +20,7 @@ class FunctionDefinition(SortableObject):
 
         self.name = name
         self.function_string = function
+        self.args = list(args)
         args = ', '.join(args)
         self.function = eval('lambda ' + args + ': ' + function, eval_globals)
         if self.function is None:
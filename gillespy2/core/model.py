@@ -736,36 +736,41 @@ class Model(SortableObject):
 
     def get_best_solver(self, precompile=True):
         """
-        Finds best solver for the users simulation. Currently, AssignmentRules, RateRules, FunctionDefinitions,
-        Events, and Species with a dynamic, or continuous population must use the TauHybridSolver.
-        :param precompile: If True, and the model contains no AssignmentRules, RateRules, FunctionDefinitions, Events,
-        or Species with a dynamic or continuous population, the get_best_solver will choose the VariableSSACSolver, else
-        it will choose SSACSolver
+        Finds best solver for the users simulation. Currently, Species with a dynamic, or continuous population must use
+        the TauHybridSolver. AssignmentRules, RateRules, FunctionDefinitions and Events are supported by the C++
+        solvers, and by the TauHybridSolver when C++ is unavailable.
+        :param precompile: If True, and the model contains no Species with a dynamic or continuous population, the
+        get_best_solver will choose the VariableSSACSolver, else it will choose SSACSolver
         :type precompile: bool
         :return: gillespy2.gillespySolver
         """
         from gillespy2.solvers.numpy import can_use_numpy
+        from gillespy2.solvers.cpp import can_use_cpp
         hybrid_check = False
+        rules_check = False
         if len(self.get_all_assignment_rules()) or len(self.get_all_rate_rules())  \
                 or len(self.get_all_function_definitions()) or len(self.get_all_events()):
-            hybrid_check = True
+            rules_check = True
 
-        if len(self.get_all_species()) and hybrid_check == False:
+        if len(self.get_all_species()):
             for i in self.get_all_species():
                 tempMode = self.get_species(i).mode
                 if tempMode == 'dynamic' or tempMode == 'continuous':
                     hybrid_check = True
                     break
+        # Discrete models with rules stay on the compiled path when it is available.
+        if rules_check and not can_use_cpp:
+            hybrid_check = True
+
         if can_use_numpy and hybrid_check:
             from gillespy2 import TauHybridSolver
             return TauHybridSolver
 
         elif not can_use_numpy and hybrid_check:
             raise ModelError('TauHybridSolver is the only solver currently that supports '
-                             'AssignmentRules, RateRules, FunctionDefinitions, or Events. '
-                             'Please install Numpy.')
-        
-        from gillespy2.solvers.cpp import can_use_cpp
+                             'continuous and dynamic Species, or AssignmentRules, RateRules, FunctionDefinitions, '
+                             'or Events without a C++ compiler. Please install Numpy.')
+
         if can_use_cpp is False and can_use_numpy and not hybrid_check:
             from gillespy2 import NumPySSASolver
             return NumPySSASolver
@@ -827,7 +832,8 @@ class Model(SortableObject):
             # This will throw an error and throw log. IF a user specifies cpp_support == True and don't have a compiler
             # They would bypass this log.warning and just recieve an error
             if cpp_support is False and not isinstance(solver, str):
-                if solver.name == 'SSACSolver' or solver.name == 'VariableSSACSolver':
+                if solver.name in ('SSACSolver', 'VariableSSACSolver', 'TauLeapingCSolver', 'ODECSolver',
+                                   'TauHybridCSolver'):
                     from gillespy2.core import log
                     log.warning("Please install/configure 'g++' and 'make' on your"
                                 " system, to ensure that GillesPy2 C solvers will"
@@ -3,6 +3,10 @@ from gillespy2.core.gillespyError import *
 import numpy as np
 import uuid
 import ast
+import re
+
+# Numeric literals are matched first so the exponent of a number like 1e5 is never taken for a name.
+_IDENTIFIER = re.compile(r'(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?|[^\W\d]\w*')
 
 
 class Reaction(SortableObject):
@@ -325,12 +329,18 @@ class Reaction(SortableObject):
         """
         self.annotation = annotation
 
-    def sanitized_propensity_function(self, species_mappings, parameter_mappings):
-        names = sorted(list(species_mappings.keys()) + list(parameter_mappings.keys()), key=lambda x: len(x),
-                       reverse=True)
-        replacements = [parameter_mappings[name] if name in parameter_mappings else species_mappings[name]
-                        for name in names]
-        sanitized_propensity = self.propensity_function
-        for id, name in enumerate(names):
-            sanitized_propensity = sanitized_propensity.replace(name, "{" + str(id) + "}")
-        return sanitized_propensity.format(*replacements)
+    def sanitized_propensity_function(self, species_mappings, parameter_mappings, ode=False):
+        """
+        :param ode: If True, sanitizes the deterministic ode_propensity_function instead of the propensity_function.
+        """
+        # Substitute whole identifiers only, in a single pass, so the cost does not grow with the size of the model.
+        def replace(match):
+            name = match.group(0)
+            if not name[0].isalpha() and name[0] != '_':
+                return name
+            if name in parameter_mappings:
+                return str(parameter_mappings[name])
+            if name in species_mappings:
+                return str(species_mappings[name])
+            return name
+        return _IDENTIFIER.sub(replace, self.ode_propensity_function if ode else self.propensity_function)
@@ -1,9 +1,13 @@
 from gillespy2.solvers.cpp.ssa_c_solver import SSACSolver
 from gillespy2.solvers.cpp.variable_ssa_c_solver import VariableSSACSolver
+from gillespy2.solvers.cpp.tau_leaping_c_solver import TauLeapingCSolver
+from gillespy2.solvers.cpp.ode_c_solver import ODECSolver
+from gillespy2.solvers.cpp.tau_hybrid_c_solver import TauHybridCSolver
+from gillespy2.solvers.cpp.build_cache import clear_cache
 from gillespy2.core import log
 
 # Call external function instead of implementing here so we don't need to rerun check on each model init.
 from gillespy2.solvers.utilities.cpp_support_test import cpp_support
 can_use_cpp = cpp_support
 
-__all__ = ['SSACSolver', 'VariableSSACSolver']
+__all__ = ['SSACSolver', 'VariableSSACSolver', 'TauLeapingCSolver', 'ODECSolver', 'TauHybridCSolver']
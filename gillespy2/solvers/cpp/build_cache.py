@@ -0,0 +1,216 @@
+"""
+Persistent, content-addressed cache of compiled C++ model simulations.
+
+Compiled simulations are stored under $GILLESPY2_CACHE_DIR, or $XDG_CACHE_HOME/gillespy2 (~/.cache/gillespy2 when
+XDG_CACHE_HOME is unset), keyed by a hash of the generated simulation source, the C++ engine sources and makefile
+(which hold the compiler flags), and the compiler version. An identical model therefore reuses its simulation across
+solver instances, processes and sessions. The cache is bounded to $GILLESPY2_CACHE_SIZE bytes (default 512 MB), least
+recently used simulations are evicted first; a size of 0 disables the cache.
+
+The model independent engine sources are compiled once per installation and compiler into a static library kept in
+the engine/ subdirectory of the cache, see get_engine_library(). Engine libraries count towards the size limit and are
+evicted like simulations.
+"""
+
+import os  # for cache directory and file management
+import shutil  # for copying cached simulations
+import hashlib  # for content addressing
+import tempfile  # for atomically adding simulations to the cache
+import subprocess  # for querying the compiler version
+import inspect  # for finding the Gillespy2 module path
+import gillespy2
+from gillespy2.core import log
+
+GILLESPY_PATH = os.path.dirname(inspect.getfile(gillespy2))
+GILLESPY_C_DIRECTORY = os.path.join(GILLESPY_PATH, 'solvers/cpp/c_base')
+DEFAULT_CACHE_SIZE = 512 * 1024 * 1024
+
+_compiler_version = None
+
+
+def get_cache_directory():
+    """
+    :return: Directory where compiled simulations are cached.
+    """
+    if os.environ.get('GILLESPY2_CACHE_DIR'):
+        return os.path.abspath(os.environ['GILLESPY2_CACHE_DIR'])
+    cache_home = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(cache_home, 'gillespy2')
+
+
+def get_cache_size():
+    """
+    :return: Maximum size of the cache in bytes, 0 if caching is disabled.
+    """
+    try:
+        return max(int(os.environ.get('GILLESPY2_CACHE_SIZE', DEFAULT_CACHE_SIZE)), 0)
+    except ValueError:
+        log.warning('GILLESPY2_CACHE_SIZE must be an integer number of bytes, using the default cache size.')
+        return DEFAULT_CACHE_SIZE
+
+
+def _get_compiler_version():
+    global _compiler_version
+    if _compiler_version is None:
+        try:
+            version = subprocess.run(['g++', '--version'], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+            _compiler_version = version.stdout
+        except OSError:
+            _compiler_version = b''
+    return _compiler_version
+
+
+def _update_engine_digest(digest):
+    digest.update(_get_compiler_version())
+    for source in sorted(os.listdir(GILLESPY_C_DIRECTORY)):
+        source_path = os.path.join(GILLESPY_C_DIRECTORY, source)
+        if os.path.isfile(source_path):
+            digest.update(source.encode('utf-8'))
+            with open(source_path, 'rb') as source_file:
+                digest.update(source_file.read())
+
+
+def cache_key(output_directory, target='UserSimulation'):
+    """
+    Computes the key of a simulation that is ready to be built.
+    :param output_directory: Directory holding the generated UserSimulation.cpp.
+    :param target: The make target being built.
+    :return: Hex digest identifying the build.
+    """
+    digest = hashlib.sha256()
+    digest.update(target.encode('utf-8'))
+    _update_engine_digest(digest)
+    with open(os.path.join(output_directory, 'UserSimulation.cpp'), 'rb') as simulation_file:
+        digest.update(simulation_file.read())
+    return digest.hexdigest()
+
+
+def get_engine_library(make_file):
+    """
+    Returns the static library of the model independent engine sources (model.cpp, ssa.cpp, ...), building it the
+    first time it is requested for this installation and compiler. Simulations only need to compile their generated
+    source and link against it.
+    :param make_file: The c_base makefile.
+    :return: Path of libgillespy_engine.a, or None if the cache is disabled or the library could not be built, in
+    which case simulations build the engine themselves.
+    """
+    max_size = get_cache_size()
+    if max_size == 0:
+        return None
+    digest = hashlib.sha256()
+    _update_engine_digest(digest)
+    engine_directory = os.path.join(get_cache_directory(), 'engine')
+    engine_library = os.path.join(engine_directory, '{0}.a'.format(digest.hexdigest()))
+    if os.path.isfile(engine_library):
+        try:
+            # The modification time orders entries for eviction.
+            os.utime(engine_library)
+        except OSError:
+            pass
+        return engine_library
+
+    try:
+        os.makedirs(engine_directory, exist_ok=True)
+        with tempfile.TemporaryDirectory(dir=engine_directory, prefix='.tmp') as build_directory:
+            for source in os.listdir(GILLESPY_C_DIRECTORY):
+                source_path = os.path.join(GILLESPY_C_DIRECTORY, source)
+                if os.path.isfile(source_path):
+                    shutil.copy(source_path, build_directory)
+            built = subprocess.run(['make', '-C', build_directory, '-f', make_file, 'libgillespy_engine.a'],
+                                   stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+            if built.returncode != 0:
+                log.warning('Unable to build the GillesPy2 C++ engine library:\n{0}'.format(
+                    built.stderr.decode('utf-8')))
+                return None
+            os.replace(os.path.join(build_directory, 'libgillespy_engine.a'), engine_library)
+    except OSError as e:
+        log.warning('Unable to build the GillesPy2 C++ engine library: {0}'.format(e))
+        return None
+    evict(max_size, keep=engine_library)
+    return engine_library
+
+
+def fetch(key, destination):
+    """
+    Copies a cached simulation to destination.
+    :param key: Key returned by cache_key().
+    :param destination: Path the simulation is copied to.
+    :return: True if the simulation was cached, else False.
+    """
+    if get_cache_size() == 0:
+        return False
+    cached = os.path.join(get_cache_directory(), key)
+    try:
+        shutil.copy(cached, destination)
+        # The modification time orders entries for eviction.
+        os.utime(cached)
+    except OSError:
+        return False
+    return True
+
+
+def store(key, source):
+    """
+    Adds a compiled simulation to the cache, then evicts the least recently used entries above the size limit.
+    :param key: Key returned by cache_key().
+    :param source: Path of the compiled simulation.
+    """
+    max_size = get_cache_size()
+    if max_size == 0:
+        return
+    cache_directory = get_cache_directory()
+    try:
+        os.makedirs(cache_directory, exist_ok=True)
+        # Copy under a temporary name first so other processes never see a partially written simulation.
+        handle, temporary = tempfile.mkstemp(dir=cache_directory, prefix='.tmp')
+        os.close(handle)
+        shutil.copy(source, temporary)
+        os.replace(temporary, os.path.join(cache_directory, key))
+    except OSError as e:
+        log.warning('Unable to cache compiled simulation: {0}'.format(e))
+        return
+    evict(max_size)
+
+
+def evict(max_size=None, keep=None):
+    """
+    Removes least recently used simulations and engine libraries until the cache fits in max_size bytes.
+    :param max_size: Size limit in bytes, defaults to get_cache_size().
+    :param keep: Path of an entry that is never removed, such as the engine library in use.
+    """
+    if max_size is None:
+        max_size = get_cache_size()
+    cache_directory = get_cache_directory()
+    if not os.path.isdir(cache_directory):
+        return
+    entries = []
+    for directory in [cache_directory, os.path.join(cache_directory, 'engine')]:
+        if not os.path.isdir(directory):
+            continue
+        for name in os.listdir(directory):
+            path = os.path.join(directory, name)
+            if name.startswith('.tmp') or not os.path.isfile(path):
+                continue
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+    total_size = sum(entry[1] for entry in entries)
+    for _, size, path in sorted(entries):
+        if total_size <= max_size:
+            break
+        if path == keep:
+            continue
+        try:
+            os.remove(path)
+        except OSError:
+            continue
+        total_size -= size
+
+
+def clear_cache():
+    """
+    Removes every cached simulation.
+    """
+    shutil.rmtree(get_cache_directory(), ignore_errors=True)
@@ -0,0 +1,141 @@
+#include <string>
+#include <vector>
+#include <iostream>
+#include <sstream>
+#include <algorithm>
+#include <csignal>
+#include <time.h>
+#include <math.h>
+#include "model.h"
+#include "hybrid.h"
+using namespace Gillespy;
+
+//Default values, replaced with command line args
+unsigned int number_trajectories = 0;
+unsigned int number_timesteps = 0;
+unsigned int number_threads = 1;
+int random_seed = 0;
+double end_time = 0;
+double tau_tol = 0.03;
+double relative_tolerance = 1e-6;
+double absolute_tolerance = 1e-9;
+bool seed_time = true;
+
+//Default constants
+__DEFINE_CONSTANTS__
+
+//Modes of the species
+__DEFINE_SPECIES_MODES__
+
+//Function definitions of the model
+__DEFINE_FUNCTIONS__
+
+class PropensityFunction : public IHybridPropensityFunction{
+public:
+  double propensity(unsigned int reaction_number, const double* S){
+    switch(reaction_number){
+__DEFINE_PROPENSITY__
+
+    default: //Error
+      return -1;
+    }
+  }
+
+  double rate(unsigned int reaction_number, const double* S){
+    switch(reaction_number){
+__DEFINE_ODE_RATES__
+
+    default: //Error
+      return -1;
+    }
+  }
+
+  //Propensity of whole populations
+  double evaluate(unsigned int reaction_number, unsigned int* S){
+    std :: vector<double> amounts(S, S + sizeof(populations)/sizeof(populations[0]));
+    return propensity(reaction_number, amounts.data());
+  }
+
+  std :: unique_ptr<IModelRules> copy() const{
+    return std :: unique_ptr<IModelRules>(new PropensityFunction(*this));
+  }
+
+  //Events and rules of the model
+__DEFINE_RULES__
+};
+
+//Builds the model from the generated constants
+std :: unique_ptr<Model> build_model(const unsigned int* initial_populations){
+  std :: vector<std :: string> species_names(s_names, s_names + sizeof(s_names)/sizeof(s_names[0]));
+  std :: vector<unsigned int> species_populations(initial_populations, initial_populations + sizeof(populations)/sizeof(populations[0]));
+  std :: vector<std :: string> reaction_names(r_names, r_names + sizeof(r_names)/sizeof(r_names[0]));
+
+  std :: unique_ptr<Model> model_pointer(new Model(species_names, species_populations, reaction_names));
+  Model& model = *model_pointer;
+
+  //Begin reaction species changes
+__DEFINE_REACTIONS_
+  //End reaction species changes
+  return model_pointer;
+}
+
+int main(int argc, char* argv[]){
+  std :: unique_ptr<Model> model = build_model(populations);
+
+  //Parse command line arguments
+ std :: string arg;
+ for(int i = 1; i < argc - 1; i++){
+   arg = argv[i];
+   if(argc > i+1 && arg.size() > 1 && arg[0] == '-'){
+     std :: stringstream arg_stream(argv[i+1]);
+     switch(arg[1]){
+     case 's':
+       arg_stream >> random_seed;
+       seed_time = false;
+       break;
+     case 'e':
+       arg_stream >> end_time;
+       break;
+     case 'r':
+       arg_stream >> relative_tolerance;
+       break;
+     case 'a':
+       arg_stream >> absolute_tolerance;
+       break;
+     case 't':
+       if(arg[2] == 'r'){
+	 arg_stream >> number_trajectories;
+       }else if(arg[2] == 'i'){
+	 arg_stream >> number_timesteps;
+       }else if(arg[2] == 'h'){
+	 arg_stream >> number_threads;
+       }else if(arg[2] == 'a'){
+	 arg_stream >> tau_tol;
+       }
+       break;
+     }
+   }
+ }
+
+ if(seed_time){
+   random_seed = time(NULL);
+ }
+  signal(SIGINT, signalHandler);
+  PropensityFunction propensity_function;
+  HybridSimulation simulation(model.get(), number_trajectories, number_timesteps, end_time, &propensity_function, initial_values, random_seed);
+  unsigned int number_species = model -> number_species;
+  simulation.species_modes.assign(species_modes, species_modes + number_species);
+  simulation.switch_tols.assign(switch_tols, switch_tols + number_species);
+  simulation.switch_mins.assign(switch_mins, switch_mins + number_species);
+  simulation.fixed_species.assign(fixed_species, fixed_species + number_species);
+  simulation.number_threads = number_threads;
+  simulation.tau_tol = tau_tol;
+  simulation.rtol = relative_tolerance;
+  simulation.atol = absolute_tolerance;
+  if(!tau_hybrid(&simulation)){
+    std :: cerr << "Integration step size too small" << std :: endl;
+    return 1;
+  }
+  simulation.output_results_buffer(std :: cout);
+  return 0;
+}
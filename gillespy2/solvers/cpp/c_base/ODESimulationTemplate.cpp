@@ -0,0 +1,99 @@
+#include <string>
+#include <vector>
+#include <iostream>
+#include <sstream>
+#include <algorithm>
+#include <csignal>
+#include <math.h>
+#include "model.h"
+#include "ode.h"
+using namespace Gillespy;
+
+//Default values, replaced with command line args
+unsigned int number_trajectories = 0;
+unsigned int number_timesteps = 0;
+double end_time = 0;
+double relative_tolerance = 1e-6;
+double absolute_tolerance = 1e-9;
+
+//Default constants
+__DEFINE_CONSTANTS__
+
+class RateFunction : public IRateFunction{
+public:
+  double evaluate(unsigned int reaction_number, const double* S){
+    switch(reaction_number){
+__DEFINE_ODE_RATES__
+
+    default: //Error
+      return -1;
+    }
+  }
+
+  bool differentiate(unsigned int reaction_number, const double* S, double* derivatives){
+    switch(reaction_number){
+__DEFINE_RATE_DERIVATIVES__
+
+    default: //No analytic derivatives
+      return false;
+    }
+  }
+};
+
+//Builds the model from the generated constants
+std :: unique_ptr<Model> build_model(const unsigned int* initial_populations){
+  std :: vector<std :: string> species_names(s_names, s_names + sizeof(s_names)/sizeof(s_names[0]));
+  std :: vector<unsigned int> species_populations(initial_populations, initial_populations + sizeof(populations)/sizeof(populations[0]));
+  std :: vector<std :: string> reaction_names(r_names, r_names + sizeof(r_names)/sizeof(r_names[0]));
+
+  std :: unique_ptr<Model> model_pointer(new Model(species_names, species_populations, reaction_names));
+  Model& model = *model_pointer;
+
+  //Begin reaction species changes
+__DEFINE_REACTIONS_
+  //End reaction species changes
+  return model_pointer;
+}
+
+int main(int argc, char* argv[]){
+  std :: unique_ptr<Model> model = build_model(populations);
+
+  //Parse command line arguments
+ std :: string arg;
+ for(int i = 1; i < argc - 1; i++){
+   arg = argv[i];
+   if(argc > i+1 && arg.size() > 1 && arg[0] == '-'){
+     std :: stringstream arg_stream(argv[i+1]);
+     switch(arg[1]){
+     case 'e':
+       arg_stream >> end_time;
+       break;
+     case 'r':
+       arg_stream >> relative_tolerance;
+       break;
+     case 'a':
+       arg_stream >> absolute_tolerance;
+       break;
+     case 't':
+       if(arg[2] == 'r'){
+	 arg_stream >> number_trajectories;
+       }else if(arg[2] == 'i'){
+	 arg_stream >> number_timesteps;
+       }
+       break;
+     }
+   }
+ }
+
+  signal(SIGINT, signalHandler);
+  RateFunction rate_function;
+  ODESimulation simulation(model.get(), number_trajectories, number_timesteps, end_time, &rate_function, initial_values);
+  simulation.rtol = relative_tolerance;
+  simulation.atol = absolute_tolerance;
+  if(!ode_solve(&simulation)){
+    std :: cerr << "Step size too small at time " << simulation.current_time << std :: endl;
+    return 1;
+  }
+  simulation.output_results_buffer(std :: cout);
+  return 0;
+}
@@ -2,23 +2,36 @@
 #include <vector>
 #include <iostream>
 #include <sstream>
+#include <algorithm>
+#include <csignal>
 #include <time.h>
 #include <math.h>
 #include "model.h"
 #include "ssa.h"
+#include "rules.h"
 using namespace Gillespy;
 
 //Default values, replaced with command line args
 unsigned int number_trajectories = 0;
 unsigned int number_timesteps = 0;
+unsigned int number_threads = 1;
+std :: string algorithm = "ssa";
 int random_seed = 0;
 double end_time = 0;
+double tau_tol = 0.03;
 bool seed_time = true;
+//Keep only the statistics of the trajectories
+bool statistics_only = false;
+//Summaries of the trajectories to keep instead of the trajectories
+std :: vector<TrajectorySummary> summaries;
 
 //Default constants
 __DEFINE_CONSTANTS__
 
-class PropensityFunction : public IPropensityFunction{
+//Function definitions of the model
+__DEFINE_FUNCTIONS__
+
+class PropensityFunction : public IModelRules{
 public:
   double evaluate(unsigned int reaction_number, unsigned int* S){
     switch(reaction_number){
@@ -28,19 +41,67 @@ __DEFINE_PROPENSITY__
       return -1;
     }
   }
+
+  std :: unique_ptr<IModelRules> copy() const{
+    return std :: unique_ptr<IModelRules>(new PropensityFunction(*this));
+  }
+
+  //Events and rules of the model, rules() returns nullptr if it has none
+__DEFINE_RULES__
 };
 
-int main(int argc, char* argv[]){
-  std :: vector<std :: string> species_names(s_names, s_names + sizeof(s_names)/sizeof(std :: string));
-  std :: vector<unsigned int> species_populations(populations, populations + sizeof(populations)/sizeof(populations[0]));
-  std :: vector<std :: string> reaction_names(r_names, r_names + sizeof(r_names)/sizeof(std :: string));
-  
-  Model model(species_names, species_populations, reaction_names);
+//Builds the model from the generated constants and the given initial populations
+std :: unique_ptr<Model> build_model(const unsigned int* initial_populations){
+  std :: vector<std :: string> species_names(s_names, s_names + sizeof(s_names)/sizeof(s_names[0]));
+  std :: vector<unsigned int> species_populations(initial_populations, initial_populations + sizeof(populations)/sizeof(populations[0]));
+  std :: vector<std :: string> reaction_names(r_names, r_names + sizeof(r_names)/sizeof(r_names[0]));
+
+  std :: unique_ptr<Model> model_pointer(new Model(species_names, species_populations, reaction_names));
+  Model& model = *model_pointer;
 
   //Begin reaction species changes
 __DEFINE_REACTIONS_
   //End reaction species changes
-  model.update_affected_reactions();
+  return model_pointer;
+}
+
+//C interface of the simulation when built as a shared library. Populations are written into output_buffer, laid out as
+//[number_trajectories][number_timesteps][number_species]. Parameters are compiled in, so parameters is ignored, and a
+//NULL initial_state keeps the compiled initial populations. The call only reads its arguments and the compiled
+//constants, so calls may run concurrently. It stops early once interrupt_flag, a flag from new_interrupt_flag() or
+//NULL, is set. tau_tol is the error tolerance of the tau algorithm. Returns 0 when finished, 33 when interrupted, 1 if
+//algorithm is not a known algorithm name.
+extern "C" int simulate(const double* parameters, const unsigned int* initial_state, unsigned int number_trajectories, unsigned int number_timesteps, const double* timeline, int random_seed, unsigned int number_threads, const char* algorithm, double tau_tol, unsigned int* output_buffer, double* stop_time, void* interrupt_flag){
+  std :: unique_ptr<Model> model = build_model(initial_state ? initial_state : populations);
+  PropensityFunction propensity_function;
+  std :: atomic<bool> not_interrupted(false);
+  Simulation simulation(model.get(), number_trajectories, number_timesteps, timeline, &propensity_function, random_seed, output_buffer);
+  simulation.number_threads = number_threads;
+  simulation.tau_tol = tau_tol;
+  simulation.interrupt_flag = interrupt_flag ? static_cast<std :: atomic<bool>*>(interrupt_flag) : &not_interrupted;
+  if(!run_algorithm(&simulation, algorithm)){
+    return 1;
+  }
+  *stop_time = simulation.current_time;
+  return simulation.is_interrupted() ? 33 : 0;
+}
+
+//Creates a flag for one simulate() call, unset until interrupt() is called with it
+extern "C" void* new_interrupt_flag(){
+  return new std :: atomic<bool>(false);
+}
+
+extern "C" void delete_interrupt_flag(void* interrupt_flag){
+  delete static_cast<std :: atomic<bool>*>(interrupt_flag);
+}
+
+//Stops the simulate() call given interrupt_flag, may be called from any thread, before or during the call
+extern "C" void interrupt(void* interrupt_flag){
+  *static_cast<std :: atomic<bool>*>(interrupt_flag) = true;
+}
+
+int main(int argc, char* argv[]){
+  std :: unique_ptr<Model> model = build_model(populations);
  
   //Parse command line arguments
  std :: string arg;
@@ -49,9 +110,18 @@ __DEFINE_REACTIONS_
    if(argc > i+1 && arg.size() > 1 && arg[0] == '-'){
      std :: stringstream arg_stream(argv[i+1]);
      switch(arg[1]){
+     case 'a':
+       arg_stream >> algorithm;
+       break;
      case 's':
-       arg_stream >> random_seed;
-       seed_time = false;
+       if(arg[2] == 't'){
+	 arg_stream >> statistics_only;
+       }else if(arg[2] == 'u'){
+	 summaries = read_summaries(arg_stream);
+       }else{
+	 arg_stream >> random_seed;
+	 seed_time = false;
+       }
        break;
      case 'e':
        arg_stream >> end_time;
@@ -61,6 +131,10 @@ __DEFINE_REACTIONS_
 	 arg_stream >> number_trajectories;
        }else if(arg[2] == 'i'){
 	 arg_stream >> number_timesteps;
+       }else if(arg[2] == 'h'){
+	 arg_stream >> number_threads;
+       }else if(arg[2] == 'a'){
+	 arg_stream >> tau_tol;
        }
        break;
      }
@@ -70,9 +144,16 @@ __DEFINE_REACTIONS_
  if(seed_time){
    random_seed = time(NULL);
  }
+  signal(SIGINT, signalHandler);
   IPropensityFunction *propFun = new PropensityFunction();
-  Simulation simulation(&model, number_trajectories, number_timesteps, end_time, propFun, random_seed, simulation.current_time);
-  ssa_direct(&simulation);
+  Simulation simulation(model.get(), number_trajectories, number_timesteps, end_time, propFun, random_seed, 0, statistics_only, summaries);
+  simulation.number_threads = number_threads;
+  simulation.tau_tol = tau_tol;
+  if(!run_algorithm(&simulation, algorithm)){
+    std :: cerr << "Unknown simulation algorithm " << algorithm << std :: endl;
+    delete propFun;
+    return 1;
+  }
   //std :: cout << simulation << std :: endl;
   simulation.output_results_buffer(std :: cout);
   delete propFun;
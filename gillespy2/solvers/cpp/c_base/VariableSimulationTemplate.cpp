@@ -2,24 +2,46 @@
 #include <vector>
 #include <iostream>
 #include <sstream>
+#include <cstring>
+#include <algorithm>
+#include <csignal>
 #include <time.h>
 #include <math.h>
 #include "model.h"
 #include "ssa.h"
+#include "rules.h"
 using namespace Gillespy;
 
 //Default values, replaced with command line args
 unsigned int number_trajectories = 0;
 unsigned int number_timesteps = 0;
+unsigned int number_threads = 1;
+std :: string algorithm = "ssa";
 int random_seed = 0;
 double end_time = 0;
+double tau_tol = 0.03;
 bool seed_time = true;
+//Keep only the statistics of the trajectories
+bool statistics_only = false;
+//Summaries of the trajectories to keep instead of the trajectories
+std :: vector<TrajectorySummary> summaries;
 
 //Default constants
 __DEFINE_VARIABLES__
 
-class PropensityFunction : public IPropensityFunction{
+//Function definitions of the model
+__DEFINE_FUNCTIONS__
+
+//Holds its own copy of the parameter values, so simulations with different parameters can run at the same time
+class PropensityFunction : public IModelRules{
 public:
+__DEFINE_PARAMETER_MEMBERS__
+
+  //Replaces the parameter values, parameters holds every parameter value in the order of the -parameters argument
+  void set_parameters(const double* parameters){
+__DEFINE_PARAMETER_ASSIGNMENTS__
+  }
+
   double evaluate(unsigned int reaction_number, unsigned int* S){
     switch(reaction_number){
 __DEFINE_PROPENSITY__
@@ -28,27 +50,142 @@ __DEFINE_PROPENSITY__
       return -1;
     }
   }
+
+  std :: unique_ptr<IModelRules> copy() const{
+    return std :: unique_ptr<IModelRules>(new PropensityFunction(*this));
+  }
+
+  //Events and rules of the model, rules() returns nullptr if it has none
+__DEFINE_RULES__
 };
 
+//Builds the model from the generated constants and the given initial populations
+std :: unique_ptr<Model> build_model(const unsigned int* initial_populations){
+  std :: vector<std :: string> species_names(s_names, s_names + sizeof(s_names)/sizeof(s_names[0]));
+  std :: vector<unsigned int> species_populations(initial_populations, initial_populations + sizeof(populations)/sizeof(populations[0]));
+  std :: vector<std :: string> reaction_names(r_names, r_names + sizeof(r_names)/sizeof(r_names[0]));
+
+  std :: unique_ptr<Model> model_pointer(new Model(species_names, species_populations, reaction_names));
+  Model& model = *model_pointer;
+
+  //Begin reaction species changes
+__DEFINE_REACTIONS_
+  //End reaction species changes
+  return model_pointer;
+}
+
+//C interface of the simulation when built as a shared library. Populations are written into output_buffer, laid out as
+//[number_trajectories][number_timesteps][number_species]. parameters holds every parameter value in the order of the
+//-parameters argument, either it or initial_state may be NULL to keep the compiled values. The call only reads its
+//arguments and the compiled constants, so calls may run concurrently. It stops early once interrupt_flag, a flag from
+//new_interrupt_flag() or NULL, is set. tau_tol is the error tolerance of the tau algorithm. Returns 0 when finished,
+//33 when interrupted, 1 if algorithm is not a known algorithm name.
+extern "C" int simulate(const double* parameters, const unsigned int* initial_state, unsigned int number_trajectories, unsigned int number_timesteps, const double* timeline, int random_seed, unsigned int number_threads, const char* algorithm, double tau_tol, unsigned int* output_buffer, double* stop_time, void* interrupt_flag){
+  std :: unique_ptr<Model> model = build_model(initial_state ? initial_state : populations);
+  PropensityFunction propensity_function;
+  if(parameters){
+    propensity_function.set_parameters(parameters);
+  }
+  std :: atomic<bool> not_interrupted(false);
+  Simulation simulation(model.get(), number_trajectories, number_timesteps, timeline, &propensity_function, random_seed, output_buffer);
+  simulation.number_threads = number_threads;
+  simulation.tau_tol = tau_tol;
+  simulation.interrupt_flag = interrupt_flag ? static_cast<std :: atomic<bool>*>(interrupt_flag) : &not_interrupted;
+  if(!run_algorithm(&simulation, algorithm)){
+    return 1;
+  }
+  *stop_time = simulation.current_time;
+  return simulation.is_interrupted() ? 33 : 0;
+}
+
+//Creates a flag for one simulate() call, unset until interrupt() is called with it
+extern "C" void* new_interrupt_flag(){
+  return new std :: atomic<bool>(false);
+}
+
+extern "C" void delete_interrupt_flag(void* interrupt_flag){
+  delete static_cast<std :: atomic<bool>*>(interrupt_flag);
+}
+
+//Stops the simulate() call given interrupt_flag, may be called from any thread, before or during the call
+extern "C" void interrupt(void* interrupt_flag){
+  *static_cast<std :: atomic<bool>*>(interrupt_flag) = true;
+}
+
+//Header of a request read from stdin in worker mode, followed by double[number_parameters] parameter values and
+//unsigned int[number_species] initial populations. Every field is in host byte order.
+struct WorkerRequest{
+  uint32_t number_trajectories;
+  uint32_t number_timesteps;
+  uint32_t number_threads;
+  int32_t random_seed;
+  double end_time;
+  char algorithm[16]; //NUL padded algorithm name
+  double tau_tol;
+};
+
+//Worker mode: simulates each request read from stdin, writing its results to stdout in the binary results format,
+//until stdin is closed. Keeps the simulation resident across parameter sets.
+int serve_requests(){
+  const unsigned int number_species = sizeof(populations)/sizeof(populations[0]);
+  std :: vector<double> parameters(number_parameters);
+  std :: vector<unsigned int> initial_state(number_species);
+  WorkerRequest request;
+  while(std :: cin.read(reinterpret_cast<char*>(&request), sizeof(request))){
+    std :: cin.read(reinterpret_cast<char*>(parameters.data()), sizeof(double) * number_parameters);
+    std :: cin.read(reinterpret_cast<char*>(initial_state.data()), sizeof(unsigned int) * number_species);
+    if(!std :: cin){
+      return 1;
+    }
+    interrupted = false;
+    PropensityFunction propensity_function;
+    propensity_function.set_parameters(parameters.data());
+    std :: unique_ptr<Model> model = build_model(initial_state.data());
+    Simulation simulation(model.get(), request.number_trajectories, request.number_timesteps, request.end_time, &propensity_function, request.random_seed, 0);
+    simulation.number_threads = request.number_threads;
+    simulation.tau_tol = request.tau_tol;
+    if(!run_algorithm(&simulation, std :: string(request.algorithm, strnlen(request.algorithm, sizeof(request.algorithm))))){
+      return 1;
+    }
+    simulation.output_results_buffer(std :: cout);
+  }
+  return 0;
+}
+
 int main(int argc, char* argv[]){
  //Parse command line arguments
  std :: string arg;
+ for(int i = 1; i < argc; i++){
+   if(std :: string(argv[i]) == "-worker"){
+     signal(SIGINT, signalHandler);
+     return serve_requests();
+   }
+ }
  for(int i = 1; i < argc - 1; i++){
    arg = argv[i];
    if(argc > i+1 && arg.size() > 1 && arg[0] == '-'){
      std :: stringstream arg_stream(argv[i+1]);
      switch(arg[1]){
      case 'i':
-       for(int j = 0; j < int(sizeof(populations)); j++){
+       for(int j = 0; j < int(sizeof(populations)/sizeof(populations[0])); j++){
        arg_stream >> populations[j];
        }
        break;
      case 'p':
 __DEFINE_PARAMETER_UPDATES__
        break;
+     case 'a':
+       arg_stream >> algorithm;
+       break;
      case 's':
-       arg_stream >> random_seed;
-       seed_time = false;
+       if(arg[2] == 't'){
+	 arg_stream >> statistics_only;
+       }else if(arg[2] == 'u'){
+	 summaries = read_summaries(arg_stream);
+       }else{
+	 arg_stream >> random_seed;
+	 seed_time = false;
+       }
        break;
      case 'e':
        arg_stream >> end_time;
@@ -58,29 +195,31 @@ __DEFINE_PARAMETER_UPDATES__
 	 arg_stream >> number_trajectories;
        }else if(arg[2] == 'i'){
 	 arg_stream >> number_timesteps;
+       }else if(arg[2] == 'h'){
+	 arg_stream >> number_threads;
+       }else if(arg[2] == 'a'){
+	 arg_stream >> tau_tol;
        }
        break;
      }
    }
  }
 
-  std :: vector<std :: string> species_names(s_names, s_names + sizeof(s_names)/sizeof(std :: string));
-  std :: vector<unsigned int> species_populations(populations, populations + sizeof(populations)/sizeof(populations[0]));
-  std :: vector<std :: string> reaction_names(r_names, r_names + sizeof(r_names)/sizeof(std :: string));
-  
-  Model model(species_names, species_populations, reaction_names);
-
-  //Begin reaction species changes
-__DEFINE_REACTIONS_
-  //End reaction species changes
-  model.update_affected_reactions();
+  std :: unique_ptr<Model> model = build_model(populations);
  
  if(seed_time){
    random_seed = time(NULL);
  }
+  signal(SIGINT, signalHandler);
   IPropensityFunction *propFun = new PropensityFunction();
-  Simulation simulation(&model, number_trajectories, number_timesteps, end_time, propFun, random_seed,simulation.current_time);
-  ssa_direct(&simulation);
+  Simulation simulation(model.get(), number_trajectories, number_timesteps, end_time, propFun, random_seed, 0, statistics_only, summaries);
+  simulation.number_threads = number_threads;
+  simulation.tau_tol = tau_tol;
+  if(!run_algorithm(&simulation, algorithm)){
+    std :: cerr << "Unknown simulation algorithm " << algorithm << std :: endl;
+    delete propFun;
+    return 1;
+  }
   //std :: cout << simulation << std :: endl;
   simulation.output_results_buffer(std :: cout);
   delete propFun;
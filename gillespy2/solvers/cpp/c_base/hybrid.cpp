@@ -0,0 +1,393 @@
+#include "hybrid.h"
+#include "ode.h"
+#include "ssa.h"
+#include <cmath>
+#include <limits>
+#include <algorithm>
+
+namespace Gillespy{
+
+  //Reactions whose reactants could be used up by this many firings are critical
+  const double CRITICAL_THRESHOLD = 10;
+  //Shortest step selected, shorter steps are only taken to reach output times and events
+  const double MIN_TAU = 1e-10;
+
+  HybridSimulation :: HybridSimulation(Model* model, unsigned int number_trajectories, unsigned int number_timesteps, double end_time, IHybridPropensityFunction* propensity_function, const double* initial_state, int random_seed) : model(model), propensity_function(propensity_function), initial_state(initial_state, initial_state + model -> number_species), species_modes(model -> number_species, DYNAMIC), switch_tols(model -> number_species, 0.03), switch_mins(model -> number_species, 0), fixed_species(model -> number_species, false), timeline(number_timesteps), end_time(end_time), random_seed(random_seed), number_timesteps(number_timesteps), number_trajectories(number_trajectories), trajectories(number_trajectories * number_timesteps * model -> number_species, 0.0){
+    double timestep_size = end_time/(number_timesteps-1);
+    for(unsigned int i = 0; i < number_timesteps; i++){
+      timeline[i] = timestep_size * i;
+    }
+  }
+
+  void HybridSimulation :: output_results_buffer(std :: ostream& os){
+    uint32_t header[4] = {CONTINUOUS_RESULTS_MAGIC, number_trajectories, number_timesteps, model -> number_species};
+    double stop_time = current_time;
+    os.write(reinterpret_cast<const char*>(header), sizeof(header));
+    os.write(reinterpret_cast<const char*>(&stop_time), sizeof(stop_time));
+    os.write(reinterpret_cast<const char*>(timeline.data()), sizeof(double) * number_timesteps);
+    os.write(reinterpret_cast<const char*>(trajectories.data()), sizeof(double) * trajectories.size());
+    os.flush();
+  }
+
+  //Reaction structure of a hybrid simulation, shared by its trajectories
+  struct HybridReactions{
+    //Species changes of each reaction in compressed sparse row form, without the fixed species
+    std :: vector<unsigned int> change_offsets;
+    std :: vector<unsigned int> change_species;
+    std :: vector<int> change_values;
+    //Species each reaction consumes or produces, with the molecules it consumes and produces of them
+    std :: vector<unsigned int> species_offsets;
+    std :: vector<unsigned int> species;
+    std :: vector<double> consumed;
+    std :: vector<double> produced;
+    //Highest order of the reactions each species is a reactant of, and the most molecules of it one of those
+    //reactions consumes, 0 for species that are no reactant
+    std :: vector<unsigned int> highest_order;
+    std :: vector<unsigned int> highest_order_count;
+    explicit HybridReactions(const HybridSimulation& simulation) :
+      highest_order(simulation.model -> number_species, 0), highest_order_count(simulation.model -> number_species, 0){
+      const Model& model = *(simulation.model);
+      change_offsets.push_back(0);
+      species_offsets.push_back(0);
+      std :: vector<double> reactant_count(model.number_species);
+      for(unsigned int reaction = 0; reaction < model.number_reactions; reaction++){
+        std :: fill(reactant_count.begin(), reactant_count.end(), 0.0);
+        unsigned int order = 0;
+        for(unsigned int i = model.reactant_offsets[reaction]; i < model.reactant_offsets[reaction + 1]; i++){
+          reactant_count[model.reactant_species[i]] = model.reactant_counts[i];
+          order += model.reactant_counts[i];
+        }
+        for(unsigned int i = model.reactant_offsets[reaction]; i < model.reactant_offsets[reaction + 1]; i++){
+          unsigned int reactant = model.reactant_species[i];
+          if(order > highest_order[reactant] || (order == highest_order[reactant] && model.reactant_counts[i] > highest_order_count[reactant])){
+            highest_order[reactant] = order;
+            highest_order_count[reactant] = model.reactant_counts[i];
+          }
+        }
+        for(unsigned int s = 0; s < model.number_species; s++){
+          int change = model.reactions[reaction].species_change[s];
+          if(change != 0 && !simulation.fixed_species[s]){
+            change_species.push_back(s);
+            change_values.push_back(change);
+          }
+          //A species the reaction produces as many of as it consumes is a reactant
+          if(change != 0 || reactant_count[s] > 0){
+            species.push_back(s);
+            consumed.push_back(reactant_count[s]);
+            produced.push_back(reactant_count[s] + change);
+          }
+        }
+        change_offsets.push_back(change_species.size());
+        species_offsets.push_back(species.size());
+      }
+    }
+
+    //g_i of Cao, Gillespie and Petzold, bounding the relative change of the propensities of the reactions species
+    //is a reactant of by its own relative change
+    double relative_change_bound(unsigned int s, double amount) const{
+      unsigned int order = highest_order[s];
+      unsigned int count = highest_order_count[s];
+      if(count >= 2 && amount > count - 1){
+        if(order == 2){
+          return 2 + 1 / (amount - 1);
+        }
+        if(order == 3 && count == 2){
+          return 1.5 * (2 + 1 / (amount - 1));
+        }
+        if(count == 3){
+          return 3 + 1 / (amount - 1) + 2 / (amount - 2);
+        }
+      }
+      return order;
+    }
+  };
+
+  //State of one trajectory of a hybrid simulation. Its integrated system holds the species amounts, the rate rule
+  //variables, and the integrated propensity of every reaction, offset by the negative threshold it fires at.
+  class HybridTrajectory : public IOdeSystem{
+  public:
+    HybridTrajectory(HybridSimulation* simulation, const HybridReactions& reactions, unsigned int trajectory_number) :
+      simulation(*simulation), model(*(simulation -> model)), reactions(reactions),
+      rules(static_cast<IHybridPropensityFunction*>((simulation -> propensity_function) -> copy().release())),
+      rng(trajectory_rng(simulation -> random_seed, trajectory_number)), events(*rules),
+      number_species(model.number_species), number_rate_rules(rules -> number_rate_rules()),
+      y(number_species + number_rate_rules + model.number_reactions), work(number_species),
+      propensities(model.number_reactions), deterministic_species(number_species), deterministic_reactions(model.number_reactions),
+      stepper(*this){
+      pure_ode = true;
+      pure_stochastic = true;
+      for(unsigned int s = 0; s < number_species; s++){
+        pure_ode = pure_ode && simulation -> species_modes[s] == CONTINUOUS;
+        pure_stochastic = pure_stochastic && simulation -> species_modes[s] == DISCRETE;
+        //Dynamic species start deterministic, until their first step is selected
+        deterministic_species[s] = simulation -> species_modes[s] != DISCRETE;
+      }
+    }
+
+    unsigned int size() const{
+      return y.size();
+    }
+
+    //Changes of the deterministic species and rate rule variables, and the propensities of the stochastic reactions
+    void evaluate(double t, const double* state, double* derivatives){
+      std :: copy(state, state + number_species, work.begin());
+      rules -> set_rate_rule_variables(state + number_species, work.data());
+      rules -> apply_assignment_rules(t, work.data());
+      std :: fill(derivatives, derivatives + size(), 0.0);
+      double* reaction_derivatives = derivatives + number_species + number_rate_rules;
+      for(unsigned int reaction = 0; reaction < model.number_reactions; reaction++){
+        if(!deterministic_reactions[reaction]){
+          reaction_derivatives[reaction] = rules -> propensity(reaction, work.data());
+          continue;
+        }
+        //Continuous species change with the deterministic rate, dynamic ones with the propensity
+        double rate = 0;
+        double propensity = 0;
+        bool has_rate = false;
+        bool has_propensity = false;
+        for(unsigned int i = reactions.change_offsets[reaction]; i < reactions.change_offsets[reaction + 1]; i++){
+          unsigned int s = reactions.change_species[i];
+          if(simulation.species_modes[s] == CONTINUOUS){
+            if(!has_rate){
+              rate = rules -> rate(reaction, work.data());
+              has_rate = true;
+            }
+            derivatives[s] += reactions.change_values[i] * rate;
+          }else{
+            if(!has_propensity){
+              propensity = rules -> propensity(reaction, work.data());
+              has_propensity = true;
+            }
+            derivatives[s] += reactions.change_values[i] * propensity;
+          }
+        }
+      }
+      rules -> rate_rule_derivatives(t, work.data(), derivatives + number_species);
+    }
+
+    //Simulates the trajectory into its slice of trajectories. Returns the simulation time it reached, negative if the
+    //integration step size underflowed.
+    double simulate(unsigned int trajectory_number){
+      trajectory = &(simulation.trajectories[trajectory_number * simulation.number_timesteps * number_species]);
+      std :: vector<double> amounts(simulation.initial_state);
+      rules -> apply_assignment_rules(0, amounts.data());
+      events.process_events(0, amounts.data());
+      double* thresholds = &y[number_species + number_rate_rules];
+      for(unsigned int reaction = 0; reaction < model.number_reactions; reaction++){
+        thresholds[reaction] = log(uniform());
+      }
+      entry_count = 0;
+      double current_time = 0;
+      double end_time = simulation.end_time;
+      double step_size = end_time;
+      std :: vector<double> saved;
+      while(current_time < end_time){
+        if(simulation.is_interrupted()){
+          break;
+        }
+        record_entries(amounts, current_time);
+        //Steps end on output times and delayed events
+        double next_stop = std :: min(std :: min(simulation.timeline[entry_count], end_time), events.next_pending_time());
+        for(unsigned int reaction = 0; reaction < model.number_reactions; reaction++){
+          propensities[reaction] = rules -> propensity(reaction, amounts.data());
+        }
+        double tau = pure_ode ? next_stop - current_time : select_tau(amounts, next_stop - current_time);
+        //A trigger depending only on time ends the step at the time it changes, found by bisection
+        if(events.triggers_change(current_time + tau, amounts.data())){
+          double lower = 0;
+          while(std :: nextafter(current_time + lower, end_time) < current_time + tau){
+            double middle = lower + (tau - lower) / 2;
+            if(middle <= lower || middle >= tau){
+              break;
+            }
+            if(events.triggers_change(current_time + middle, amounts.data())){
+              tau = middle;
+            }else{
+              lower = middle;
+            }
+          }
+        }
+        if(!pure_stochastic && !pure_ode){
+          switch_species(amounts, tau);
+        }
+        flag_reactions();
+        //Stochastic dynamic species are whole numbers of molecules
+        for(unsigned int s = 0; s < number_species; s++){
+          if(simulation.species_modes[s] == DYNAMIC && !deterministic_species[s]){
+            amounts[s] = std :: floor(amounts[s]);
+          }
+        }
+        std :: copy(amounts.begin(), amounts.end(), y.begin());
+        rules -> get_rate_rule_variables(amounts.data(), &y[number_species]);
+        saved = y;
+        while(true){
+          if(!stepper.integrate(current_time, current_time + tau, y, step_size, simulation.rtol, simulation.atol)){
+            return -1;
+          }
+          std :: copy(y.begin(), y.begin() + number_species, amounts.begin());
+          rules -> set_rate_rule_variables(&y[number_species], amounts.data());
+          if(fire_reactions(amounts)){
+            break;
+          }
+          //A population became negative, retry with a smaller step
+          y = saved;
+          tau /= 2;
+        }
+        current_time = tau < next_stop - current_time ? current_time + tau : next_stop;
+        rules -> apply_assignment_rules(current_time, amounts.data());
+        events.process_events(current_time, amounts.data());
+      }
+      if(current_time >= end_time){
+        record_entries(amounts, std :: numeric_limits<double> :: infinity());
+      }
+      return current_time;
+    }
+
+  private:
+    HybridSimulation& simulation;
+    Model& model;
+    const HybridReactions& reactions;
+    std :: unique_ptr<IHybridPropensityFunction> rules;
+    std :: mt19937_64 rng;
+    EventQueue events;
+    unsigned int number_species;
+    unsigned int number_rate_rules;
+    bool pure_ode;
+    bool pure_stochastic;
+    std :: vector<double> y;
+    std :: vector<double> work;
+    std :: vector<double> propensities;
+    std :: vector<bool> deterministic_species;
+    std :: vector<bool> deterministic_reactions;
+    RosenbrockStepper stepper;
+    double* trajectory;
+    unsigned int entry_count;
+
+    double uniform(){
+      //In (0, 1], so its logarithm is finite
+      return (rng() + 1.0) / (rng.max() + 1.0);
+    }
+
+    //Copies the amounts to the output times up to time, with the assignment rules evaluated at each of them
+    void record_entries(const std :: vector<double>& amounts, double time){
+      while(entry_count < simulation.number_timesteps && simulation.timeline[entry_count] <= time){
+        double* output = trajectory + entry_count * number_species;
+        std :: copy(amounts.begin(), amounts.end(), output);
+        rules -> apply_assignment_rules(simulation.timeline[entry_count], output);
+        entry_count++;
+      }
+    }
+
+    //Step size bounding the relative change of the propensities by tau_tol, Cao, Gillespie and Petzold, at most
+    //max_tau
+    double select_tau(const std :: vector<double>& amounts, double max_tau){
+      bool critical = false;
+      double critical_tau = std :: numeric_limits<double> :: infinity();
+      std :: vector<double> mu(number_species, 0.0), sigma(number_species, 0.0);
+      for(unsigned int reaction = 0; reaction < model.number_reactions; reaction++){
+        if(propensities[reaction] <= 0){
+          continue;
+        }
+        critical_tau = std :: min(critical_tau, 1 / propensities[reaction]);
+        for(unsigned int i = model.reactant_offsets[reaction]; i < model.reactant_offsets[reaction + 1]; i++){
+          unsigned int s = model.reactant_species[i];
+          double count = model.reactant_counts[i];
+          critical = critical || amounts[s] / count < CRITICAL_THRESHOLD;
+          mu[s] += count * propensities[reaction];
+          sigma[s] += count * count * propensities[reaction];
+        }
+      }
+      double tau = std :: numeric_limits<double> :: infinity();
+      for(unsigned int s = 0; s < number_species; s++){
+        if(mu[s] > 0){
+          double max_change = std :: max(simulation.tau_tol / reactions.relative_change_bound(s, amounts[s]) * amounts[s], 1.0);
+          tau = std :: min(tau, std :: min(max_change / mu[s], max_change * max_change / sigma[s]));
+        }
+      }
+      if(critical){
+        tau = std :: min(tau, critical_tau);
+      }
+      return std :: isfinite(tau) && tau > 0 ? std :: min(std :: max(tau, MIN_TAU), max_tau) : max_tau;
+    }
+
+    //Flags the dynamic species whose expected change over a step of size tau has a small enough coefficient of
+    //variation, or expected amount is above the switching minimum
+    void switch_species(const std :: vector<double>& amounts, double tau){
+      std :: vector<double> mean(amounts), variance(number_species, 0.0);
+      for(unsigned int reaction = 0; reaction < model.number_reactions; reaction++){
+        for(unsigned int i = reactions.species_offsets[reaction]; i < reactions.species_offsets[reaction + 1]; i++){
+          unsigned int s = reactions.species[i];
+          mean[s] += tau * propensities[reaction] * (reactions.produced[i] - reactions.consumed[i]);
+          variance[s] += tau * propensities[reaction] * (reactions.consumed[i] * reactions.consumed[i] + reactions.produced[i] * reactions.produced[i]);
+        }
+      }
+      for(unsigned int s = 0; s < number_species; s++){
+        if(simulation.species_modes[s] != DYNAMIC){
+          continue;
+        }
+        if(simulation.switch_mins[s] == 0){
+          double coefficient_of_variation = mean[s] > 0 ? variance[s] / mean[s] : 1;
+          deterministic_species[s] = coefficient_of_variation < simulation.switch_tols[s];
+        }else{
+          deterministic_species[s] = mean[s] > simulation.switch_mins[s];
+        }
+      }
+    }
+
+    //A reaction is deterministic if every species it consumes or produces is
+    void flag_reactions(){
+      for(unsigned int reaction = 0; reaction < model.number_reactions; reaction++){
+        bool deterministic = !pure_stochastic;
+        for(unsigned int i = reactions.species_offsets[reaction]; deterministic && i < reactions.species_offsets[reaction + 1]; i++){
+          unsigned int s = reactions.species[i];
+          deterministic = simulation.species_modes[s] == CONTINUOUS || (simulation.species_modes[s] == DYNAMIC && deterministic_species[s]);
+        }
+        deterministic_reactions[reaction] = deterministic;
+      }
+    }
+
+    //Fires every stochastic reaction once for each time its integrated propensity crossed its threshold. Returns false
+    //if a species it changed became negative.
+    bool fire_reactions(std :: vector<double>& amounts){
+      double* thresholds = &y[number_species + number_rate_rules];
+      bool negative = false;
+      for(unsigned int reaction = 0; reaction < model.number_reactions; reaction++){
+        if(deterministic_reactions[reaction]){
+          continue;
+        }
+        unsigned int firings = 0;
+        while(thresholds[reaction] >= 0){
+          firings++;
+          thresholds[reaction] += log(uniform());
+        }
+        for(unsigned int i = reactions.change_offsets[reaction]; firings > 0 && i < reactions.change_offsets[reaction + 1]; i++){
+          unsigned int s = reactions.change_species[i];
+          amounts[s] += reactions.change_values[i] * (double) firings;
+          negative = negative || amounts[s] < 0;
+        }
+      }
+      return !negative;
+    }
+  };
+
+  bool tau_hybrid(HybridSimulation* simulation){
+    if(!simulation){
+      return true;
+    }
+    HybridReactions reactions(*simulation);
+    std :: atomic<bool> failed(false);
+    simulation -> current_time = run_trajectories(simulation -> number_trajectories, simulation -> number_threads, simulation -> end_time, simulation -> interrupt_flag, [simulation, &reactions, &failed](){
+      return [simulation, &reactions, &failed](unsigned int trajectory_number){
+        //Each trajectory is simulated with its own copy of the rules
+        HybridTrajectory trajectory(simulation, reactions, trajectory_number);
+        double reached_time = trajectory.simulate(trajectory_number);
+        if(reached_time < 0){
+          failed = true;
+          return 0.0;
+        }
+        return reached_time;
+      };
+    });
+    return !failed;
+  }
+}
@@ -0,0 +1,71 @@
+#ifndef GILLESPY_HYBRID
+#define GILLESPY_HYBRID
+#include "model.h"
+#include "rules.h"
+
+namespace Gillespy{
+
+  //Representation of a species in a hybrid simulation, the values of Species.mode
+  enum SpeciesMode{
+    //Always a whole number of molecules, changed only by stochastic reactions
+    DISCRETE = 0,
+    //Always a concentration, changed only by the rate equations
+    CONTINUOUS = 1,
+    //Switched between the two each step, by the coefficient of variation of its expected change
+    DYNAMIC = 2
+  };
+
+  //Propensities, rates, events and rules of a hybrid model. Its expressions read species amounts as doubles.
+  class IHybridPropensityFunction : public IModelRules{
+  public:
+    //Stochastic propensity of the reaction
+    virtual double propensity(unsigned int reaction_number, const double* S) = 0;
+    //Deterministic rate of the reaction, that continuous species change with
+    virtual double rate(unsigned int reaction_number, const double* S) = 0;
+  };
+
+  //Represents the data of a hybrid simulation
+  struct HybridSimulation{
+    Model* model;
+    IHybridPropensityFunction* propensity_function;
+    std :: vector<double> initial_state;
+    //SpeciesMode, switching tolerance and switching minimum of every species, see Species
+    std :: vector<int> species_modes;
+    std :: vector<double> switch_tols;
+    std :: vector<double> switch_mins;
+    //Species whose amounts reactions do not change, constant species
+    std :: vector<bool> fixed_species;
+    std :: vector<double> timeline;
+    double end_time;
+    double current_time = 0;
+    int random_seed;
+    unsigned int number_timesteps;
+    unsigned int number_trajectories;
+    unsigned int number_threads = 1;
+    //Relative error tolerance of the step size selection
+    double tau_tol = 0.03;
+    //Relative and absolute error tolerances of the integration
+    double rtol = 1e-6;
+    double atol = 1e-9;
+    //Species amounts in [trajectory][timestep][species] order
+    std :: vector<double> trajectories;
+    //Stops the simulation when set
+    const std :: atomic<bool>* interrupt_flag = &interrupted;
+    bool is_interrupted() const { return *interrupt_flag; }
+    HybridSimulation(Model* model, unsigned int number_trajectories, unsigned int number_timesteps, double end_time, IHybridPropensityFunction* propensity_function, const double* initial_state, int random_seed);
+    //Writes the results in the binary results protocol, with double populations and CONTINUOUS_RESULTS_MAGIC
+    void output_results_buffer(std :: ostream& os);
+  };
+
+  //Tau-hybrid method of the TauHybridSolver. Each step of size tau, selected like a tau-leap, integrates the rate
+  //equations of the deterministic reactions, the rate rules, and the integrated propensity of every stochastic
+  //reaction, with the Rosenbrock method of ode.h. A stochastic reaction fires each time its integrated propensity
+  //crosses an exponentially distributed threshold. A dynamic species is deterministic while the coefficient of
+  //variation of its expected change over a step is below its switching tolerance, or while its expected amount is
+  //above its switching minimum if it has one, and a reaction is deterministic if all its species are. A step that
+  //makes a population negative is retried with half the step size. Events and assignment rules are applied between
+  //steps, steps ending at output times and delayed events, and at the time a trigger depending only on time becomes
+  //true. Returns false if the integration step size underflows.
+  bool tau_hybrid(HybridSimulation* simulation);
+}
+#endif
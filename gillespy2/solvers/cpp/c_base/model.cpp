@@ -1,6 +1,14 @@
 #include "model.h"
+#include <string.h>//Included for memcpy only
+#include <algorithm>//Included for min/max of the statistics
 
 namespace Gillespy{
+
+  std :: atomic<bool> interrupted(false);
+
+  void signalHandler(int signum){
+    interrupted = true;
+  }
   
   Model :: Model(std :: vector<std :: string> species_names, std :: vector<unsigned int> species_populations, std :: vector<std :: string> reaction_names):
     number_species(species_names.size()),
@@ -19,53 +27,113 @@ namespace Gillespy{
       for(unsigned int j = 0; j < number_species; j++){
 	reactions[i].species_change[j] = 0;	
       }
-      reactions[i].affected_reactions = std :: vector<unsigned int>();
     }
+    affected_offsets.assign(number_reactions + 1, 0);
+    reactant_offsets.assign(number_reactions + 1, 0);
   }
 
-  void Model :: update_affected_reactions(){
-    //Clear affected_reactions for each reaction
-    for(unsigned int i = 0; i < number_reactions; i++){
-      reactions[i].affected_reactions.clear();
-    }   
-    //Check all reactions for common species changes -> affected reactions
-    for(unsigned int r1 = 0; r1 < number_reactions; r1++){
-      for(unsigned int r2 = 0; r2 < number_reactions; r2++){
-	    for(unsigned int s = 0; s < number_species; s++){
-	        if(reactions[r2].species_change[s] != 0){
-	            reactions[r1].affected_reactions.push_back(r2);
-	        }
-	    }
+  void Model :: set_affected_reactions(const unsigned int* offsets, const unsigned int* indices){
+    affected_offsets.assign(offsets, offsets + number_reactions + 1);
+    affected_reactions.assign(indices, indices + affected_offsets[number_reactions]);
+  }
+
+  void Model :: set_reactants(const unsigned int* offsets, const unsigned int* species, const unsigned int* counts){
+    reactant_offsets.assign(offsets, offsets + number_reactions + 1);
+    reactant_species.assign(species, species + reactant_offsets[number_reactions]);
+    reactant_counts.assign(counts, counts + reactant_offsets[number_reactions]);
+  }
+
+  EnsembleStatistics :: EnsembleStatistics(unsigned int number_timesteps, unsigned int number_species) : number_timesteps(number_timesteps), number_species(number_species), counts(number_timesteps, 0), mean(number_timesteps * number_species, 0.0), m2(number_timesteps * number_species, 0.0), minimum(number_timesteps * number_species, 0.0), maximum(number_timesteps * number_species, 0.0){
+  }
+
+  void EnsembleStatistics :: add(unsigned int* const* trajectory, unsigned int number_entries){
+    for(unsigned int i = 0; i < number_entries; i++){
+      uint32_t count = ++counts[i];
+      for(unsigned int j = 0; j < number_species; j++){
+        unsigned int k = i * number_species + j;
+        double value = trajectory[i][j];
+        double delta = value - mean[k];
+        mean[k] += delta / count;
+        m2[k] += delta * (value - mean[k]);
+        if(count == 1){
+          minimum[k] = value;
+          maximum[k] = value;
+        }else{
+          minimum[k] = std :: min(minimum[k], value);
+          maximum[k] = std :: max(maximum[k], value);
+        }
       }
     }
   }
 
+  void EnsembleStatistics :: merge(const EnsembleStatistics& other){
+    for(unsigned int i = 0; i < number_timesteps; i++){
+      double count = counts[i];
+      double other_count = other.counts[i];
+      if(other_count == 0){
+        continue;
+      }
+      double total = count + other_count;
+      for(unsigned int j = 0; j < number_species; j++){
+        unsigned int k = i * number_species + j;
+        double delta = other.mean[k] - mean[k];
+        mean[k] += delta * other_count / total;
+        m2[k] += other.m2[k] + delta * delta * count * other_count / total;
+        minimum[k] = count == 0 ? other.minimum[k] : std :: min(minimum[k], other.minimum[k]);
+        maximum[k] = count == 0 ? other.maximum[k] : std :: max(maximum[k], other.maximum[k]);
+      }
+      counts[i] += other.counts[i];
+    }
+  }
 
-  Simulation :: Simulation(Model* model, unsigned int number_trajectories, unsigned int number_timesteps, double end_time, IPropensityFunction* propensity_function, int random_seed,double current_time) : model(model), end_time(end_time), random_seed(random_seed), number_timesteps(number_timesteps), number_trajectories(number_trajectories), propensity_function(propensity_function){
+  Simulation :: Simulation(Model* model, unsigned int number_trajectories, unsigned int number_timesteps, double end_time, IPropensityFunction* propensity_function, int random_seed,double current_time, bool statistics_only, const std :: vector<TrajectorySummary>& summaries) : model(model), end_time(end_time), random_seed(random_seed), number_timesteps(number_timesteps), number_trajectories(number_trajectories), summaries(summaries), propensity_function(propensity_function), owns_trajectories(true){
     timeline = new double[number_timesteps];
     double timestep_size = end_time/(number_timesteps-1);
     for(unsigned int i = 0; i < number_timesteps; i++){
       timeline[i] = timestep_size * i;
     }
+    if(statistics_only || !summaries.empty()){
+      trajectories_1D = nullptr;
+      trajectories = new unsigned int**[number_trajectories]();
+      if(statistics_only){
+        statistics.reset(new EnsembleStatistics(number_timesteps, model -> number_species));
+      }
+      //Trajectories left unstarted by an interrupt have no summaries
+      summary_values.assign(number_trajectories * summaries.size(), std :: nan(""));
+      return;
+    }
+    //Zero initialized, trajectories left unstarted by an interrupt are never written
+    trajectories_1D = new unsigned int[number_trajectories * number_timesteps * (model -> number_species)]();
+    index_trajectories();
+  }
+
+  Simulation :: Simulation(Model* model, unsigned int number_trajectories, unsigned int number_timesteps, const double* timeline, IPropensityFunction* propensity_function, int random_seed, unsigned int* output_buffer) : model(model), end_time(timeline[number_timesteps - 1]), random_seed(random_seed), number_timesteps(number_timesteps), number_trajectories(number_trajectories), trajectories_1D(output_buffer), propensity_function(propensity_function), owns_trajectories(false){
+    this -> timeline = new double[number_timesteps];
+    memcpy(this -> timeline, timeline, sizeof(double) * number_timesteps);
+    index_trajectories();
+  }
+
+  void Simulation :: index_trajectories(){
     unsigned int trajectory_size = number_timesteps * (model -> number_species);
-    trajectories_1D = new unsigned int[number_trajectories * trajectory_size];
     trajectories = new unsigned int**[number_trajectories];
     for(unsigned int i = 0; i < number_trajectories; i++){
       trajectories[i] = new unsigned int*[number_timesteps];
       for(unsigned int j = 0; j < number_timesteps; j++){
 	trajectories[i][j] = &(trajectories_1D[i * trajectory_size + j *  (model -> number_species)]);
       }
-    }    
+    }
   }
 
 
   Simulation :: ~Simulation(){
-    delete timeline;
-    delete trajectories_1D;
+    delete[] timeline;
+    if(owns_trajectories){
+      delete[] trajectories_1D;
+    }
     for(unsigned int i = 0; i < number_trajectories; i++){
-      delete trajectories[i];
+      delete[] trajectories[i];
     }
-    delete trajectories;
+    delete[] trajectories;
   }
 
   
@@ -83,15 +151,55 @@ namespace Gillespy{
   }
 
 void Simulation :: output_results_buffer(std::ostream& os){
-    for (int i = 0 ; i < number_trajectories; i++){
-        for (int j = 0; j<number_timesteps;j++){
-            os<<timeline[j]<<',';
-            for (int k = 0; k<model->number_species; k++){
-                os<<trajectories[i][j][k]<<',';
-                }
-            }
-         }
-    os<<(int)current_time;
+    if(!summaries.empty()){
+      //Summaries protocol, the header of the results protocol with magic SUMMARY_RESULTS_MAGIC and the number of
+      //summaries in place of the number of species, followed by double[trajectories][summaries] summary values
+      uint32_t header[4] = {SUMMARY_RESULTS_MAGIC, number_trajectories, number_timesteps, (uint32_t) summaries.size()};
+      double stop_time = current_time;
+      os.write(reinterpret_cast<const char*>(header), sizeof(header));
+      os.write(reinterpret_cast<const char*>(&stop_time), sizeof(stop_time));
+      os.write(reinterpret_cast<const char*>(summary_values.data()), sizeof(double) * summary_values.size());
+      os.flush();
+      return;
     }
+    if(statistics){
+      //Statistics protocol, the header and timeline of the results protocol with magic STATISTICS_RESULTS_MAGIC,
+      //followed by uint32[timesteps] trajectory counts, then the double[timesteps][species] mean, variance, minimum
+      //and maximum of the populations
+      uint32_t header[4] = {STATISTICS_RESULTS_MAGIC, number_trajectories, number_timesteps, model -> number_species};
+      double stop_time = current_time;
+      std :: vector<double> variance(statistics -> m2.size(), 0.0);
+      for(unsigned int i = 0; i < number_timesteps; i++){
+        for(unsigned int j = 0; j < model -> number_species; j++){
+          unsigned int k = i * (model -> number_species) + j;
+          if(statistics -> counts[i] > 0){
+            variance[k] = statistics -> m2[k] / statistics -> counts[i];
+          }
+        }
+      }
+      os.write(reinterpret_cast<const char*>(header), sizeof(header));
+      os.write(reinterpret_cast<const char*>(&stop_time), sizeof(stop_time));
+      os.write(reinterpret_cast<const char*>(timeline), sizeof(double) * number_timesteps);
+      os.write(reinterpret_cast<const char*>(statistics -> counts.data()), sizeof(uint32_t) * number_timesteps);
+      for(const std :: vector<double>* moment : {&(statistics -> mean), &variance, &(statistics -> minimum), &(statistics -> maximum)}){
+        os.write(reinterpret_cast<const char*>(moment -> data()), sizeof(double) * moment -> size());
+      }
+      os.flush();
+      return;
+    }
+    //Binary results protocol, written in host byte order (little-endian on every supported platform,
+    //the magic number lets the reader detect a mismatch):
+    //  header:   uint32 magic, uint32 trajectories, uint32 timesteps, uint32 species, double stop time
+    //  timeline: double[timesteps], shared by every trajectory
+    //  body:     uint32[trajectories][timesteps][species] populations
+    uint32_t header[4] = {RESULTS_MAGIC, number_trajectories, number_timesteps, model -> number_species};
+    double stop_time = current_time;
+    os.write(reinterpret_cast<const char*>(header), sizeof(header));
+    os.write(reinterpret_cast<const char*>(&stop_time), sizeof(stop_time));
+    os.write(reinterpret_cast<const char*>(timeline), sizeof(double) * number_timesteps);
+    os.write(reinterpret_cast<const char*>(trajectories_1D),
+             sizeof(unsigned int) * number_trajectories * number_timesteps * (model -> number_species));
+    os.flush();
+  }
 
 }
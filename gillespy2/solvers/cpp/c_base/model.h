@@ -5,9 +5,23 @@
 #include <vector>
 #include <iostream>
 #include <cmath>
+#include <cstdint>
+#include <atomic>
+#include "summaries.h"
 
 namespace Gillespy{
 
+  //Leading word of the binary results stream, "GPY2" read as a little-endian uint32
+  const uint32_t RESULTS_MAGIC = 0x32595047;
+  //Leading word of the binary statistics stream, "GPY4"
+  const uint32_t STATISTICS_RESULTS_MAGIC = 0x34595047;
+  //Leading word of the binary summaries stream, "GPY5"
+  const uint32_t SUMMARY_RESULTS_MAGIC = 0x35595047;
+
+  //Set by SIGINT to stop every simulation of a simulation process that has no interrupt flag of its own
+  extern std :: atomic<bool> interrupted;
+  void signalHandler(int signum);
+
   //Represents info for a chemical reactant/product
   struct Species{
     unsigned int id; //useful for index id in arrays
@@ -19,28 +33,59 @@ namespace Gillespy{
     unsigned int id; //useful for propensity function id associated
     std :: string name;
     std :: unique_ptr<int[]> species_change; //list of changes to species with this reaction firing
-    std :: vector<unsigned int> affected_reactions; //list of which reactions have propensities that would change with this reaction firing 
   };
   
   //Represents a model of reactions and species
   struct Model{
-      void update_affected_reactions();
-
     unsigned int number_species;
     std :: unique_ptr<Species[]> species;
     unsigned int number_reactions;
     std :: unique_ptr<Reaction[]> reactions;
+    //Reaction dependency graph in compressed sparse row form: firing reaction r changes the propensities of the
+    //reactions affected_reactions[affected_offsets[r]] to affected_reactions[affected_offsets[r+1] - 1]
+    std :: vector<unsigned int> affected_offsets;
+    std :: vector<unsigned int> affected_reactions;
+    //Copies the dependency graph, offsets holds number_reactions + 1 entries and indices affected_offsets[number_reactions]
+    void set_affected_reactions(const unsigned int* offsets, const unsigned int* indices);
+    //Reactants in the same form: reaction r consumes reactant_counts[i] molecules of species reactant_species[i] for i
+    //from reactant_offsets[r] to reactant_offsets[r+1] - 1
+    std :: vector<unsigned int> reactant_offsets;
+    std :: vector<unsigned int> reactant_species;
+    std :: vector<unsigned int> reactant_counts;
+    void set_reactants(const unsigned int* offsets, const unsigned int* species, const unsigned int* counts);
     Model(std :: vector<std :: string> species_names, std :: vector<unsigned int> species_populations, std :: vector<std :: string> reaction_names);
   };
   
+  class IModelRules;
+
   //Interface class to represent container for propensity functions
   class IPropensityFunction{
   public:
     virtual double evaluate(unsigned int reaction_number, unsigned int* state) = 0;
+    //Events and rules of the model, nullptr if it has none, see rules.h
+    virtual IModelRules* rules() { return nullptr; }
     virtual ~IPropensityFunction() {}; 
   };
 
-  
+  //Mean, variance and extrema of every species at every timestep over an ensemble of trajectories, updated one
+  //trajectory at a time by Welford's algorithm so trajectories need not be stored
+  struct EnsembleStatistics{
+    unsigned int number_timesteps;
+    unsigned int number_species;
+    //Number of trajectories that reached each timestep
+    std :: vector<uint32_t> counts;
+    //Running mean, sum of squared deviations from the mean, minimum and maximum, in [timestep][species] order
+    std :: vector<double> mean;
+    std :: vector<double> m2;
+    std :: vector<double> minimum;
+    std :: vector<double> maximum;
+    EnsembleStatistics(unsigned int number_timesteps, unsigned int number_species);
+    //Adds the first number_entries timesteps of a trajectory
+    void add(unsigned int* const* trajectory, unsigned int number_entries);
+    //Adds the trajectories of other, by the pairwise update of Chan, Golub and LeVeque
+    void merge(const EnsembleStatistics& other);
+  };
+
   //Represents simulation return data
   struct Simulation{
     Model* model;
@@ -52,12 +97,30 @@ namespace Gillespy{
     int random_seed;
     unsigned int number_timesteps;
     unsigned int number_trajectories;
+    unsigned int number_threads = 1;
+    //Relative error tolerance of the tau-leaping step size selection
+    double tau_tol = 0.03;
     unsigned int* trajectories_1D;
     unsigned int*** trajectories;
+    //Statistics of the trajectories, only kept instead of the trajectories if statistics_only
+    std :: unique_ptr<EnsembleStatistics> statistics;
+    //Summaries computed from every trajectory instead of keeping it, and their values in [trajectory][summary] order
+    std :: vector<TrajectorySummary> summaries;
+    std :: vector<double> summary_values;
     IPropensityFunction *propensity_function;
-    Simulation(Model* model, unsigned int number_trajectories, unsigned int number_timesteps, double end_time, IPropensityFunction* propensity_function, int random_seed, double current_time);
+    //Stops the simulation when set, a simulation library gives every simulate() call its own flag
+    const std :: atomic<bool>* interrupt_flag = &interrupted;
+    bool is_interrupted() const { return *interrupt_flag; }
+    //With statistics_only or summaries, trajectories are not stored, only their statistics or summaries, and
+    //trajectories[i] is only set while trajectory i is simulated, see simulate_trajectories in ssa.h
+    Simulation(Model* model, unsigned int number_trajectories, unsigned int number_timesteps, double end_time, IPropensityFunction* propensity_function, int random_seed, double current_time, bool statistics_only = false, const std :: vector<TrajectorySummary>& summaries = {});
+    //Simulates on the given timeline, writing results into a caller owned buffer of number_trajectories * number_timesteps * number_species populations
+    Simulation(Model* model, unsigned int number_trajectories, unsigned int number_timesteps, const double* timeline, IPropensityFunction* propensity_function, int random_seed, unsigned int* output_buffer);
     friend std :: ostream& operator<<(std :: ostream& os, const Simulation& simulation);
     void output_results_buffer(std :: ostream& os);
+  private:
+    bool owns_trajectories;
+    void index_trajectories();
   };
 }
 #endif
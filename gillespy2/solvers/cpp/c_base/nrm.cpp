@@ -0,0 +1,180 @@
+#include "nrm.h"
+#include "ssa.h"
+#include <cmath>//Included for infinity
+#include <limits>//Included for infinity
+#include <string.h>//Included for memcpy only
+#include <vector>
+#include <algorithm>//Included for swap
+
+namespace Gillespy{
+
+  //Binary min-heap of reactions keyed by their putative firing times, indexed so the time of any reaction can be
+  //updated in O(log R)
+  class ReactionQueue{
+  public:
+    explicit ReactionQueue(unsigned int number_reactions) : heap(number_reactions), position(number_reactions), times(number_reactions){}
+
+    //Rebuilds the queue from the putative time of every reaction
+    void build(const double* putative_times){
+      for(unsigned int reaction = 0; reaction < heap.size(); reaction++){
+        heap[reaction] = reaction;
+        position[reaction] = reaction;
+        times[reaction] = putative_times[reaction];
+      }
+      for(unsigned int i = heap.size() / 2; i-- > 0;){
+        sift_down(i);
+      }
+    }
+
+    unsigned int top_reaction() const { return heap[0]; }
+    double top_time() const { return times[heap[0]]; }
+    double time(unsigned int reaction) const { return times[reaction]; }
+
+    void update(unsigned int reaction, double time){
+      double previous_time = times[reaction];
+      times[reaction] = time;
+      if(time < previous_time){
+        sift_up(position[reaction]);
+      }else{
+        sift_down(position[reaction]);
+      }
+    }
+
+  private:
+    std :: vector<unsigned int> heap; //reactions in heap order
+    std :: vector<unsigned int> position; //index of each reaction in heap
+    std :: vector<double> times; //putative firing time of each reaction
+
+    void swap(unsigned int i, unsigned int j){
+      std :: swap(heap[i], heap[j]);
+      position[heap[i]] = i;
+      position[heap[j]] = j;
+    }
+
+    void sift_up(unsigned int i){
+      while(i > 0 && times[heap[i]] < times[heap[(i - 1) / 2]]){
+        swap(i, (i - 1) / 2);
+        i = (i - 1) / 2;
+      }
+    }
+
+    void sift_down(unsigned int i){
+      unsigned int size = heap.size();
+      while(true){
+        unsigned int smallest = i;
+        unsigned int left = 2 * i + 1;
+        unsigned int right = left + 1;
+        if(left < size && times[heap[left]] < times[heap[smallest]]){
+          smallest = left;
+        }
+        if(right < size && times[heap[right]] < times[heap[smallest]]){
+          smallest = right;
+        }
+        if(smallest == i){
+          return;
+        }
+        swap(i, smallest);
+        i = smallest;
+      }
+    }
+  };
+
+  //Work buffers of one thread
+  struct NRMState{
+    std :: unique_ptr<unsigned int[]> current_state;
+    std :: unique_ptr<double[]> propensity_values;
+    std :: unique_ptr<double[]> putative_times;
+    ReactionQueue queue;
+    explicit NRMState(Model* model) :
+      current_state(new unsigned int[model -> number_species]),
+      propensity_values(new double[model -> number_reactions]),
+      putative_times(new double[model -> number_reactions]),
+      queue(model -> number_reactions){}
+  };
+
+  static double next_reaction_method_trajectory(Simulation* simulation, unsigned int trajectory_number, NRMState& state){
+    std :: mt19937_64 rng = trajectory_rng(simulation, trajectory_number);
+    std :: exponential_distribution<double> exponential(1.0);
+    const double infinity = std :: numeric_limits<double> :: infinity();
+    Model& model = *(simulation -> model);
+    unsigned int* current_state = state.current_state.get();
+    double* propensity_values = state.propensity_values.get();
+    unsigned int state_size = sizeof(int) * model.number_species;
+    unsigned int** trajectory = simulation -> trajectories[trajectory_number];
+    for(unsigned int species_number = 0; species_number < model.number_species; species_number++){
+      trajectory[0][species_number] = model.species[species_number].initial_population;
+    }
+    memcpy(current_state, trajectory[0], state_size);
+    double current_time = 0;
+    unsigned int entry_count = 1;
+
+    //Draw the first firing time of every reaction
+    for(unsigned int reaction_number = 0; reaction_number < model.number_reactions; reaction_number++){
+      propensity_values[reaction_number] = (simulation -> propensity_function) -> evaluate(reaction_number, current_state);
+      state.putative_times[reaction_number] = propensity_values[reaction_number] > 0 ? exponential(rng) / propensity_values[reaction_number] : infinity;
+    }
+    state.queue.build(state.putative_times.get());
+
+    while(current_time < (simulation -> end_time)){
+      if(simulation -> is_interrupted()){
+        break ;
+      }
+      double next_time = model.number_reactions > 0 ? state.queue.top_time() : infinity;
+      //Copy current state to passed timesteps, every remaining one when no reaction can fire again
+      while(entry_count < simulation -> number_timesteps && (simulation -> timeline[entry_count]) <= next_time){
+        if(simulation -> is_interrupted()){
+          break ;
+        }
+        memcpy(trajectory[entry_count], current_state, state_size);
+        entry_count++;
+      }
+      if(next_time == infinity){
+        break;
+      }
+      current_time = next_time;
+      if(current_time >= simulation -> end_time){
+        break;
+      }
+
+      //Fire the reaction and update the state
+      unsigned int fired_reaction = state.queue.top_reaction();
+      Reaction& reaction = model.reactions[fired_reaction];
+      for(unsigned int species_number = 0; species_number < model.number_species; species_number++){
+        current_state[species_number] += reaction.species_change[species_number];
+      }
+      //Rescale the putative times of the affected reactions, the fired reaction always draws a new one
+      bool fired_affected = false;
+      for(unsigned int i = model.affected_offsets[fired_reaction]; i < model.affected_offsets[fired_reaction + 1]; i++){
+        unsigned int affected_reaction = model.affected_reactions[i];
+        double previous_propensity = propensity_values[affected_reaction];
+        double propensity = (simulation -> propensity_function) -> evaluate(affected_reaction, current_state);
+        propensity_values[affected_reaction] = propensity;
+        double time;
+        if(propensity <= 0){
+          time = infinity;
+        }else if(affected_reaction == fired_reaction || previous_propensity <= 0){
+          time = current_time + exponential(rng) / propensity;
+        }else{
+          time = current_time + (previous_propensity / propensity) * (state.queue.time(affected_reaction) - current_time);
+        }
+        fired_affected = fired_affected || affected_reaction == fired_reaction;
+        state.queue.update(affected_reaction, time);
+      }
+      if(!fired_affected){
+        state.queue.update(fired_reaction, current_time + exponential(rng) / propensity_values[fired_reaction]);
+      }
+    }//Simulation has reached end time
+    return current_time;
+  }
+
+  void next_reaction_method(Simulation* simulation){
+    if(simulation){
+      simulate_trajectories(simulation, [simulation](){
+        std :: shared_ptr<NRMState> state = std :: make_shared<NRMState>(simulation -> model);
+        return [simulation, state](unsigned int trajectory_number){
+          return next_reaction_method_trajectory(simulation, trajectory_number, *state);
+        };
+      });
+    }
+  }
+}
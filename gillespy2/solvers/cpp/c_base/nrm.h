@@ -0,0 +1,9 @@
+#ifndef GILLESPY_NRM
+#define GILLESPY_NRM
+#include "model.h"
+
+namespace Gillespy{
+  //Gibson and Bruck's next reaction method, O(log R) per event for loosely coupled models
+  void next_reaction_method(Simulation* simulation);
+}
+#endif
@@ -0,0 +1,316 @@
+#include "ode.h"
+#include <vector>
+#include <cmath>
+#include <limits>
+#include <algorithm>
+
+namespace Gillespy{
+
+  ODESimulation :: ODESimulation(Model* model, unsigned int number_trajectories, unsigned int number_timesteps, double end_time, IRateFunction* rate_function, const double* initial_state) : model(model), rate_function(rate_function), initial_state(initial_state, initial_state + model -> number_species), timeline(number_timesteps), end_time(end_time), number_timesteps(number_timesteps), number_trajectories(number_trajectories), trajectory(number_timesteps * model -> number_species, 0.0){
+    double timestep_size = end_time/(number_timesteps-1);
+    for(unsigned int i = 0; i < number_timesteps; i++){
+      timeline[i] = timestep_size * i;
+    }
+  }
+
+  void ODESimulation :: output_results_buffer(std :: ostream& os){
+    //Same layout as Simulation :: output_results_buffer, with double[trajectories][timesteps][species] populations
+    uint32_t header[4] = {CONTINUOUS_RESULTS_MAGIC, number_trajectories, number_timesteps, model -> number_species};
+    double stop_time = current_time;
+    os.write(reinterpret_cast<const char*>(header), sizeof(header));
+    os.write(reinterpret_cast<const char*>(&stop_time), sizeof(stop_time));
+    os.write(reinterpret_cast<const char*>(timeline.data()), sizeof(double) * number_timesteps);
+    for(unsigned int i = 0; i < number_trajectories; i++){
+      os.write(reinterpret_cast<const char*>(trajectory.data()), sizeof(double) * trajectory.size());
+    }
+    os.flush();
+  }
+
+  void IOdeSystem :: jacobian(double t, const double* y, double* result){
+    unsigned int n = size();
+    perturbed.assign(y, y + n);
+    base_derivative.resize(n);
+    perturbed_derivative.resize(n);
+    evaluate(t, y, base_derivative.data());
+    for(unsigned int column = 0; column < n; column++){
+      double delta = std :: sqrt(std :: numeric_limits<double> :: epsilon()) * std :: max(std :: abs(y[column]), 1.0);
+      perturbed[column] = y[column] + delta;
+      evaluate(t, perturbed.data(), perturbed_derivative.data());
+      for(unsigned int row = 0; row < n; row++){
+        result[row * n + column] = (perturbed_derivative[row] - base_derivative[row]) / delta;
+      }
+      perturbed[column] = y[column];
+    }
+  }
+
+  //Right hand side and Jacobian of the reaction rate equations, with the work buffers they share
+  class RateEquations : public IOdeSystem{
+  public:
+    explicit RateEquations(ODESimulation* simulation) :
+      model(*(simulation -> model)), rate_function(*(simulation -> rate_function)),
+      perturbed(model.number_species), derivatives(model.number_species){
+      change_offsets.push_back(0);
+      for(unsigned int reaction = 0; reaction < model.number_reactions; reaction++){
+        for(unsigned int species = 0; species < model.number_species; species++){
+          if(model.reactions[reaction].species_change[species] != 0){
+            change_species.push_back(species);
+            change_values.push_back(model.reactions[reaction].species_change[species]);
+          }
+        }
+        change_offsets.push_back(change_species.size());
+      }
+    }
+
+    unsigned int size() const{
+      return model.number_species;
+    }
+
+    void evaluate(double t, const double* state, double* result){
+      std :: fill(result, result + model.number_species, 0.0);
+      for(unsigned int reaction = 0; reaction < model.number_reactions; reaction++){
+        double rate = rate_function.evaluate(reaction, state);
+        for(unsigned int i = change_offsets[reaction]; i < change_offsets[reaction + 1]; i++){
+          result[change_species[i]] += change_values[i] * rate;
+        }
+      }
+    }
+
+    //Analytic for the reactions whose rate function differentiates them
+    void jacobian(double t, const double* state, double* result){
+      unsigned int number_species = model.number_species;
+      std :: fill(result, result + number_species * number_species, 0.0);
+      for(unsigned int reaction = 0; reaction < model.number_reactions; reaction++){
+        if(change_offsets[reaction] == change_offsets[reaction + 1]){
+          continue;
+        }
+        unsigned int first = model.reactant_offsets[reaction];
+        unsigned int last = model.reactant_offsets[reaction + 1];
+        if(rate_function.differentiate(reaction, state, derivatives.data())){
+          for(unsigned int j = first; j < last; j++){
+            add_column(reaction, model.reactant_species[j], derivatives[j - first], result);
+          }
+          continue;
+        }
+        //Forward differences with respect to every species
+        double rate = rate_function.evaluate(reaction, state);
+        std :: copy(state, state + number_species, perturbed.begin());
+        for(unsigned int species = 0; species < number_species; species++){
+          double delta = std :: sqrt(std :: numeric_limits<double> :: epsilon()) * std :: max(std :: abs(state[species]), 1.0);
+          perturbed[species] = state[species] + delta;
+          add_column(reaction, species, (rate_function.evaluate(reaction, perturbed.data()) - rate) / delta, result);
+          perturbed[species] = state[species];
+        }
+      }
+    }
+
+  private:
+    Model& model;
+    IRateFunction& rate_function;
+    std :: vector<double> perturbed;
+    std :: vector<double> derivatives;
+    //Nonzero species changes of each reaction in compressed sparse row form
+    std :: vector<unsigned int> change_offsets;
+    std :: vector<unsigned int> change_species;
+    std :: vector<int> change_values;
+
+    void add_column(unsigned int reaction, unsigned int species, double derivative, double* result){
+      for(unsigned int i = change_offsets[reaction]; i < change_offsets[reaction + 1]; i++){
+        result[change_species[i] * model.number_species + species] += change_values[i] * derivative;
+      }
+    }
+  };
+
+  //LU decomposition with partial pivoting of the n by n row major matrix, in place. Returns false if it is singular.
+  static bool lu_decompose(double* matrix, unsigned int* pivots, unsigned int n){
+    for(unsigned int column = 0; column < n; column++){
+      unsigned int pivot = column;
+      for(unsigned int row = column + 1; row < n; row++){
+        if(std :: abs(matrix[row * n + column]) > std :: abs(matrix[pivot * n + column])){
+          pivot = row;
+        }
+      }
+      pivots[column] = pivot;
+      if(matrix[pivot * n + column] == 0){
+        return false;
+      }
+      if(pivot != column){
+        std :: swap_ranges(matrix + pivot * n, matrix + (pivot + 1) * n, matrix + column * n);
+      }
+      for(unsigned int row = column + 1; row < n; row++){
+        double factor = matrix[row * n + column] /= matrix[column * n + column];
+        if(factor != 0){
+          for(unsigned int k = column + 1; k < n; k++){
+            matrix[row * n + k] -= factor * matrix[column * n + k];
+          }
+        }
+      }
+    }
+    return true;
+  }
+
+  //Solves matrix * x = b with the factors of lu_decompose, x overwrites b
+  static void lu_solve(const double* matrix, const unsigned int* pivots, unsigned int n, double* b){
+    for(unsigned int row = 0; row < n; row++){
+      std :: swap(b[row], b[pivots[row]]);
+      for(unsigned int k = 0; k < row; k++){
+        b[row] -= matrix[row * n + k] * b[k];
+      }
+    }
+    for(unsigned int row = n; row-- > 0;){
+      for(unsigned int k = row + 1; k < n; k++){
+        b[row] -= matrix[row * n + k] * b[k];
+      }
+      b[row] /= matrix[row * n + row];
+    }
+  }
+
+  RosenbrockStepper :: RosenbrockStepper(IOdeSystem& system) :
+    y_new(system.size()), f_new(system.size()), system(system), n(system.size()),
+    y_mid(n), f1(n), k1(n), k2(n), k3(n), jacobian(n * n), w(n * n), pivots(n){}
+
+  //Coefficients of the method
+  static const double d = 1 / (2 + std :: sqrt(2.0));
+  static const double e32 = 6 + std :: sqrt(2.0);
+
+  double RosenbrockStepper :: attempt(double t, const double* y, const double* f0, double h, double rtol, double atol){
+    system.jacobian(t, y, jacobian.data());
+    for(unsigned int i = 0; i < n * n; i++){
+      w[i] = -h * d * jacobian[i];
+    }
+    for(unsigned int i = 0; i < n; i++){
+      w[i * n + i] += 1;
+    }
+    if(!lu_decompose(w.data(), pivots.data(), n)){
+      return std :: numeric_limits<double> :: infinity();
+    }
+    std :: copy(f0, f0 + n, k1.begin());
+    lu_solve(w.data(), pivots.data(), n, k1.data());
+    for(unsigned int i = 0; i < n; i++){
+      y_mid[i] = y[i] + 0.5 * h * k1[i];
+    }
+    system.evaluate(t + 0.5 * h, y_mid.data(), f1.data());
+    for(unsigned int i = 0; i < n; i++){
+      k2[i] = f1[i] - k1[i];
+    }
+    lu_solve(w.data(), pivots.data(), n, k2.data());
+    for(unsigned int i = 0; i < n; i++){
+      k2[i] += k1[i];
+      y_new[i] = y[i] + h * k2[i];
+    }
+    system.evaluate(t + h, y_new.data(), f_new.data());
+    for(unsigned int i = 0; i < n; i++){
+      k3[i] = f_new[i] - e32 * (k2[i] - f1[i]) - 2 * (k1[i] - f0[i]);
+    }
+    lu_solve(w.data(), pivots.data(), n, k3.data());
+    double error_norm = 0;
+    for(unsigned int i = 0; i < n; i++){
+      double error = h / 6 * (k1[i] - 2 * k2[i] + k3[i]);
+      double scale = atol + rtol * std :: max(std :: abs(y[i]), std :: abs(y_new[i]));
+      error_norm = std :: max(error_norm, std :: abs(error) / scale);
+    }
+    return error_norm;
+  }
+
+  void RosenbrockStepper :: interpolate(const double* y, double h, double s, double* result) const{
+    for(unsigned int i = 0; i < n; i++){
+      result[i] = y[i] + h * (s * (1 - s) / (1 - 2 * d) * k1[i] + s * (s - 2 * d) / (1 - 2 * d) * k2[i]);
+    }
+  }
+
+  double RosenbrockStepper :: initial_step(const std :: vector<double>& y, const std :: vector<double>& f0, double rtol, double atol, double max_step){
+    //From the size of the derivative relative to the tolerance
+    double derivative_norm = 0;
+    for(unsigned int i = 0; i < y.size(); i++){
+      derivative_norm = std :: max(derivative_norm, std :: abs(f0[i]) / (atol + rtol * std :: abs(y[i])));
+    }
+    double h = derivative_norm > 0 ? 0.8 * std :: pow(rtol, 1.0 / 3) / derivative_norm : max_step;
+    return std :: min(h, max_step);
+  }
+
+  double RosenbrockStepper :: step_factor(double error_norm, bool accepted){
+    if(!accepted){
+      return std :: isfinite(error_norm) ? std :: max(0.2, 0.8 * std :: pow(error_norm, -1.0 / 3)) : 0.5;
+    }
+    return error_norm > 0 ? std :: min(5.0, std :: max(0.2, 0.8 * std :: pow(error_norm, -1.0 / 3))) : 5.0;
+  }
+
+  bool RosenbrockStepper :: integrate(double t, double end_time, std :: vector<double>& y, double& h, double rtol, double atol){
+    std :: vector<double> f0(n);
+    double min_step = 16 * std :: numeric_limits<double> :: epsilon() * std :: max(std :: abs(end_time), 1.0);
+    system.evaluate(t, y.data(), f0.data());
+    while(t < end_time){
+      bool last_step = h >= end_time - t;
+      double step = last_step ? end_time - t : h;
+      double error_norm = attempt(t, y.data(), f0.data(), step, rtol, atol);
+      if(!(error_norm <= 1)){
+        h = step * step_factor(error_norm, false);
+        if(h < min_step){
+          return false;
+        }
+        continue;
+      }
+      t = last_step ? end_time : t + step;
+      y.swap(y_new);
+      f0.swap(f_new);
+      //A last step shortened to reach end_time does not shrink the next
+      h = std :: max(h, step) * step_factor(error_norm, true);
+    }
+    return true;
+  }
+
+  bool ode_solve(ODESimulation* simulation){
+    Model& model = *(simulation -> model);
+    unsigned int n = model.number_species;
+    RateEquations equations(simulation);
+    RosenbrockStepper stepper(equations);
+    std :: vector<double> y(simulation -> initial_state), f0(n);
+    std :: copy(y.begin(), y.end(), simulation -> trajectory.begin());
+    unsigned int entry_count = 1;
+    double t = 0;
+    double end_time = simulation -> end_time;
+    double rtol = simulation -> rtol;
+    double atol = simulation -> atol;
+
+    equations.evaluate(t, y.data(), f0.data());
+    double h = RosenbrockStepper :: initial_step(y, f0, rtol, atol, end_time);
+    double min_step = 16 * std :: numeric_limits<double> :: epsilon() * std :: max(end_time, 1.0);
+
+    while(entry_count < simulation -> number_timesteps && t < end_time){
+      if(simulation -> is_interrupted()){
+        break;
+      }
+      bool last_step = h >= end_time - t;
+      if(last_step){
+        h = end_time - t;
+      }
+      double error_norm = stepper.attempt(t, y.data(), f0.data(), h, rtol, atol);
+      if(!(error_norm <= 1)){
+        //Rejected, retry with a smaller step
+        h *= RosenbrockStepper :: step_factor(error_norm, false);
+        if(h < min_step){
+          simulation -> current_time = t;
+          return false;
+        }
+        continue;
+      }
+      double t_new = last_step ? end_time : t + h;
+      //Interpolate the output times the step covers
+      while(entry_count < simulation -> number_timesteps && simulation -> timeline[entry_count] <= t_new){
+        stepper.interpolate(y.data(), h, (simulation -> timeline[entry_count] - t) / h, &(simulation -> trajectory[entry_count * n]));
+        entry_count++;
+      }
+      t = t_new;
+      y.swap(stepper.y_new);
+      f0.swap(stepper.f_new);
+      h *= RosenbrockStepper :: step_factor(error_norm, true);
+    }
+    if(t >= end_time){
+      //Output times rounded past the end time hold the final state
+      for(; entry_count < simulation -> number_timesteps; entry_count++){
+        std :: copy(y.begin(), y.end(), simulation -> trajectory.begin() + entry_count * n);
+      }
+    }
+    simulation -> current_time = t;
+    return true;
+  }
+}
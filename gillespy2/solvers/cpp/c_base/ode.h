@@ -0,0 +1,90 @@
+#ifndef GILLESPY_ODE
+#define GILLESPY_ODE
+#include "model.h"
+
+namespace Gillespy{
+
+  //Leading word of the binary results stream of continuous populations, "GPY3" read as a little-endian uint32
+  const uint32_t CONTINUOUS_RESULTS_MAGIC = 0x33595047;
+
+  //Interface class to represent container for the deterministic rates of the reactions
+  class IRateFunction{
+  public:
+    virtual double evaluate(unsigned int reaction_number, const double* state) = 0;
+    //Writes the partial derivatives of the rate of reaction_number with respect to its reactants, in the order of the
+    //model's reactant tables. Returns false if the rate has no analytic derivatives, it is then differentiated
+    //numerically with respect to every species.
+    virtual bool differentiate(unsigned int reaction_number, const double* state, double* derivatives) = 0;
+    virtual ~IRateFunction() {};
+  };
+
+  //System of ordinary differential equations dy/dt = f(t, y) of size() variables
+  class IOdeSystem{
+  public:
+    virtual unsigned int size() const = 0;
+    virtual void evaluate(double t, const double* y, double* dydt) = 0;
+    //Writes the Jacobian of f at (t, y) in row major order, by forward differences unless overridden
+    virtual void jacobian(double t, const double* y, double* result);
+    virtual ~IOdeSystem() {};
+  private:
+    std :: vector<double> perturbed;
+    std :: vector<double> base_derivative;
+    std :: vector<double> perturbed_derivative;
+  };
+
+  //Steps of the L-stable Rosenbrock 2(3) method of Shampine and Reichelt (MATLAB's ode23s), with the work buffers
+  //they share
+  class RosenbrockStepper{
+  public:
+    explicit RosenbrockStepper(IOdeSystem& system);
+    //Attempts a step of size h from y at time t, f0 holding f(t, y). Returns the error of the step relative to the
+    //tolerances, infinite if the step could not be taken, the step is accepted if it is at most 1. y_new and f_new
+    //then hold the solution at t + h and its derivative.
+    double attempt(double t, const double* y, const double* f0, double h, double rtol, double atol);
+    //Writes the solution at t + s * h, 0 <= s <= 1, of the last step attempted from y
+    void interpolate(const double* y, double h, double s, double* result) const;
+    //Size of a first step from y, f0 holding f(t, y), at most max_step
+    static double initial_step(const std :: vector<double>& y, const std :: vector<double>& f0, double rtol, double atol, double max_step);
+    //Factor the step size is multiplied by after a step with the given error, accepted or not
+    static double step_factor(double error_norm, bool accepted);
+    //Integrates y from t to end_time in accepted steps, h is the size of the first step attempted and is set to the
+    //size of the next. Returns false if the step size underflows, y is then left at the time it reached.
+    bool integrate(double t, double end_time, std :: vector<double>& y, double& h, double rtol, double atol);
+    std :: vector<double> y_new;
+    std :: vector<double> f_new;
+  private:
+    IOdeSystem& system;
+    unsigned int n;
+    std :: vector<double> y_mid, f1, k1, k2, k3, jacobian, w;
+    std :: vector<unsigned int> pivots;
+  };
+
+  //Represents the data of a deterministic simulation, every trajectory holds the same solution
+  struct ODESimulation{
+    Model* model;
+    IRateFunction* rate_function;
+    std :: vector<double> initial_state;
+    std :: vector<double> timeline;
+    double end_time;
+    double current_time = 0;
+    unsigned int number_timesteps;
+    unsigned int number_trajectories;
+    //Relative and absolute error tolerances of every step
+    double rtol = 1e-6;
+    double atol = 1e-9;
+    //Species concentrations in [timestep][species] order
+    std :: vector<double> trajectory;
+    //Stops the simulation when set
+    const std :: atomic<bool>* interrupt_flag = &interrupted;
+    bool is_interrupted() const { return *interrupt_flag; }
+    ODESimulation(Model* model, unsigned int number_trajectories, unsigned int number_timesteps, double end_time, IRateFunction* rate_function, const double* initial_state);
+    //Writes the results in the binary results protocol, with double populations and CONTINUOUS_RESULTS_MAGIC
+    void output_results_buffer(std :: ostream& os);
+  };
+
+  //Integrates the reaction rate equations from the initial state to the end time with the L-stable Rosenbrock 2(3)
+  //method of Shampine and Reichelt (MATLAB's ode23s), so stiff models take large steps. Output times inside a step
+  //are interpolated. Returns false if the step size underflows.
+  bool ode_solve(ODESimulation* simulation);
+}
+#endif
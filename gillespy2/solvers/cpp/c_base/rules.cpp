@@ -0,0 +1,313 @@
+#include "rules.h"
+#include "ssa.h"
+#include <cmath>
+#include <limits>
+#include <algorithm>//Included for min/max and sorting events by priority
+
+namespace Gillespy{
+
+  //Largest number of times the events of one instant may trigger each other
+  const unsigned int MAX_EVENT_CASCADE = 1000;
+
+  EventQueue :: EventQueue(IModelRules& rules) : rules(rules), trigger_state(rules.number_events()){
+    for(unsigned int event = 0; event < rules.number_events(); event++){
+      trigger_state[event] = rules.initial_value(event);
+    }
+  }
+
+  double EventQueue :: next_pending_time() const{
+    double time = std :: numeric_limits<double> :: infinity();
+    for(const PendingEvent& event : pending){
+      time = std :: min(time, event.time);
+    }
+    return time;
+  }
+
+  bool EventQueue :: triggers_change(double time, const double* S){
+    for(unsigned int event = 0; event < trigger_state.size(); event++){
+      if(rules.trigger(event, time, S) != trigger_state[event]){
+        return true;
+      }
+    }
+    return false;
+  }
+
+  void EventQueue :: process_events(double time, double* S){
+    unsigned int number_events = rules.number_events();
+    if(number_events == 0){
+      return;
+    }
+    for(unsigned int cascade = 0; cascade < MAX_EVENT_CASCADE; cascade++){
+      std :: vector<PendingEvent> ready;
+      for(unsigned int event = 0; event < number_events; event++){
+        bool value = rules.trigger(event, time, S);
+        if(value && !trigger_state[event]){
+          double delay = rules.delay(event, time, S);
+          PendingEvent triggered = {time + std :: max(delay, 0.0), event, {}};
+          if(delay >= 0 && rules.use_values_from_trigger_time(event)){
+            triggered.values.resize(rules.max_assignments());
+            rules.evaluate_assignments(event, time, S, triggered.values.data());
+          }
+          (delay < 0 ? ready : pending).push_back(triggered);
+        }else if(!value && trigger_state[event] && !rules.persistent(event)){
+          pending.erase(std :: remove_if(pending.begin(), pending.end(), [event](const PendingEvent& queued){
+            return queued.event == event;
+          }), pending.end());
+        }
+        trigger_state[event] = value;
+      }
+      //Delayed events due at time
+      auto due = std :: stable_partition(pending.begin(), pending.end(), [time](const PendingEvent& queued){
+        return queued.time > time;
+      });
+      ready.insert(ready.end(), due, pending.end());
+      pending.erase(due, pending.end());
+      if(ready.empty()){
+        return;
+      }
+      std :: vector<double> priorities(number_events);
+      for(const PendingEvent& event : ready){
+        priorities[event.event] = rules.priority(event.event, time, S);
+      }
+      std :: stable_sort(ready.begin(), ready.end(), [&priorities](const PendingEvent& first, const PendingEvent& second){
+        return priorities[first.event] > priorities[second.event];
+      });
+      //Assignments are evaluated before any event of the instant assigns its variables
+      for(PendingEvent& event : ready){
+        if(event.values.empty()){
+          event.values.resize(rules.max_assignments());
+          rules.evaluate_assignments(event.event, time, S, event.values.data());
+        }
+      }
+      for(PendingEvent& event : ready){
+        rules.assign(event.event, event.values.data(), S);
+      }
+      rules.apply_assignment_rules(time, S);
+    }
+  }
+
+  //State of one trajectory of a model with rules
+  class RulesTrajectory{
+  public:
+    RulesTrajectory(Simulation* simulation, unsigned int trajectory_number) :
+      simulation(*simulation), model(*(simulation -> model)),
+      rules((simulation -> propensity_function) -> rules() -> copy()),
+      rng(trajectory_rng(simulation, trajectory_number)),
+      events(*rules), amounts(model.number_species), state(model.number_species),
+      propensities(model.number_reactions){}
+
+    //Simulates the trajectory into its slice of trajectories, returns the simulation time it reached
+    double simulate(unsigned int trajectory_number){
+      unsigned int** trajectory = simulation.trajectories[trajectory_number];
+      for(unsigned int species = 0; species < model.number_species; species++){
+        amounts[species] = model.species[species].initial_population;
+      }
+      rules -> apply_assignment_rules(0, amounts.data());
+      events.process_events(0, amounts.data());
+      update_state();
+      entry_count = 0;
+      double current_time = 0;
+      double end_time = simulation.end_time;
+      if(rules -> number_rate_rules() > 0){
+        current_time = simulate_with_rate_rules(trajectory);
+      }else{
+        while(current_time < end_time){
+          if(simulation.is_interrupted()){
+            break;
+          }
+          double propensity_sum = sum_propensities();
+          double reaction_time = propensity_sum > 0 ? current_time - log(uniform()) / propensity_sum : std :: numeric_limits<double> :: infinity();
+          //Triggers are checked at least at every output time
+          double next_output = end_time;
+          if(rules -> number_events() > 0){
+            for(unsigned int entry = entry_count; entry < simulation.number_timesteps; entry++){
+              if(simulation.timeline[entry] > current_time){
+                next_output = std :: min(simulation.timeline[entry], end_time);
+                break;
+              }
+            }
+          }
+          double next_time = std :: min(std :: min(reaction_time, events.next_pending_time()), next_output);
+          //The state is constant until next_time, a trigger that changes before it changes with time
+          if(events.triggers_change(next_time, amounts.data())){
+            double lower = current_time;
+            while(std :: nextafter(lower, next_time) < next_time){
+              double middle = lower + (next_time - lower) / 2;
+              if(middle <= lower || middle >= next_time){
+                break;
+              }
+              if(events.triggers_change(middle, amounts.data())){
+                next_time = middle;
+              }else{
+                lower = middle;
+              }
+            }
+          }
+          record_entries(trajectory, next_time);
+          current_time = next_time;
+          if(current_time == reaction_time){
+            fire_reaction(propensity_sum, current_time);
+          }
+          events.process_events(current_time, amounts.data());
+          update_state();
+        }
+      }
+      if(current_time >= end_time){
+        record_entries(trajectory, std :: numeric_limits<double> :: infinity());
+      }
+      return current_time;
+    }
+
+  private:
+    Simulation& simulation;
+    Model& model;
+    std :: unique_ptr<IModelRules> rules;
+    std :: mt19937_64 rng;
+    EventQueue events;
+    //Species amounts the rules read and assign, and the populations the propensities read
+    std :: vector<double> amounts;
+    std :: vector<unsigned int> state;
+    std :: vector<double> propensities;
+    std :: vector<double> output_amounts;
+    unsigned int entry_count;
+
+    double uniform(){
+      //In (0, 1], so its logarithm is finite
+      return (rng() + 1.0) / (rng.max() + 1.0);
+    }
+
+    double sum_propensities(){
+      double propensity_sum = 0;
+      for(double propensity : propensities){
+        propensity_sum += propensity;
+      }
+      return propensity_sum;
+    }
+
+    //Rounds the amounts to populations, and evaluates every propensity, the rules may have changed any parameter
+    void update_state(){
+      for(unsigned int species = 0; species < model.number_species; species++){
+        state[species] = amounts[species] > 0 ? (unsigned int) std :: llround(amounts[species]) : 0;
+      }
+      for(unsigned int reaction = 0; reaction < model.number_reactions; reaction++){
+        propensities[reaction] = rules -> evaluate(reaction, state.data());
+      }
+    }
+
+    //Copies the current state to the output times before time, with the assignment rules evaluated at each of them
+    void record_entries(unsigned int** trajectory, double time){
+      while(entry_count < simulation.number_timesteps && simulation.timeline[entry_count] < time){
+        output_amounts = amounts;
+        rules -> apply_assignment_rules(simulation.timeline[entry_count], output_amounts.data());
+        for(unsigned int species = 0; species < model.number_species; species++){
+          trajectory[entry_count][species] = output_amounts[species] > 0 ? (unsigned int) std :: llround(output_amounts[species]) : 0;
+        }
+        entry_count++;
+      }
+    }
+
+    void fire_reaction(double propensity_sum, double time){
+      double cumulative_sum = uniform() * propensity_sum;
+      for(unsigned int reaction = 0; reaction < model.number_reactions; reaction++){
+        cumulative_sum -= propensities[reaction];
+        if(cumulative_sum <= 0 && propensities[reaction] > 0){
+          for(unsigned int species = 0; species < model.number_species; species++){
+            amounts[species] += model.reactions[reaction].species_change[species];
+          }
+          rules -> apply_assignment_rules(time, amounts.data());
+          return;
+        }
+      }
+    }
+
+    //Integrates the rate rules from time over step with the classical Runge-Kutta method
+    void integrate(double time, double step, const std :: vector<double>& start){
+      unsigned int n = start.size();
+      std :: vector<double> stage(n), k1(n), k2(n), k3(n), k4(n);
+      auto derivatives = [this, &stage](double t, std :: vector<double>& result){
+        rules -> set_rate_rule_variables(stage.data(), amounts.data());
+        rules -> apply_assignment_rules(t, amounts.data());
+        rules -> rate_rule_derivatives(t, amounts.data(), result.data());
+      };
+      stage = start;
+      derivatives(time, k1);
+      for(unsigned int i = 0; i < n; i++){
+        stage[i] = start[i] + step / 2 * k1[i];
+      }
+      derivatives(time + step / 2, k2);
+      for(unsigned int i = 0; i < n; i++){
+        stage[i] = start[i] + step / 2 * k2[i];
+      }
+      derivatives(time + step / 2, k3);
+      for(unsigned int i = 0; i < n; i++){
+        stage[i] = start[i] + step * k3[i];
+      }
+      derivatives(time + step, k4);
+      for(unsigned int i = 0; i < n; i++){
+        stage[i] = start[i] + step / 6 * (k1[i] + 2 * k2[i] + 2 * k3[i] + k4[i]);
+      }
+      rules -> set_rate_rule_variables(stage.data(), amounts.data());
+      rules -> apply_assignment_rules(time + step, amounts.data());
+    }
+
+    //Reactions fire when the integral of the total propensity, which the rate rules change, reaches an exponentially
+    //distributed target
+    double simulate_with_rate_rules(unsigned int** trajectory){
+      double current_time = 0;
+      double end_time = simulation.end_time;
+      unsigned int intervals = std :: max(simulation.number_timesteps, 2u) - 1;
+      double max_step = end_time / intervals / 10;
+      double hazard = 0;
+      double target = -log(uniform());
+      std :: vector<double> start(rules -> number_rate_rules());
+      while(current_time < end_time){
+        if(simulation.is_interrupted()){
+          break;
+        }
+        double next_output = entry_count < simulation.number_timesteps ? simulation.timeline[entry_count] : end_time;
+        if(next_output <= current_time){
+          record_entries(trajectory, std :: nextafter(current_time, end_time + 1));
+          continue;
+        }
+        //Steps end on output times and delayed events
+        double next_stop = std :: min(std :: min(next_output, end_time), events.next_pending_time());
+        double step = std :: min(max_step, next_stop - current_time);
+        double propensity_sum = sum_propensities();
+        std :: vector<double> before(amounts);
+        rules -> get_rate_rule_variables(amounts.data(), start.data());
+        integrate(current_time, step, start);
+        update_state();
+        double increment = step * (propensity_sum + sum_propensities()) / 2;
+        if(hazard + increment >= target && increment > 0){
+          //Integrate again up to the time the target is reached, found by linear interpolation
+          step *= (target - hazard) / increment;
+          amounts = before;
+          integrate(current_time, step, start);
+          update_state();
+          current_time += step;
+          fire_reaction(sum_propensities(), current_time);
+          hazard = 0;
+          target = -log(uniform());
+        }else{
+          hazard += increment;
+          current_time = step < next_stop - current_time ? current_time + step : next_stop;
+        }
+        events.process_events(current_time, amounts.data());
+        update_state();
+      }
+      return current_time;
+    }
+  };
+
+  void ssa_rules(Simulation* simulation){
+    if(simulation){
+      simulate_trajectories(simulation, [simulation](){
+        //Each thread simulates its trajectories with its own copy of the rules
+        return [simulation](unsigned int trajectory_number){
+          RulesTrajectory trajectory(simulation, trajectory_number);
+          return trajectory.simulate(trajectory_number);
+        };
+      });
+    }
+  }
+}
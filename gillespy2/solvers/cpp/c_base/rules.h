@@ -0,0 +1,80 @@
+#ifndef GILLESPY_RULES
+#define GILLESPY_RULES
+#include "model.h"
+
+namespace Gillespy{
+
+  //Events, assignment rules and rate rules of a model, generated with its propensity functions. Their expressions read
+  //the species amounts S of a trajectory, as doubles, the time t and the parameter values held by the object, which
+  //events and rules may change. Every trajectory is simulated with its own copy().
+  class IModelRules : public IPropensityFunction{
+  public:
+    //Copy holding the parameter values of this object, to simulate one trajectory with
+    virtual std :: unique_ptr<IModelRules> copy() const = 0;
+
+    virtual unsigned int number_events() const { return 0; }
+    //Largest number of assignments of an event
+    virtual unsigned int max_assignments() const { return 0; }
+    virtual bool trigger(unsigned int event, double t, const double* S) { return false; }
+    //Value of the trigger before the simulation starts, the event fires at time 0 if it is false and the trigger true
+    virtual bool initial_value(unsigned int event) const { return false; }
+    //If false, a delayed event is cancelled when its trigger becomes false before it fires
+    virtual bool persistent(unsigned int event) const { return true; }
+    //If true, the assignments of a delayed event are evaluated when it is triggered instead of when it fires
+    virtual bool use_values_from_trigger_time(unsigned int event) const { return false; }
+    //Delay of the event, evaluated when it is triggered, negative if it has none
+    virtual double delay(unsigned int event, double t, const double* S) { return -1; }
+    //Events firing at the same time fire in decreasing order of priority
+    virtual double priority(unsigned int event, double t, const double* S) { return 0; }
+    //Evaluates the assignments of event into values, every value before any variable is assigned
+    virtual void evaluate_assignments(unsigned int event, double t, const double* S, double* values) {}
+    //Assigns the values of evaluate_assignments to the variables of event
+    virtual void assign(unsigned int event, const double* values, double* S) {}
+
+    //Assigns every variable of an assignment rule its value, in the order of the model's rules
+    virtual void apply_assignment_rules(double t, double* S) {}
+
+    virtual unsigned int number_rate_rules() const { return 0; }
+    //Reads the variables of the rate rules into y, and writes them from y
+    virtual void get_rate_rule_variables(const double* S, double* y) {}
+    virtual void set_rate_rule_variables(const double* y, double* S) {}
+    //Writes the time derivative of every rate rule variable
+    virtual void rate_rule_derivatives(double t, const double* S, double* dydt) {}
+  };
+
+  //Trigger values and delayed events of one trajectory, firing events into its species amounts
+  class EventQueue{
+  public:
+    //rules must outlive the queue
+    explicit EventQueue(IModelRules& rules);
+    //Time of the earliest delayed event, infinite if none is queued
+    double next_pending_time() const;
+    //True if a trigger evaluated at time differs from its value after the last events were processed
+    bool triggers_change(double time, const double* S);
+    //Fires the events triggered at time, the delayed events due at time, and the events they trigger in turn
+    void process_events(double time, double* S);
+  private:
+    //Event waiting for its delay to pass
+    struct PendingEvent{
+      double time;
+      unsigned int event;
+      //Assignment values evaluated when it was triggered, empty unless the event uses values from trigger time
+      std :: vector<double> values;
+    };
+    IModelRules& rules;
+    std :: vector<bool> trigger_state;
+    std :: vector<PendingEvent> pending;
+  };
+
+  //Direct method that also fires events and applies assignment and rate rules, run_algorithm runs it for "ssa" when the
+  //propensity function has rules:
+  //  - Events whose triggers depend on time fire at the time the trigger becomes true, found by bisection, the state
+  //    being constant between reactions. Triggers are checked at least at every output time, so a trigger that is
+  //    true only between two output times or reactions may be missed. Delayed events are queued and fire at their
+  //    time.
+  //  - Rate rules are integrated with the classical Runge-Kutta method. Reactions then fire when the integral of the
+  //    total propensity reaches an exponentially distributed threshold, propensities reading species amounts rounded to
+  //    whole molecules. Triggers are checked after every integration step.
+  void ssa_rules(Simulation* simulation);
+}
+#endif
@@ -0,0 +1,135 @@
+#include "sdm.h"
+#include "ssa.h"
+#include <cmath>//Included for natural logarithm
+#include <string.h>//Included for memcpy only
+#include <algorithm>//Included for swap and max
+
+namespace Gillespy{
+
+  //Work buffers of one thread
+  struct SortingDirectState{
+    std :: unique_ptr<unsigned int[]> current_state;
+    std :: unique_ptr<double[]> propensity_values;
+    std :: unique_ptr<unsigned int[]> search_order; //reactions in the order they are searched
+    std :: unique_ptr<unsigned int[]> search_position; //position of each reaction in search_order
+    explicit SortingDirectState(Model* model) :
+      current_state(new unsigned int[model -> number_species]),
+      propensity_values(new double[model -> number_reactions]),
+      search_order(new unsigned int[model -> number_reactions]),
+      search_position(new unsigned int[model -> number_reactions]){}
+  };
+
+  static double sorting_direct_method_trajectory(Simulation* simulation, unsigned int trajectory_number, SortingDirectState& state){
+    std :: mt19937_64 rng = trajectory_rng(simulation, trajectory_number);
+    std :: uniform_real_distribution<double> uniform(0.0, 1.0);
+    std :: exponential_distribution<double> exponential(1.0);
+    Model& model = *(simulation -> model);
+    unsigned int* current_state = state.current_state.get();
+    double* propensity_values = state.propensity_values.get();
+    unsigned int* search_order = state.search_order.get();
+    unsigned int* search_position = state.search_position.get();
+    unsigned int state_size = sizeof(int) * model.number_species;
+    unsigned int** trajectory = simulation -> trajectories[trajectory_number];
+    for(unsigned int species_number = 0; species_number < model.number_species; species_number++){
+      trajectory[0][species_number] = model.species[species_number].initial_population;
+    }
+    memcpy(current_state, trajectory[0], state_size);
+    double current_time = 0;
+    unsigned int entry_count = 1;
+    //The sum is recomputed once per number_reactions events, bounding the drift of the incremental updates in
+    //amortized O(1) per event
+    const unsigned int resum_interval = std :: max(model.number_reactions, 1024u);
+    unsigned int events_since_resum = 0;
+
+    double propensity_sum = 0;
+    for(unsigned int reaction_number = 0; reaction_number < model.number_reactions; reaction_number++){
+      propensity_values[reaction_number] = (simulation -> propensity_function) -> evaluate(reaction_number, current_state);
+      propensity_sum += propensity_values[reaction_number];
+      search_order[reaction_number] = reaction_number;
+      search_position[reaction_number] = reaction_number;
+    }
+
+    while(current_time < (simulation -> end_time)){
+      if(simulation -> is_interrupted()){
+        break ;
+      }
+      //No more reactions
+      if(propensity_sum <= 0){
+        for(unsigned int i = entry_count; i < simulation -> number_timesteps; i++){
+          memcpy(trajectory[i], current_state, state_size);
+        }
+        break;
+      }
+      current_time += exponential(rng) / propensity_sum;
+      //Copy current state to passed timesteps
+      while(entry_count < simulation -> number_timesteps && (simulation -> timeline[entry_count]) <= current_time){
+        if(simulation -> is_interrupted()){
+          break ;
+        }
+        memcpy(trajectory[entry_count], current_state, state_size);
+        entry_count++;
+      }
+      if(current_time >= simulation -> end_time){
+        break;
+      }
+
+      //Search for the firing reaction in the current order, the last reaction with a non zero propensity absorbs
+      //any rounding error in the sum
+      double cumulative_sum = uniform(rng) * propensity_sum;
+      unsigned int fired_position = model.number_reactions;
+      for(unsigned int position = 0; position < model.number_reactions; position++){
+        double propensity = propensity_values[search_order[position]];
+        if(propensity > 0){
+          fired_position = position;
+          cumulative_sum -= propensity;
+          if(cumulative_sum <= 0){
+            break;
+          }
+        }
+      }
+      if(fired_position == model.number_reactions){
+        //Every propensity is zero, the incremental sum had drifted
+        propensity_sum = 0;
+        continue;
+      }
+      unsigned int fired_reaction = search_order[fired_position];
+      //Bubble the fired reaction one place toward the front of the search order
+      if(fired_position > 0){
+        unsigned int previous_reaction = search_order[fired_position - 1];
+        std :: swap(search_order[fired_position], search_order[fired_position - 1]);
+        search_position[fired_reaction] = fired_position - 1;
+        search_position[previous_reaction] = fired_position;
+      }
+
+      Reaction& reaction = model.reactions[fired_reaction];
+      for(unsigned int species_number = 0; species_number < model.number_species; species_number++){
+        current_state[species_number] += reaction.species_change[species_number];
+      }
+      for(unsigned int i = model.affected_offsets[fired_reaction]; i < model.affected_offsets[fired_reaction + 1]; i++){
+        unsigned int affected_reaction = model.affected_reactions[i];
+        double propensity = (simulation -> propensity_function) -> evaluate(affected_reaction, current_state);
+        propensity_sum += propensity - propensity_values[affected_reaction];
+        propensity_values[affected_reaction] = propensity;
+      }
+      if(++events_since_resum == resum_interval){
+        propensity_sum = 0;
+        for(unsigned int reaction_number = 0; reaction_number < model.number_reactions; reaction_number++){
+          propensity_sum += propensity_values[reaction_number];
+        }
+        events_since_resum = 0;
+      }
+    }//Simulation has reached end time
+    return current_time;
+  }
+
+  void sorting_direct_method(Simulation* simulation){
+    if(simulation){
+      simulate_trajectories(simulation, [simulation](){
+        std :: shared_ptr<SortingDirectState> state = std :: make_shared<SortingDirectState>(simulation -> model);
+        return [simulation, state](unsigned int trajectory_number){
+          return sorting_direct_method_trajectory(simulation, trajectory_number, *state);
+        };
+      });
+    }
+  }
+}
@@ -0,0 +1,10 @@
+#ifndef GILLESPY_SDM
+#define GILLESPY_SDM
+#include "model.h"
+
+namespace Gillespy{
+  //Sorting direct method: the propensity sum is updated incrementally and reactions move toward the front of the
+  //search order each time they fire, so frequently firing reactions are found after a few comparisons
+  void sorting_direct_method(Simulation* simulation);
+}
+#endif
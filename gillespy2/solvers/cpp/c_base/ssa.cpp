@@ -1,104 +1,225 @@
 #include "ssa.h"
-#include <random>//Included for mt19937 random number generator
+#include "nrm.h"
+#include "ssa_cr.h"
+#include "sdm.h"
+#include "ssa_tree.h"
+#include "tau.h"
+#include "rules.h"
 #include <cmath>//Included for natural logarithm
 #include <string.h>//Included for memcpy only
-#include <csignal>//Included for timeout signal handling
+#include <atomic>//Included for the trajectory counter shared by threads
+#include <thread>//Included for the trajectory worker pool
+#include <algorithm>//Included for min/max of thread count
+#include <mutex>//Included for the per-thread statistics list
 
 namespace Gillespy{
 
-  bool interrupted = false ;
+  std :: mt19937_64 trajectory_rng(int random_seed, unsigned int trajectory_number){
+    std :: seed_seq seed_sequence{(uint32_t) random_seed, (uint32_t) trajectory_number};
+    return std :: mt19937_64(seed_sequence);
+  }
 
-  void signalHandler( int signum){
-    interrupted = true ;
+  std :: mt19937_64 trajectory_rng(Simulation* simulation, unsigned int trajectory_number){
+    return trajectory_rng(simulation -> random_seed, trajectory_number);
   }
 
-  void ssa_direct(Simulation* simulation){
-    signal(SIGINT, signalHandler) ;
+  void simulate_trajectories(Simulation* simulation, const std :: function<std :: function<double(unsigned int)>()>& make_trajectory_simulator){
+    if(!simulation -> statistics && simulation -> summaries.empty()){
+      simulation -> current_time = run_trajectories(simulation -> number_trajectories, simulation -> number_threads, simulation -> end_time, simulation -> interrupt_flag, make_trajectory_simulator);
+      return;
+    }
+    //Each thread simulates its trajectories into one reused buffer and reduces them into their summaries and statistics
+    //of its own, merged once every thread has finished
+    unsigned int number_timesteps = simulation -> number_timesteps;
+    unsigned int number_species = (simulation -> model) -> number_species;
+    std :: mutex thread_statistics_mutex;
+    std :: vector<std :: shared_ptr<EnsembleStatistics>> thread_statistics;
+    simulation -> current_time = run_trajectories(simulation -> number_trajectories, simulation -> number_threads, simulation -> end_time, simulation -> interrupt_flag, [simulation, number_timesteps, number_species, &thread_statistics_mutex, &thread_statistics, &make_trajectory_simulator](){
+      std :: function<double(unsigned int)> simulate_trajectory = make_trajectory_simulator();
+      std :: shared_ptr<std :: vector<unsigned int>> buffer = std :: make_shared<std :: vector<unsigned int>>(number_timesteps * number_species);
+      std :: shared_ptr<std :: vector<unsigned int*>> rows = std :: make_shared<std :: vector<unsigned int*>>(number_timesteps);
+      for(unsigned int i = 0; i < number_timesteps; i++){
+        (*rows)[i] = buffer -> data() + i * number_species;
+      }
+      std :: shared_ptr<EnsembleStatistics> statistics;
+      if(simulation -> statistics){
+        statistics = std :: make_shared<EnsembleStatistics>(number_timesteps, number_species);
+        std :: lock_guard<std :: mutex> lock(thread_statistics_mutex);
+        thread_statistics.push_back(statistics);
+      }
+      return [simulation, number_timesteps, simulate_trajectory, buffer, rows, statistics](unsigned int trajectory_number){
+        //Timesteps an interrupt leaves unwritten read as zero, as in the full results
+        std :: fill(buffer -> begin(), buffer -> end(), 0);
+        simulation -> trajectories[trajectory_number] = rows -> data();
+        double reached_time = simulate_trajectory(trajectory_number);
+        simulation -> trajectories[trajectory_number] = nullptr;
+        unsigned int number_entries = number_timesteps;
+        if(simulation -> is_interrupted()){
+          number_entries = std :: upper_bound(simulation -> timeline, simulation -> timeline + number_timesteps, reached_time) - simulation -> timeline;
+        }
+        if(statistics){
+          statistics -> add(rows -> data(), number_entries);
+        }
+        unsigned int number_summaries = simulation -> summaries.size();
+        for(unsigned int i = 0; i < number_summaries; i++){
+          simulation -> summary_values[trajectory_number * number_summaries + i] = simulation -> summaries[i].evaluate(rows -> data(), simulation -> timeline, number_entries);
+        }
+        return reached_time;
+      };
+    });
+    for(const std :: shared_ptr<EnsembleStatistics>& statistics : thread_statistics){
+      simulation -> statistics -> merge(*statistics);
+    }
+  }
 
-    if(simulation){
-      std :: mt19937_64 rng(simulation -> random_seed);
-      //Number of bytes for copying states
-      unsigned int state_size = sizeof(int)*((simulation -> model) -> number_species);
-      //Current state
-      unsigned int* current_state = new unsigned int[(simulation -> model) -> number_species];
-      //Calculated propensity values for current state
-      double* propensity_values = new double[(simulation -> model) -> number_reactions];
-      
-      //copy initial state for each trajectory
-      for(unsigned int species_number = 0; species_number < ((simulation -> model) -> number_species); species_number++){
-	simulation -> trajectories[0][0][species_number] = (simulation -> model) -> species[species_number].initial_population;
+  double run_trajectories(unsigned int number_trajectories, unsigned int number_threads, double end_time, const std :: atomic<bool>* interrupt_flag, const std :: function<std :: function<double(unsigned int)>()>& make_trajectory_simulator){
+    number_threads = std :: min(std :: max(number_threads, 1u), std :: max(number_trajectories, 1u));
+    //Trajectories are handed out one at a time to the workers, each writes only to its own trajectories
+    std :: atomic<unsigned int> next_trajectory(0);
+    std :: atomic<unsigned int> simulated_trajectories(0);
+    //Earliest time a trajectory of each worker was stopped at
+    std :: vector<double> stop_times(number_threads, end_time);
+    auto worker = [number_trajectories, end_time, interrupt_flag, &next_trajectory, &simulated_trajectories, &stop_times, &make_trajectory_simulator](unsigned int thread_number){
+      std :: function<double(unsigned int)> simulate_trajectory = make_trajectory_simulator();
+      for(unsigned int trajectory_number = next_trajectory++; trajectory_number < number_trajectories; trajectory_number = next_trajectory++){
+        if(*interrupt_flag){
+          break ;
+        }
+        double reached_time = simulate_trajectory(trajectory_number);
+        //A trajectory that was not interrupted has every timestep, even if no reaction could fire before end_time
+        if(*interrupt_flag){
+          stop_times[thread_number] = std :: min(stop_times[thread_number], std :: min(reached_time, end_time));
+        }
+        simulated_trajectories++;
       }
-      //Simulate for each trajectory
-      for(unsigned int trajectory_number = 0; trajectory_number < simulation -> number_trajectories; trajectory_number++){
-    if(interrupted){
-        break ;
+    };
+    if(number_threads == 1){
+      worker(0);
+    }else{
+      std :: vector<std :: thread> pool;
+      for(unsigned int i = 0; i < number_threads; i++){
+        pool.emplace_back(worker, i);
+      }
+      for(std :: thread& thread : pool){
+        thread.join();
+      }
+    }//Finished simulating all trajectories
+    //The stop time is the time every trajectory was simulated to, 0 if an interrupt left trajectories unstarted
+    if(simulated_trajectories < number_trajectories){
+      return 0;
     }
-	//Get simpler reference to memory space for this trajectory
-	unsigned int** trajectory = simulation -> trajectories[trajectory_number];
-	//Copy initial state as needed
-	if(trajectory_number > 0){
-	  memcpy(trajectory[0], simulation -> trajectories[0][0], state_size);
-	}
-	//Set up current state from initial state
-	memcpy(current_state, trajectory[0], state_size);
-	simulation->current_time = 0;
-	unsigned int entry_count = 1;
-	//calculate initial propensities
-	for(unsigned int reaction_number = 0; reaction_number < ((simulation -> model) -> number_reactions); reaction_number++){
-	  propensity_values[reaction_number] = (simulation -> propensity_function) -> evaluate(reaction_number, current_state);
-	}
-	double propensity_sum;
-	while(simulation->current_time < (simulation -> end_time)){
-      if(interrupted){
+    return *std :: min_element(stop_times.begin(), stop_times.end());
+  }
+
+  bool run_algorithm(Simulation* simulation, const std :: string& algorithm){
+    if((simulation -> propensity_function) -> rules() != nullptr){
+      //Only the direct method fires events and applies rules
+      if(algorithm != "ssa"){
+        return false;
+      }
+      ssa_rules(simulation);
+    }else if(algorithm == "ssa"){
+      ssa_direct(simulation);
+    }else if(algorithm == "nrm"){
+      next_reaction_method(simulation);
+    }else if(algorithm == "ssa_cr"){
+      ssa_composition_rejection(simulation);
+    }else if(algorithm == "sdm"){
+      sorting_direct_method(simulation);
+    }else if(algorithm == "ssa_tree"){
+      ssa_tree(simulation);
+    }else if(algorithm == "tau"){
+      tau_leaping(simulation);
+    }else{
+      return false;
+    }
+    return true;
+  }
+
+  //Simulates one trajectory into its slice of trajectories_1D, using work buffers owned by the calling thread. Returns
+  //the simulation time the trajectory reached
+  static double ssa_direct_trajectory(Simulation* simulation, unsigned int trajectory_number, unsigned int* current_state, double* propensity_values){
+    std :: mt19937_64 rng = trajectory_rng(simulation, trajectory_number);
+    //Number of bytes for copying states
+    unsigned int state_size = sizeof(int)*((simulation -> model) -> number_species);
+    //Get simpler reference to memory space for this trajectory
+    unsigned int** trajectory = simulation -> trajectories[trajectory_number];
+    //Copy initial state
+    for(unsigned int species_number = 0; species_number < ((simulation -> model) -> number_species); species_number++){
+      trajectory[0][species_number] = (simulation -> model) -> species[species_number].initial_population;
+    }
+    //Set up current state from initial state
+    memcpy(current_state, trajectory[0], state_size);
+    double current_time = 0;
+    unsigned int entry_count = 1;
+    //calculate initial propensities
+    for(unsigned int reaction_number = 0; reaction_number < ((simulation -> model) -> number_reactions); reaction_number++){
+      propensity_values[reaction_number] = (simulation -> propensity_function) -> evaluate(reaction_number, current_state);
+    }
+    double propensity_sum;
+    while(current_time < (simulation -> end_time)){
+      if(simulation -> is_interrupted()){
         break ;
       }
-	  //Sum propensities
-	  propensity_sum = 0;
-	  for(unsigned int reaction_number = 0; reaction_number < ((simulation -> model) -> number_reactions); reaction_number++){
-	    propensity_sum += propensity_values[reaction_number];
-	  }
-	  //No more reactions
-	  if(propensity_sum <= 0){
-	    //Copy all of last changed state for rest of entries
-	    for(unsigned int i = entry_count; i < simulation -> number_timesteps; i++){
-	      memcpy(trajectory[i], current_state, state_size);
-	    }
-	    //Quit simulating this trajectory
-	    break;
-	  }//End if no more reactions
-	  
-	  //Reaction will fire, determine which one
-	  double cumulative_sum = rng() * propensity_sum/rng.max();
-	  simulation->current_time += -log(rng() * 1.0 / rng.max()) / propensity_sum;
-	  //Copy current state to passed timesteps
-	  while(entry_count < simulation -> number_timesteps && (simulation -> timeline[entry_count]) <= simulation->current_time){
-        if(interrupted){
-            break ;
+      //Sum propensities
+      propensity_sum = 0;
+      for(unsigned int reaction_number = 0; reaction_number < ((simulation -> model) -> number_reactions); reaction_number++){
+        propensity_sum += propensity_values[reaction_number];
+      }
+      //No more reactions
+      if(propensity_sum <= 0){
+        //Copy all of last changed state for rest of entries
+        for(unsigned int i = entry_count; i < simulation -> number_timesteps; i++){
+          memcpy(trajectory[i], current_state, state_size);
+        }
+        //Quit simulating this trajectory
+        break;
+      }//End if no more reactions
+
+      //Reaction will fire, determine which one
+      double cumulative_sum = rng() * propensity_sum/rng.max();
+      current_time += -log(rng() * 1.0 / rng.max()) / propensity_sum;
+      //Copy current state to passed timesteps
+      while(entry_count < simulation -> number_timesteps && (simulation -> timeline[entry_count]) <= current_time){
+        if(simulation -> is_interrupted()){
+          break ;
         }
-	    memcpy(trajectory[entry_count], current_state, state_size);
-	    entry_count++;
-	  }
+        memcpy(trajectory[entry_count], current_state, state_size);
+        entry_count++;
+      }
 
-	  for(unsigned int potential_reaction = 0; potential_reaction < ((simulation -> model) -> number_reactions); potential_reaction++){
-	    cumulative_sum -= propensity_values[potential_reaction];
-	    //This reaction fired
-	    if (cumulative_sum <= 0 && propensity_values[potential_reaction] > 0){
-	      //Update current state
-	      Reaction& reaction = ((simulation -> model) -> reactions[potential_reaction]);
-	      for(unsigned int species_number = 0; species_number < ((simulation -> model) -> number_species); species_number++){
-		current_state[species_number] += reaction.species_change[species_number];
-	      }
-	      //Recalculate needed propensities
-	      for(unsigned int& affected_reaction : reaction.affected_reactions){
-	 	propensity_values[affected_reaction] =  (simulation -> propensity_function) -> evaluate(affected_reaction, current_state);
-	      }
-	      break;
-	    }//Finished updating state/propensities with this reaction
-	  }//Finished checking for which reaction fired at this time
-	}//Simulation has reached end time
-      }//Finished simulating all trajectories
-      delete propensity_values;
-      delete current_state;
+      for(unsigned int potential_reaction = 0; potential_reaction < ((simulation -> model) -> number_reactions); potential_reaction++){
+        cumulative_sum -= propensity_values[potential_reaction];
+        //This reaction fired
+        if (cumulative_sum <= 0 && propensity_values[potential_reaction] > 0){
+          //Update current state
+          Reaction& reaction = ((simulation -> model) -> reactions[potential_reaction]);
+          for(unsigned int species_number = 0; species_number < ((simulation -> model) -> number_species); species_number++){
+            current_state[species_number] += reaction.species_change[species_number];
+          }
+          //Recalculate needed propensities
+          const Model& model = *(simulation -> model);
+          for(unsigned int i = model.affected_offsets[potential_reaction]; i < model.affected_offsets[potential_reaction + 1]; i++){
+            unsigned int affected_reaction = model.affected_reactions[i];
+            propensity_values[affected_reaction] =  (simulation -> propensity_function) -> evaluate(affected_reaction, current_state);
+          }
+          break;
+        }//Finished updating state/propensities with this reaction
+      }//Finished checking for which reaction fired at this time
+    }//Simulation has reached end time
+    return current_time;
+  }//end ssa_direct_trajectory
+
+  void ssa_direct(Simulation* simulation){
+    if(simulation){
+      simulate_trajectories(simulation, [simulation](){
+        //Current state and calculated propensity values, owned by the calling thread
+        std :: shared_ptr<unsigned int> current_state(new unsigned int[(simulation -> model) -> number_species], std :: default_delete<unsigned int[]>());
+        std :: shared_ptr<double> propensity_values(new double[(simulation -> model) -> number_reactions], std :: default_delete<double[]>());
+        return [simulation, current_state, propensity_values](unsigned int trajectory_number){
+          return ssa_direct_trajectory(simulation, trajectory_number, current_state.get(), propensity_values.get());
+        };
+      });
     }//end if simulation pointer not null
   }//end ssa_direct
 }//end namespace
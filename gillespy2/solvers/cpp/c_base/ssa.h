@@ -1,5 +1,34 @@
+#ifndef GILLESPY_SSA
+#define GILLESPY_SSA
 #include "model.h"
+#include <functional>
+#include <random>
 
 namespace Gillespy{
   void ssa_direct(Simulation* simulation);
+
+  //Runs the named algorithm on simulation, returns false if there is no algorithm with that name:
+  //  "ssa"      direct method
+  //  "nrm"      next reaction method
+  //  "ssa_cr"   composition-rejection method
+  //  "sdm"      sorting direct method
+  //  "ssa_tree" direct method with a binary sum tree
+  //  "tau"      tau-leaping, approximate
+  //A model with events or rules can only be simulated with "ssa", see ssa_rules in rules.h
+  bool run_algorithm(Simulation* simulation, const std :: string& algorithm);
+
+  //Simulates every trajectory on simulation -> number_threads threads. make_trajectory_simulator is called once by
+  //each thread and returns the function that thread simulates a trajectory with, which may own its work buffers and
+  //returns the simulation time the trajectory reached. Sets simulation -> current_time to the time every trajectory
+  //was simulated to, end_time unless the simulation was interrupted. A simulation reduced to statistics or summaries
+  //simulates each trajectory into a buffer of the thread and reduces it, counting the timesteps up to the time an
+  //interrupted trajectory reached
+  void simulate_trajectories(Simulation* simulation, const std :: function<std :: function<double(unsigned int)>()>& make_trajectory_simulator);
+  //Same for simulations of any kind, returns the time every trajectory was simulated to
+  double run_trajectories(unsigned int number_trajectories, unsigned int number_threads, double end_time, const std :: atomic<bool>* interrupt_flag, const std :: function<std :: function<double(unsigned int)>()>& make_trajectory_simulator);
+
+  //Every trajectory has its own random stream derived from the seed, so results do not depend on thread count
+  std :: mt19937_64 trajectory_rng(Simulation* simulation, unsigned int trajectory_number);
+  std :: mt19937_64 trajectory_rng(int random_seed, unsigned int trajectory_number);
 }
+#endif
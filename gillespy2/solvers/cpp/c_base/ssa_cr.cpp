@@ -0,0 +1,229 @@
+#include "ssa_cr.h"
+#include "ssa.h"
+#include <cmath>//Included for frexp and ldexp
+#include <string.h>//Included for memcpy only
+#include <vector>
+#include <algorithm>//Included for max
+
+namespace Gillespy{
+
+  //Reactions with non zero propensity, grouped by the exponent of the power of two bounding their propensity from above
+  class PropensityGroups{
+  public:
+    explicit PropensityGroups(unsigned int number_reactions) : group_of(number_reactions, NO_GROUP), index_in_group(number_reactions){}
+
+    void clear(){
+      for(unsigned int group : active_groups){
+        groups[group].reactions.clear();
+        groups[group].sum = 0;
+      }
+      active_groups.clear();
+      std :: fill(group_of.begin(), group_of.end(), NO_GROUP);
+    }
+
+    //Moves reaction to the group of its new propensity
+    void update(unsigned int reaction, double previous_propensity, double propensity){
+      unsigned int group = group_index(propensity);
+      if(group == group_of[reaction]){
+        if(group != NO_GROUP){
+          groups[group].sum += propensity - previous_propensity;
+        }
+        return;
+      }
+      if(group_of[reaction] != NO_GROUP){
+        remove(reaction, previous_propensity);
+      }
+      if(group != NO_GROUP){
+        insert(reaction, group, propensity);
+      }
+    }
+
+    //Sum of the propensities of the reactions in every group
+    double total() const{
+      double total = 0;
+      for(unsigned int group : active_groups){
+        total += groups[group].sum;
+      }
+      return total;
+    }
+
+    //Recomputes the group sums from the propensities, bounding the drift of the incremental updates
+    void resum(const double* propensity_values){
+      for(unsigned int group : active_groups){
+        double sum = 0;
+        for(unsigned int reaction : groups[group].reactions){
+          sum += propensity_values[reaction];
+        }
+        groups[group].sum = sum;
+      }
+    }
+
+    //Chooses a reaction with probability proportional to its propensity, total is the sum of every group
+    template <typename RNG>
+    unsigned int select(RNG& rng, double total, const double* propensity_values){
+      std :: uniform_real_distribution<double> uniform(0.0, 1.0);
+      //Composition: choose a group in proportion to its sum
+      double target = uniform(rng) * total;
+      unsigned int group = active_groups.back();
+      for(unsigned int active_group : active_groups){
+        target -= groups[active_group].sum;
+        if(target <= 0){
+          group = active_group;
+          break;
+        }
+      }
+      //Rejection: every propensity in the group is at least half of the group's bound, so on average fewer than
+      //two draws are needed
+      const std :: vector<unsigned int>& reactions = groups[group].reactions;
+      double bound = std :: ldexp(1.0, (int) group + MIN_EXPONENT);
+      std :: uniform_int_distribution<size_t> member(0, reactions.size() - 1);
+      while(true){
+        unsigned int reaction = reactions[member(rng)];
+        if(uniform(rng) * bound < propensity_values[reaction]){
+          return reaction;
+        }
+      }
+    }
+
+  private:
+    static const unsigned int NO_GROUP = (unsigned int) -1;
+    static const int MIN_EXPONENT = -1100; //below the exponent of the smallest subnormal double
+
+    struct Group{
+      std :: vector<unsigned int> reactions;
+      double sum = 0;
+    };
+    std :: vector<Group> groups; //indexed by exponent - MIN_EXPONENT, grown on demand
+    std :: vector<unsigned int> active_groups; //groups holding at least one reaction
+    std :: vector<unsigned int> group_of; //group of each reaction, NO_GROUP when its propensity is zero
+    std :: vector<unsigned int> index_in_group; //position of each reaction in its group
+
+    static unsigned int group_index(double propensity){
+      if(!(propensity > 0)){
+        return NO_GROUP;
+      }
+      int exponent;
+      std :: frexp(propensity, &exponent);
+      return (unsigned int) (exponent - MIN_EXPONENT);
+    }
+
+    void insert(unsigned int reaction, unsigned int group, double propensity){
+      if(group >= groups.size()){
+        groups.resize(group + 1);
+      }
+      if(groups[group].reactions.empty()){
+        active_groups.push_back(group);
+        groups[group].sum = 0;
+      }
+      group_of[reaction] = group;
+      index_in_group[reaction] = groups[group].reactions.size();
+      groups[group].reactions.push_back(reaction);
+      groups[group].sum += propensity;
+    }
+
+    void remove(unsigned int reaction, double propensity){
+      unsigned int group = group_of[reaction];
+      std :: vector<unsigned int>& reactions = groups[group].reactions;
+      //Swap with the last member so removal is O(1)
+      unsigned int last = reactions.back();
+      reactions[index_in_group[reaction]] = last;
+      index_in_group[last] = index_in_group[reaction];
+      reactions.pop_back();
+      group_of[reaction] = NO_GROUP;
+      groups[group].sum -= propensity;
+      if(reactions.empty()){
+        active_groups.erase(std :: find(active_groups.begin(), active_groups.end(), group));
+      }
+    }
+  };
+
+  //Work buffers of one thread
+  struct CompositionRejectionState{
+    std :: unique_ptr<unsigned int[]> current_state;
+    std :: unique_ptr<double[]> propensity_values;
+    PropensityGroups groups;
+    explicit CompositionRejectionState(Model* model) :
+      current_state(new unsigned int[model -> number_species]),
+      propensity_values(new double[model -> number_reactions]),
+      groups(model -> number_reactions){}
+  };
+
+  static double ssa_composition_rejection_trajectory(Simulation* simulation, unsigned int trajectory_number, CompositionRejectionState& state){
+    std :: mt19937_64 rng = trajectory_rng(simulation, trajectory_number);
+    std :: exponential_distribution<double> exponential(1.0);
+    Model& model = *(simulation -> model);
+    unsigned int* current_state = state.current_state.get();
+    double* propensity_values = state.propensity_values.get();
+    unsigned int state_size = sizeof(int) * model.number_species;
+    unsigned int** trajectory = simulation -> trajectories[trajectory_number];
+    for(unsigned int species_number = 0; species_number < model.number_species; species_number++){
+      trajectory[0][species_number] = model.species[species_number].initial_population;
+    }
+    memcpy(current_state, trajectory[0], state_size);
+    double current_time = 0;
+    unsigned int entry_count = 1;
+    //Group sums are recomputed once per number_reactions events, amortized O(1) per event
+    const unsigned int resum_interval = std :: max(model.number_reactions, 1024u);
+    unsigned int events_since_resum = 0;
+
+    state.groups.clear();
+    for(unsigned int reaction_number = 0; reaction_number < model.number_reactions; reaction_number++){
+      propensity_values[reaction_number] = (simulation -> propensity_function) -> evaluate(reaction_number, current_state);
+      state.groups.update(reaction_number, 0, propensity_values[reaction_number]);
+    }
+
+    while(current_time < (simulation -> end_time)){
+      if(simulation -> is_interrupted()){
+        break ;
+      }
+      double propensity_sum = state.groups.total();
+      //No more reactions
+      if(propensity_sum <= 0){
+        for(unsigned int i = entry_count; i < simulation -> number_timesteps; i++){
+          memcpy(trajectory[i], current_state, state_size);
+        }
+        break;
+      }
+      current_time += exponential(rng) / propensity_sum;
+      //Copy current state to passed timesteps
+      while(entry_count < simulation -> number_timesteps && (simulation -> timeline[entry_count]) <= current_time){
+        if(simulation -> is_interrupted()){
+          break ;
+        }
+        memcpy(trajectory[entry_count], current_state, state_size);
+        entry_count++;
+      }
+      if(current_time >= simulation -> end_time){
+        break;
+      }
+
+      unsigned int fired_reaction = state.groups.select(rng, propensity_sum, propensity_values);
+      Reaction& reaction = model.reactions[fired_reaction];
+      for(unsigned int species_number = 0; species_number < model.number_species; species_number++){
+        current_state[species_number] += reaction.species_change[species_number];
+      }
+      for(unsigned int i = model.affected_offsets[fired_reaction]; i < model.affected_offsets[fired_reaction + 1]; i++){
+        unsigned int affected_reaction = model.affected_reactions[i];
+        double propensity = (simulation -> propensity_function) -> evaluate(affected_reaction, current_state);
+        state.groups.update(affected_reaction, propensity_values[affected_reaction], propensity);
+        propensity_values[affected_reaction] = propensity;
+      }
+      if(++events_since_resum == resum_interval){
+        state.groups.resum(propensity_values);
+        events_since_resum = 0;
+      }
+    }//Simulation has reached end time
+    return current_time;
+  }
+
+  void ssa_composition_rejection(Simulation* simulation){
+    if(simulation){
+      simulate_trajectories(simulation, [simulation](){
+        std :: shared_ptr<CompositionRejectionState> state = std :: make_shared<CompositionRejectionState>(simulation -> model);
+        return [simulation, state](unsigned int trajectory_number){
+          return ssa_composition_rejection_trajectory(simulation, trajectory_number, *state);
+        };
+      });
+    }
+  }
+}
@@ -0,0 +1,10 @@
+#ifndef GILLESPY_SSA_CR
+#define GILLESPY_SSA_CR
+#include "model.h"
+
+namespace Gillespy{
+  //Composition-rejection direct method: reactions are grouped by the power of two bounding their propensity, a group
+  //is chosen in proportion to its sum and a reaction within it by rejection sampling, O(1) expected selection cost
+  void ssa_composition_rejection(Simulation* simulation);
+}
+#endif
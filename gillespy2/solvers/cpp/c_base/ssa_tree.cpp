@@ -0,0 +1,142 @@
+#include "ssa_tree.h"
+#include "ssa.h"
+#include <string.h>//Included for memcpy only
+#include <vector>
+#include <algorithm>//Included for fill
+
+namespace Gillespy{
+
+  //Complete binary tree whose leaves are the propensities and whose inner nodes hold the sum of their children, the
+  //root holding the total. Sums are recomputed rather than adjusted, so they never drift.
+  class PropensityTree{
+  public:
+    explicit PropensityTree(unsigned int number_reactions) : leaves(1){
+      while(leaves < number_reactions){
+        leaves *= 2;
+      }
+      nodes.assign(2 * leaves, 0.0);
+    }
+
+    //Sets every propensity, in O(R)
+    void build(const double* propensity_values, unsigned int number_reactions){
+      std :: fill(nodes.begin(), nodes.end(), 0.0);
+      for(unsigned int reaction = 0; reaction < number_reactions; reaction++){
+        nodes[leaves + reaction] = propensity_values[reaction];
+      }
+      for(unsigned int node = leaves - 1; node > 0; node--){
+        nodes[node] = nodes[2 * node] + nodes[2 * node + 1];
+      }
+    }
+
+    void update(unsigned int reaction, double propensity){
+      unsigned int node = leaves + reaction;
+      nodes[node] = propensity;
+      for(node /= 2; node > 0; node /= 2){
+        nodes[node] = nodes[2 * node] + nodes[2 * node + 1];
+      }
+    }
+
+    double total() const { return nodes[1]; }
+
+    //Finds the reaction whose cumulative propensity range holds target, 0 <= target < total()
+    unsigned int select(double target) const{
+      unsigned int node = 1;
+      while(node < leaves){
+        //Descend right only into a subtree with propensity, so rounding never selects a zero propensity reaction
+        if(target < nodes[2 * node] || nodes[2 * node + 1] <= 0){
+          node = 2 * node;
+        }else{
+          target -= nodes[2 * node];
+          node = 2 * node + 1;
+        }
+      }
+      return node - leaves;
+    }
+
+  private:
+    unsigned int leaves;
+    std :: vector<double> nodes; //nodes[1] is the root, the children of node i are 2i and 2i+1
+  };
+
+  //Work buffers of one thread
+  struct TreeState{
+    std :: unique_ptr<unsigned int[]> current_state;
+    std :: unique_ptr<double[]> propensity_values;
+    PropensityTree tree;
+    explicit TreeState(Model* model) :
+      current_state(new unsigned int[model -> number_species]),
+      propensity_values(new double[model -> number_reactions]),
+      tree(model -> number_reactions){}
+  };
+
+  static double ssa_tree_trajectory(Simulation* simulation, unsigned int trajectory_number, TreeState& state){
+    std :: mt19937_64 rng = trajectory_rng(simulation, trajectory_number);
+    std :: uniform_real_distribution<double> uniform(0.0, 1.0);
+    std :: exponential_distribution<double> exponential(1.0);
+    Model& model = *(simulation -> model);
+    unsigned int* current_state = state.current_state.get();
+    double* propensity_values = state.propensity_values.get();
+    unsigned int state_size = sizeof(int) * model.number_species;
+    unsigned int** trajectory = simulation -> trajectories[trajectory_number];
+    for(unsigned int species_number = 0; species_number < model.number_species; species_number++){
+      trajectory[0][species_number] = model.species[species_number].initial_population;
+    }
+    memcpy(current_state, trajectory[0], state_size);
+    double current_time = 0;
+    unsigned int entry_count = 1;
+
+    for(unsigned int reaction_number = 0; reaction_number < model.number_reactions; reaction_number++){
+      propensity_values[reaction_number] = (simulation -> propensity_function) -> evaluate(reaction_number, current_state);
+    }
+    state.tree.build(propensity_values, model.number_reactions);
+
+    while(current_time < (simulation -> end_time)){
+      if(simulation -> is_interrupted()){
+        break ;
+      }
+      double propensity_sum = state.tree.total();
+      //No more reactions
+      if(propensity_sum <= 0){
+        for(unsigned int i = entry_count; i < simulation -> number_timesteps; i++){
+          memcpy(trajectory[i], current_state, state_size);
+        }
+        break;
+      }
+      current_time += exponential(rng) / propensity_sum;
+      //Copy current state to passed timesteps
+      while(entry_count < simulation -> number_timesteps && (simulation -> timeline[entry_count]) <= current_time){
+        if(simulation -> is_interrupted()){
+          break ;
+        }
+        memcpy(trajectory[entry_count], current_state, state_size);
+        entry_count++;
+      }
+      if(current_time >= simulation -> end_time){
+        break;
+      }
+
+      unsigned int fired_reaction = state.tree.select(uniform(rng) * propensity_sum);
+      Reaction& reaction = model.reactions[fired_reaction];
+      for(unsigned int species_number = 0; species_number < model.number_species; species_number++){
+        current_state[species_number] += reaction.species_change[species_number];
+      }
+      for(unsigned int i = model.affected_offsets[fired_reaction]; i < model.affected_offsets[fired_reaction + 1]; i++){
+        unsigned int affected_reaction = model.affected_reactions[i];
+        propensity_values[affected_reaction] = (simulation -> propensity_function) -> evaluate(affected_reaction, current_state);
+        state.tree.update(affected_reaction, propensity_values[affected_reaction]);
+      }
+    }//Simulation has reached end time
+    return current_time;
+  }
+
+  void ssa_tree(Simulation* simulation){
+    if(simulation){
+      simulate_trajectories(simulation, [simulation](){
+        std :: shared_ptr<TreeState> state = std :: make_shared<TreeState>(simulation -> model);
+        return [simulation, state](unsigned int trajectory_number){
+          return ssa_tree_trajectory(simulation, trajectory_number, *state);
+        };
+      });
+    }
+  }
+}
@@ -0,0 +1,10 @@
+#ifndef GILLESPY_SSA_TREE
+#define GILLESPY_SSA_TREE
+#include "model.h"
+
+namespace Gillespy{
+  //Direct method with propensities kept in a binary sum tree, updating a propensity and selecting the firing reaction
+  //are both O(log R)
+  void ssa_tree(Simulation* simulation);
+}
+#endif
@@ -0,0 +1,78 @@
+#include "summaries.h"
+#include <limits>
+
+namespace Gillespy{
+
+  static bool compare(double value, Comparison comparison, double threshold){
+    switch(comparison){
+    case GREATER_EQUAL:
+      return value >= threshold;
+    case GREATER:
+      return value > threshold;
+    case LESS_EQUAL:
+      return value <= threshold;
+    default:
+      return value < threshold;
+    }
+  }
+
+  double TrajectorySummary :: evaluate(unsigned int* const* trajectory, const double* timeline, unsigned int number_entries) const{
+    const double not_a_number = std :: numeric_limits<double> :: quiet_NaN();
+    if(number_entries == 0){
+      return not_a_number;
+    }
+    switch(kind){
+    case FINAL:
+      return trajectory[number_entries - 1][species];
+    case TIME_AVERAGE:{
+      double duration = timeline[number_entries - 1] - timeline[0];
+      if(duration <= 0){
+        return trajectory[0][species];
+      }
+      double area = 0;
+      for(unsigned int i = 1; i < number_entries; i++){
+        area += 0.5 * (timeline[i] - timeline[i - 1]) * ((double) trajectory[i][species] + trajectory[i - 1][species]);
+      }
+      return area / duration;
+    }
+    case MAXIMUM:
+    case MINIMUM:
+    case PEAK_TIME:{
+      unsigned int maximum = 0;
+      unsigned int minimum = 0;
+      for(unsigned int i = 1; i < number_entries; i++){
+        if(trajectory[i][species] > trajectory[maximum][species]){
+          maximum = i;
+        }
+        if(trajectory[i][species] < trajectory[minimum][species]){
+          minimum = i;
+        }
+      }
+      if(kind == PEAK_TIME){
+        return timeline[maximum];
+      }
+      return trajectory[kind == MAXIMUM ? maximum : minimum][species];
+    }
+    case FIRST_PASSAGE:
+      for(unsigned int i = 0; i < number_entries; i++){
+        if(compare(trajectory[i][species], comparison, threshold)){
+          return timeline[i];
+        }
+      }
+      return not_a_number;
+    }
+    return not_a_number;
+  }
+
+  std :: vector<TrajectorySummary> read_summaries(std :: istream& is){
+    std :: vector<TrajectorySummary> summaries;
+    unsigned int kind;
+    unsigned int species;
+    unsigned int comparison;
+    double threshold;
+    while(is >> kind >> species >> comparison >> threshold){
+      summaries.push_back({(SummaryKind) kind, species, (Comparison) comparison, threshold});
+    }
+    return summaries;
+  }
+}
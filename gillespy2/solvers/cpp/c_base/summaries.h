@@ -0,0 +1,42 @@
+#ifndef GILLESPY_SUMMARIES
+#define GILLESPY_SUMMARIES
+#include <istream>
+#include <vector>
+
+namespace Gillespy{
+
+  //Statistic a TrajectorySummary computes, the values of the kinds of summaries.py
+  enum SummaryKind{
+    FINAL = 0,
+    //Average of the populations over time, integrated by the trapezoidal rule
+    TIME_AVERAGE = 1,
+    MAXIMUM = 2,
+    MINIMUM = 3,
+    //Earliest time the population is at its maximum
+    PEAK_TIME = 4,
+    //Earliest time the population compares to the threshold
+    FIRST_PASSAGE = 5
+  };
+
+  enum Comparison{
+    GREATER_EQUAL = 0,
+    GREATER = 1,
+    LESS_EQUAL = 2,
+    LESS = 3
+  };
+
+  //A summary statistic of the population of one species over the timesteps of a trajectory
+  struct TrajectorySummary{
+    SummaryKind kind;
+    unsigned int species;
+    Comparison comparison;
+    double threshold;
+    //Value over the first number_entries timesteps of trajectory, NaN if there are none or if a first passage never
+    //happens
+    double evaluate(unsigned int* const* trajectory, const double* timeline, unsigned int number_entries) const;
+  };
+
+  //Reads summaries written as whitespace separated "kind species comparison threshold" groups until is ends
+  std :: vector<TrajectorySummary> read_summaries(std :: istream& is);
+}
+#endif
@@ -0,0 +1,286 @@
+#include "tau.h"
+#include "ssa.h"
+#include <string.h>//Included for memcpy only
+#include <vector>
+#include <cmath>
+#include <limits>
+#include <algorithm>
+
+namespace Gillespy{
+
+  //Reactions whose reactants could be used up by this many firings are critical
+  const unsigned int CRITICAL_FIRINGS = 10;
+  //A leap shorter than this many expected SSA steps is replaced by that many SSA steps
+  const double SSA_THRESHOLD = 10;
+  const unsigned int SSA_STEPS = 100;
+
+  //Work buffers of one thread, and the reaction structure the step size selection needs
+  struct TauState{
+    std :: vector<unsigned int> current_state;
+    std :: vector<long long> leap_state;
+    std :: vector<double> propensity_values;
+    std :: vector<bool> critical;
+    std :: vector<long long> firings;
+    std :: vector<double> mu;
+    std :: vector<double> sigma;
+    //Nonzero species changes of each reaction in compressed sparse row form
+    std :: vector<unsigned int> change_offsets;
+    std :: vector<unsigned int> change_species;
+    std :: vector<int> change_values;
+    //Highest order of the reactions each species is a reactant of, and the most molecules of it one of those
+    //reactions consumes, 0 for species that are no reactant
+    std :: vector<unsigned int> highest_order;
+    std :: vector<unsigned int> highest_order_count;
+    explicit TauState(Model* model) :
+      current_state(model -> number_species), leap_state(model -> number_species),
+      propensity_values(model -> number_reactions), critical(model -> number_reactions),
+      firings(model -> number_reactions), mu(model -> number_species), sigma(model -> number_species),
+      highest_order(model -> number_species, 0), highest_order_count(model -> number_species, 0){
+      change_offsets.push_back(0);
+      for(unsigned int reaction = 0; reaction < model -> number_reactions; reaction++){
+        for(unsigned int species = 0; species < model -> number_species; species++){
+          if(model -> reactions[reaction].species_change[species] != 0){
+            change_species.push_back(species);
+            change_values.push_back(model -> reactions[reaction].species_change[species]);
+          }
+        }
+        change_offsets.push_back(change_species.size());
+        unsigned int order = 0;
+        for(unsigned int i = model -> reactant_offsets[reaction]; i < model -> reactant_offsets[reaction + 1]; i++){
+          order += model -> reactant_counts[i];
+        }
+        for(unsigned int i = model -> reactant_offsets[reaction]; i < model -> reactant_offsets[reaction + 1]; i++){
+          unsigned int species = model -> reactant_species[i];
+          if(order > highest_order[species] || (order == highest_order[species] && model -> reactant_counts[i] > highest_order_count[species])){
+            highest_order[species] = order;
+            highest_order_count[species] = model -> reactant_counts[i];
+          }
+        }
+      }
+    }
+
+    //g_i of Cao, Gillespie and Petzold, bounding the relative change of the propensities of the reactions species
+    //is a reactant of by its own relative change
+    double relative_change_bound(unsigned int species, double population) const{
+      unsigned int order = highest_order[species];
+      unsigned int count = highest_order_count[species];
+      if(count >= 2 && population > count - 1){
+        if(order == 2){
+          return 2 + 1 / (population - 1);
+        }
+        if(order == 3 && count == 2){
+          return 1.5 * (2 + 1 / (population - 1));
+        }
+        if(count == 3){
+          return 3 + 1 / (population - 1) + 2 / (population - 2);
+        }
+      }
+      return order;
+    }
+  };
+
+  //Largest leap, from the state in state.current_state, that keeps the expected and the standard deviation of the
+  //change of every reactant within epsilon of its population, counting only the noncritical reactions
+  static double noncritical_tau(Simulation* simulation, TauState& state){
+    Model& model = *(simulation -> model);
+    std :: fill(state.mu.begin(), state.mu.end(), 0.0);
+    std :: fill(state.sigma.begin(), state.sigma.end(), 0.0);
+    bool any_noncritical = false;
+    for(unsigned int reaction = 0; reaction < model.number_reactions; reaction++){
+      if(state.critical[reaction] || state.propensity_values[reaction] <= 0){
+        continue;
+      }
+      any_noncritical = true;
+      for(unsigned int i = state.change_offsets[reaction]; i < state.change_offsets[reaction + 1]; i++){
+        double change = state.change_values[i];
+        state.mu[state.change_species[i]] += change * state.propensity_values[reaction];
+        state.sigma[state.change_species[i]] += change * change * state.propensity_values[reaction];
+      }
+    }
+    double tau = std :: numeric_limits<double> :: infinity();
+    if(!any_noncritical){
+      return tau;
+    }
+    for(unsigned int species = 0; species < model.number_species; species++){
+      if(state.highest_order[species] == 0){
+        continue;
+      }
+      double population = state.current_state[species];
+      double bound = std :: max(simulation -> tau_tol * population / state.relative_change_bound(species, population), 1.0);
+      if(state.mu[species] != 0){
+        tau = std :: min(tau, bound / std :: abs(state.mu[species]));
+      }
+      if(state.sigma[species] > 0){
+        tau = std :: min(tau, bound * bound / state.sigma[species]);
+      }
+    }
+    return tau;
+  }
+
+  //Applies the firings to leap_state, returns false if a population would become negative
+  static bool apply_firings(TauState& state, unsigned int number_reactions){
+    for(unsigned int reaction = 0; reaction < number_reactions; reaction++){
+      if(state.firings[reaction] == 0){
+        continue;
+      }
+      for(unsigned int i = state.change_offsets[reaction]; i < state.change_offsets[reaction + 1]; i++){
+        state.leap_state[state.change_species[i]] += state.firings[reaction] * state.change_values[i];
+      }
+    }
+    for(long long population : state.leap_state){
+      if(population < 0){
+        return false;
+      }
+    }
+    return true;
+  }
+
+  static double tau_leaping_trajectory(Simulation* simulation, unsigned int trajectory_number, TauState& state){
+    std :: mt19937_64 rng = trajectory_rng(simulation, trajectory_number);
+    std :: uniform_real_distribution<double> uniform(0.0, 1.0);
+    std :: exponential_distribution<double> exponential(1.0);
+    Model& model = *(simulation -> model);
+    unsigned int* current_state = state.current_state.data();
+    double* propensity_values = state.propensity_values.data();
+    unsigned int state_size = sizeof(int) * model.number_species;
+    unsigned int** trajectory = simulation -> trajectories[trajectory_number];
+    for(unsigned int species_number = 0; species_number < model.number_species; species_number++){
+      trajectory[0][species_number] = model.species[species_number].initial_population;
+    }
+    memcpy(current_state, trajectory[0], state_size);
+    double current_time = 0;
+    unsigned int entry_count = 1;
+
+    while(current_time < (simulation -> end_time)){
+      if(simulation -> is_interrupted()){
+        break ;
+      }
+      double propensity_sum = 0;
+      for(unsigned int reaction = 0; reaction < model.number_reactions; reaction++){
+        propensity_values[reaction] = (simulation -> propensity_function) -> evaluate(reaction, current_state);
+        propensity_sum += propensity_values[reaction];
+      }
+      if(propensity_sum <= 0){
+        //No more reactions, the state holds until the end
+        for(; entry_count < simulation -> number_timesteps; entry_count++){
+          memcpy(trajectory[entry_count], current_state, state_size);
+        }
+        break;
+      }
+      //Next output time, leaps stop there so the state is known at every output time
+      double next_output = entry_count < simulation -> number_timesteps ? simulation -> timeline[entry_count] : simulation -> end_time;
+
+      double critical_sum = 0;
+      for(unsigned int reaction = 0; reaction < model.number_reactions; reaction++){
+        bool critical = false;
+        if(propensity_values[reaction] > 0){
+          for(unsigned int i = model.reactant_offsets[reaction]; i < model.reactant_offsets[reaction + 1]; i++){
+            if(current_state[model.reactant_species[i]] < CRITICAL_FIRINGS * model.reactant_counts[i]){
+              critical = true;
+              break;
+            }
+          }
+        }
+        state.critical[reaction] = critical;
+        if(critical){
+          critical_sum += propensity_values[reaction];
+        }
+      }
+      double leap_tau = noncritical_tau(simulation, state);
+
+      if(leap_tau < SSA_THRESHOLD / propensity_sum){
+        //A leap would cover only a few reactions, take exact SSA steps instead
+        for(unsigned int step = 0; step < SSA_STEPS && propensity_sum > 0; step++){
+          double step_time = current_time + exponential(rng) / propensity_sum;
+          if(step_time > next_output){
+            current_time = next_output;
+            break;
+          }
+          current_time = step_time;
+          double cumulative_sum = uniform(rng) * propensity_sum;
+          unsigned int fired_reaction = 0;
+          for(; fired_reaction < model.number_reactions - 1; fired_reaction++){
+            cumulative_sum -= propensity_values[fired_reaction];
+            if(cumulative_sum < 0 && propensity_values[fired_reaction] > 0){
+              break;
+            }
+          }
+          for(unsigned int i = state.change_offsets[fired_reaction]; i < state.change_offsets[fired_reaction + 1]; i++){
+            current_state[state.change_species[i]] += state.change_values[i];
+          }
+          propensity_sum = 0;
+          for(unsigned int reaction = 0; reaction < model.number_reactions; reaction++){
+            propensity_values[reaction] = (simulation -> propensity_function) -> evaluate(reaction, current_state);
+            propensity_sum += propensity_values[reaction];
+          }
+        }
+        if(propensity_sum <= 0 && current_time < next_output){
+          current_time = next_output;
+        }
+      }else{
+        //Time to the next firing of a critical reaction
+        double critical_tau = critical_sum > 0 ? exponential(rng) / critical_sum : std :: numeric_limits<double> :: infinity();
+        while(true){
+          double tau = std :: min(leap_tau, critical_tau);
+          bool fire_critical = critical_tau <= leap_tau && critical_tau <= next_output - current_time;
+          tau = std :: min(tau, next_output - current_time);
+          for(unsigned int reaction = 0; reaction < model.number_reactions; reaction++){
+            state.firings[reaction] = 0;
+            if(!state.critical[reaction] && propensity_values[reaction] > 0){
+              std :: poisson_distribution<long long> poisson(propensity_values[reaction] * tau);
+              state.firings[reaction] = poisson(rng);
+            }
+          }
+          if(fire_critical){
+            //One critical reaction fires, with probability proportional to its propensity
+            double cumulative_sum = uniform(rng) * critical_sum;
+            unsigned int fired_reaction = 0;
+            for(unsigned int reaction = 0; reaction < model.number_reactions; reaction++){
+              if(state.critical[reaction]){
+                fired_reaction = reaction;
+                cumulative_sum -= propensity_values[reaction];
+                if(cumulative_sum < 0){
+                  break;
+                }
+              }
+            }
+            state.firings[fired_reaction] = 1;
+          }
+          for(unsigned int species = 0; species < model.number_species; species++){
+            state.leap_state[species] = current_state[species];
+          }
+          if(apply_firings(state, model.number_reactions)){
+            for(unsigned int species = 0; species < model.number_species; species++){
+              current_state[species] = (unsigned int) state.leap_state[species];
+            }
+            //Land exactly on the output time, so rounding cannot leave it just out of reach
+            current_time = tau == next_output - current_time ? next_output : current_time + tau;
+            break;
+          }
+          //The leap made a population negative, retry with half the noncritical step
+          leap_tau = tau / 2;
+          if(simulation -> is_interrupted()){
+            break ;
+          }
+        }
+      }
+      //Copy the state to the output times the step reached
+      while(entry_count < simulation -> number_timesteps && (simulation -> timeline[entry_count]) <= current_time){
+        memcpy(trajectory[entry_count], current_state, state_size);
+        entry_count++;
+      }
+    }//Simulation has reached end time
+    return current_time;
+  }
+
+  void tau_leaping(Simulation* simulation){
+    if(simulation){
+      simulate_trajectories(simulation, [simulation](){
+        std :: shared_ptr<TauState> state = std :: make_shared<TauState>(simulation -> model);
+        return [simulation, state](unsigned int trajectory_number){
+          return tau_leaping_trajectory(simulation, trajectory_number, *state);
+        };
+      });
+    }
+  }
+}
@@ -0,0 +1,11 @@
+#ifndef GILLESPY_TAU
+#define GILLESPY_TAU
+#include "model.h"
+
+namespace Gillespy{
+  //Tau-leaping with the step size selection of Cao, Gillespie and Petzold (2006), critical reactions fired at most
+  //once per leap, leaps that would make a population negative halved, and exact SSA steps when a leap would be too
+  //short to pay off. Requires the reactants of the model, see Model::set_reactants
+  void tau_leaping(Simulation* simulation);
+}
+#endif
@@ -0,0 +1,109 @@
+from gillespy2.core import gillespyError, log
+from gillespy2.solvers.utilities import solverutils as cutils
+from gillespy2.solvers.cpp.ssa_c_solver import SSACSolver
+import signal #for solver timeout implementation
+import os #for getting directories for C++ files
+import subprocess #For calling make and executing c solver
+
+
+class ODECSolver(SSACSolver):
+    """
+    This Solver produces the deterministic continuous solution via ODE, compiled to C++. The reaction rates and the
+    Jacobian of mass-action reactions are generated as C++, and integrated by the L-stable Rosenbrock method of the
+    engine (c_base/ode.cpp), so stiff models are solved without calling back into Python.
+    """
+    name = "ODECSolver"
+    template_file = 'ODESimulationTemplate.cpp'
+
+    def __init__(self, model=None, output_directory=None, delete_directory=True, resume=None):
+        super(ODECSolver, self).__init__(model, output_directory, delete_directory, resume)
+
+    def get_solver_settings(self):
+        """
+        :return: Tuple of strings, denoting all keyword argument for this solvers run() method.
+        """
+        return ('model', 't', 'number_of_trajectories', 'timeout', 'increment', 'rtol', 'atol')
+
+    def run(self=None, model=None, t=20, number_of_trajectories=1, timeout=0, increment=0.05, debug=False,
+            profile=False, resume=None, rtol=1e-6, atol=1e-9, **kwargs):
+        """
+        :param model: The model being simulated.
+        :param t: End time of the simulation.
+        :param number_of_trajectories: Should be 1. This is deterministic and will always have same results.
+        :param timeout: If greater than 0, the simulation is stopped after timeout seconds.
+        :param increment: Time step of the output.
+        :param resume: Result of a previously run simulation, to be resumed.
+        :param rtol: Relative error tolerance of every integration step.
+        :param atol: Absolute error tolerance of every integration step.
+        :return: Tuple of the list of trajectories and the return code.
+        """
+        pause = False
+        if resume is not None:
+            if t < resume['time'][-1]:
+                raise gillespyError.ExecutionError(
+                    "'t' must be greater than previous simulations end time, or set in the run() method as the "
+                    "simulations next end time")
+
+        if self is None or self.model is None:
+            self = ODECSolver(model, resume=resume)
+
+        if len(kwargs) > 0:
+            for key in kwargs:
+                log.warning('Unsupported keyword argument to {0} solver: {1}'.format(self.name, key))
+        if number_of_trajectories > 1:
+            log.warning("Generating duplicate trajectories for model with ODE Solver. "
+                        "Consider running with only 1 trajectory.")
+
+        unsupported_sbml_features = {
+                        'Rate Rules': len(model.listOfRateRules),
+                        'Assignment Rules': len(model.listOfAssignmentRules),
+                        'Events': len(model.listOfEvents),
+                        'Function Definitions': len(model.listOfFunctionDefinitions)
+                        }
+        detected_features = [feature for feature, count in unsupported_sbml_features.items() if count]
+        if len(detected_features):
+            raise gillespyError.ModelError('Could not run Model.  SBML Feature: {} not supported by ODECSolver.'
+                                           .format(detected_features))
+
+        if resume is not None:
+            t = abs(t - resume['time'][-1])
+        number_timesteps = int(round(t/increment + 1))
+
+        # Execute simulation.
+        args = [os.path.join(self.output_directory, 'UserSimulation'), '-trajectories', str(number_of_trajectories),
+                '-timesteps', str(number_timesteps), '-end', str(t), '-rtol', str(rtol), '-atol', str(atol)]
+
+        # begin subprocess c simulation with timeout (default timeout=0 will not timeout)
+        with subprocess.Popen(args, stdout=subprocess.PIPE, stderr=subprocess.PIPE, start_new_session=True) \
+                as simulation:
+            try:
+                if timeout > 0:
+                    stdout, stderr = simulation.communicate(timeout=timeout)
+                else:
+                    stdout, stderr = simulation.communicate()
+                return_code = simulation.wait()
+            except (KeyboardInterrupt, subprocess.TimeoutExpired):
+                os.killpg(simulation.pid, signal.SIGINT)  # send signal to the process group
+                stdout, stderr = simulation.communicate()
+                pause = True
+                return_code = 33
+
+        # Parse/return results
+        if return_code not in [0, 33]:
+            raise gillespyError.ExecutionError("Error encountered while running simulation C++ file:"
+                                               "\nReturn code: {0}.\nError:\n{1}\n".
+                                               format(return_code, stderr.decode('utf-8')))
+        trajectory_base, timeStopped = cutils._parse_binary_output(stdout, number_of_trajectories, number_timesteps,
+                                                                   len(self.species), pause=pause)
+
+        # Format results
+        self.simulation_data = []
+        for trajectory in range(number_of_trajectories):
+            data = {'time': trajectory_base[trajectory, :, 0]}
+            for i in range(len(self.species)):
+                data[self.species[i]] = trajectory_base[trajectory, :, i + 1]
+            self.simulation_data.append(data)
+        if resume is not None or timeStopped != 0:
+            self.simulation_data = cutils.c_solver_resume(timeStopped, self.simulation_data, t, resume=resume)
+
+        return self.simulation_data, return_code
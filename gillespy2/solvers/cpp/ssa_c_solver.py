@@ -1,6 +1,8 @@
 import gillespy2
 from gillespy2.core import gillespyError, GillesPySolver, log
 from gillespy2.solvers.utilities import solverutils as cutils
+from gillespy2.solvers.cpp import build_cache
+from gillespy2.solvers.cpp.summaries import _summary_arguments
 import signal, time #for solver timeout implementation
 import os #for getting directories for C++ files
 import shutil #for deleting/copying files
@@ -26,34 +28,28 @@ def _write_constants(outfile, model, reactions, species, parameter_mappings, res
     """
 
     outfile.write("const double V = {};\n".format(model.volume))
-    outfile.write("std :: string s_names[] = {")
+    outfile.write("const char* s_names[] = {")
     if len(species) > 0:
         # Write model species names.
         for i in range(len(species)-1):
             outfile.write('"{}", '.format(species[i]))
         outfile.write('"{}"'.format(species[-1]))
-        outfile.write("};\nunsigned int populations[] = {")
-        # Write initial populations.
-        for i in range(len(species)-1):
-            # If resuming
-            if not (resume is None):
-                if isinstance(resume, np.ndarray):
-                    outfile.write('{}, '.format(int(resume[0][-1][i+1])))
-                else:
-                    outfile.write('{}, '.format(int(resume[species[i]][-1])))
-            else:
-                outfile.write('{}, '.format(int(model.listOfSpecies[species[i]].initial_value)))
-        if not (resume is None):
-            if isinstance(resume, np.ndarray):
-                outfile.write('{}'.format(int(resume[0][-1][-1])))
-            else:
-                outfile.write('{}'.format(int(resume[species[-1]][-1])))
+        # Initial values, from the end of the prior simulation if resuming.
+        if resume is None:
+            initial_values = [model.listOfSpecies[name].initial_value for name in species]
+        elif isinstance(resume, np.ndarray):
+            initial_values = [resume[0][-1][i+1] for i in range(len(species))]
         else:
-            outfile.write('{}'.format(int(model.listOfSpecies[species[-1]].initial_value)))
+            initial_values = [resume[name][-1] for name in species]
+        # Write initial populations, and the continuous initial values the ODE solver starts from.
+        outfile.write("};\nunsigned int populations[] = {")
+        outfile.write(', '.join(str(int(value)) for value in initial_values))
+        outfile.write("};\nconst double initial_values[] = {")
+        outfile.write(', '.join(repr(float(value)) for value in initial_values))
         outfile.write("};\n")
     if len(reactions) > 0:
         # Write reaction names
-        outfile.write("std :: string r_names[] = {")
+        outfile.write("const char* r_names[] = {")
         for i in range(len(reactions)-1):
             outfile.write('"{}", '.format(reactions[i]))
         outfile.write('"{}"'.format(reactions[-1]))
@@ -67,13 +63,16 @@ def _write_constants(outfile, model, reactions, species, parameter_mappings, res
 class SSACSolver(GillesPySolver):
     name = "SSACSolver"
     """TODO"""
+    # Template in c_base the simulation is generated from.
+    template_file = 'SimulationTemplate.cpp'
 
-    def __init__(self, model=None, output_directory=None, delete_directory=True, resume=None):
+    def __init__(self, model=None, output_directory=None, delete_directory=True, resume=None, in_process=False):
         super(SSACSolver, self).__init__()
         self.__compiled = False
         self.delete_directory = False
         self.model = model
         self.resume = resume
+        self.in_process = in_process
         if self.model is not None:
             # Create constant, ordered lists for reactions/species/
             self.species_mappings = self.model.sanitized_species_names()
@@ -101,7 +100,7 @@ class SSACSolver(GillesPySolver):
                 raise gillespyError.DirectoryError("Errors encountered while setting up directory for Solver C++ files."
                                                    )
             cutils._copy_files(self.output_directory, GILLESPY_C_DIRECTORY)
-            self.__write_template()
+            self.__write_template(self.template_file)
             self.__compile()
 
     def __del__(self):
@@ -126,33 +125,57 @@ class SSACSolver(GillesPySolver):
                                                      , self.reactions)
                         if line.startswith("REACTIONS"):
                             cutils._write_reactions(outfile, self.model, self.reactions, self.species)
+                        if line.startswith("ODE_RATES"):
+                            cutils._write_ode_rates(outfile, self.model, self.species_mappings,
+                                                    self.parameter_mappings, self.reactions)
+                        if line.startswith("FUNCTIONS"):
+                            cutils._write_functions(outfile, self.model)
+                        if line.startswith("RULES"):
+                            cutils._write_rules(outfile, self.model, self.species_mappings, self.parameter_mappings,
+                                                shadow_parameters=True)
+                        if line.startswith("SPECIES_MODES"):
+                            cutils._write_species_modes(outfile, self.model, self.species)
+                        if line.startswith("RATE_DERIVATIVES"):
+                            cutils._write_rate_derivatives(outfile, self.model, self.species_mappings,
+                                                           self.parameter_mappings, self.reactions)
                     else:
                         outfile.write(line)
 
     def __compile(self):
-        # Use makefile.
         if self.resume:
             if self.resume[0].model != self.model:
                 raise gillespyError.ModelError('When resuming, one must not alter the model being resumed.')
-            else:
-                built = subprocess.run(["make", "-C", self.output_directory, 'UserSimulation'],
-                    stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-        else:
-             try:
-                 cleaned = subprocess.run(
-                     ["make", "-C", self.output_directory, '-f', MAKE_FILE,
-                      'cleanSimulation'],
-                     stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-                 built = subprocess.run(
-                     ["make", "-C", self.output_directory, '-f', MAKE_FILE,
-                      'UserSimulation'], stdout=subprocess.PIPE,
-                     stderr=subprocess.PIPE)
-             except KeyboardInterrupt:
-                 log.warning(
-                     "Solver has been interrupted during compile time, unexpected behavior may occur.")
+
+        # In process simulations are built as a shared library, loaded through ctypes.
+        target = 'UserSimulation.so' if self.in_process else 'UserSimulation'
+        simulation_file = os.path.join(self.output_directory, target)
+
+        # Reuse the simulation of an identical, previously compiled model.
+        cache_key = build_cache.cache_key(self.output_directory, target)
+        if build_cache.fetch(cache_key, simulation_file):
+            self.__compiled = True
+            if self.in_process:
+                self.__library = cutils._load_simulation_library(simulation_file)
+            return
+
+        # Use makefile, linking the prebuilt engine so only the generated model source is compiled.
+        make_args = ["make", "-C", self.output_directory, '-f', MAKE_FILE]
+        engine_library = build_cache.get_engine_library(MAKE_FILE)
+        if engine_library is not None:
+            make_args.append('ENGINE_LIB={}'.format(engine_library))
+        try:
+            cleaned = subprocess.run(make_args + ['cleanSimulation'], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+            built = subprocess.run(make_args + [target], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        except KeyboardInterrupt:
+            log.warning(
+                "Solver has been interrupted during compile time, unexpected behavior may occur.")
+            raise
 
         if built.returncode == 0:
             self.__compiled = True
+            build_cache.store(cache_key, simulation_file)
+            if self.in_process:
+                self.__library = cutils._load_simulation_library(simulation_file)
         else:
             raise gillespyError.BuildError("Error encountered while compiling file:\nReturn code: "
                                            "{0}.\nError:\n{1}\n{2}\n".format(built.returncode,
@@ -163,10 +186,20 @@ class SSACSolver(GillesPySolver):
         """
         :return: Tuple of strings, denoting all keyword argument for this solvers run() method.
         """
-        return ('model', 't', 'number_of_trajectories', 'timeout', 'increment', 'seed', 'debug', 'profile')
+        return ('model', 't', 'number_of_trajectories', 'timeout', 'increment', 'seed', 'debug', 'profile',
+                'num_threads', 'algorithm', 'tau_tol', 'statistics_only', 'summaries')
 
     def run(self=None, model=None, t=20, number_of_trajectories=1, timeout=0,
-            increment=0.05, seed=None, debug=False, profile=False, resume=None, **kwargs):
+            increment=0.05, seed=None, debug=False, profile=False, resume=None, num_threads=1, algorithm='ssa',
+            tau_tol=0.03, statistics_only=False, summaries=None, **kwargs):
+        """
+        :param statistics_only: If True, the trajectories are not kept, only their mean, standard deviation, minimum
+        and maximum at every timestep, updated by the engine as each trajectory finishes. These are returned in place
+        of the trajectories, in that order, so memory does not grow with number_of_trajectories.
+        :param summaries: List of summaries of gillespy2.solvers.cpp.summaries, such as [final('A'),
+        first_passage('B', '>=', 100)]. If given, only these are computed as each trajectory finishes, and an array of
+        shape (number_of_trajectories, len(summaries)) is returned in place of the trajectories.
+        """
 
         pause = False
         if resume is not None:
@@ -181,21 +214,7 @@ class SSACSolver(GillesPySolver):
         if len(kwargs) > 0:
             for key in kwargs:
                 log.warning('Unsupported keyword argument to {0} solver: {1}'.format(self.name, key))
-        
-        unsupported_sbml_features = {
-                        'Rate Rules': len(model.listOfRateRules),
-                        'Assignment Rules': len(model.listOfAssignmentRules), 
-                        'Events': len(model.listOfEvents),
-                        'Function Definitions': len(model.listOfFunctionDefinitions)
-                        }
-        detected_features = []
-        for feature, count in unsupported_sbml_features.items():
-            if count:
-                detected_features.append(feature)
 
-        if len(detected_features):
-            raise gillespyError.ModelError('Could not run Model.  SBML Feature: {} not supported by SSACSolver.'
-                                           .format(detected_features))
 
         if self.__compiled:
             self.simulation_data = None
@@ -203,62 +222,88 @@ class SSACSolver(GillesPySolver):
                 t = abs(t - resume['time'][-1])
 
             number_timesteps = int(round(t/increment + 1))
-            # Execute simulation.
-            args = [os.path.join(self.output_directory, 'UserSimulation'), '-trajectories', str(number_of_trajectories),
-                    '-timesteps', str(number_timesteps), '-end', str(t)]
-            if seed is not None:
-                if isinstance(seed, int):
+            if seed is not None and not isinstance(seed, int):
+                seed = int(seed)
+                if seed <= 0:
+                    raise gillespyError.ModelError("seed must be a positive integer")
+            if not isinstance(num_threads, int) or num_threads < 1:
+                raise gillespyError.SimulationError("num_threads must be a positive integer")
+            cutils._validate_cpp_algorithm(algorithm, self.model)
+            if (statistics_only or summaries) and (self.in_process or resume is not None):
+                raise gillespyError.SimulationError("statistics_only and summaries are not supported by in process "
+                                                    "or resumed simulations")
+            if statistics_only and summaries:
+                raise gillespyError.SimulationError("statistics_only and summaries can not be combined")
+
+            if self.in_process:
+                # Simulate in this process, the library writes populations straight into a NumPy array.
+                trajectory_base, timeStopped, return_code = cutils._run_simulation_library(
+                    self.__library, None, None, number_of_trajectories, number_timesteps, t, len(self.species), seed,
+                    num_threads, timeout, algorithm, tau_tol)
+            else:
+                # Execute simulation.
+                args = [os.path.join(self.output_directory, 'UserSimulation'), '-trajectories',
+                        str(number_of_trajectories), '-timesteps', str(number_timesteps), '-end', str(t),
+                        '-threads', str(num_threads),
+                        '-algorithm', algorithm, '-tau_tol', str(tau_tol)]
+                if seed is not None:
                     args.append('-seed')
                     args.append(str(seed))
-                else:
-                    seed_int = int(seed)
-                    if seed_int > 0:
-                        args.append('-seed')
-                        args.append(str(seed_int))
-                    else:
-                        raise gillespyError.ModelError("seed must be a positive integer")
+                if statistics_only:
+                    args.extend(['-statistics', '1'])
+                if summaries:
+                    args.extend(['-summaries', _summary_arguments(summaries, self.species)])
 
-            # begin subprocess c simulation with timeout (default timeout=0 will not timeout)
-            with subprocess.Popen(args, stdout=subprocess.PIPE, start_new_session=True) as simulation:
-                return_code = 0
-                try:
-                    if timeout > 0:
-                        stdout, stderr = simulation.communicate(timeout=timeout)
-                    else:
+                # begin subprocess c simulation with timeout (default timeout=0 will not timeout)
+                with subprocess.Popen(args, stdout=subprocess.PIPE, start_new_session=True) as simulation:
+                    return_code = 0
+                    try:
+                        if timeout > 0:
+                            stdout, stderr = simulation.communicate(timeout=timeout)
+                        else:
+                            stdout, stderr = simulation.communicate()
+                        return_code = simulation.wait()
+                    except KeyboardInterrupt:
+                        os.killpg(simulation.pid, signal.SIGINT)  # send signal to the process group
                         stdout, stderr = simulation.communicate()
-                    return_code = simulation.wait()
-                except KeyboardInterrupt:
-                    os.killpg(simulation.pid, signal.SIGINT)  # send signal to the process group
-                    stdout, stderr = simulation.communicate()
-                    pause = True
-                    return_code = 33
-                except subprocess.TimeoutExpired:
+                        pause = True
+                        return_code = 33
+                    except subprocess.TimeoutExpired:
                         os.killpg(simulation.pid, signal.SIGINT)  # send signal to the process group
                         stdout, stderr = simulation.communicate()
                         pause = True
                         return_code = 33
 
-            # Decode from byte, split by comma into array
-            stdout = stdout.decode('utf-8').split(',')
-            # Parse/return results
+                # Parse/return results
+                if return_code in [0, 33] and summaries:
+                    # One row of summary values per trajectory, returned as is by Model.run().
+                    self.simulation_data = cutils._parse_summary_output(stdout, number_of_trajectories,
+                                                                        len(summaries))
+                    return self.simulation_data, return_code
+                elif return_code in [0, 33] and statistics_only:
+                    trajectory_base, counts, timeStopped = cutils._parse_statistics_output(
+                        stdout, number_of_trajectories, number_timesteps, len(self.species), pause=pause)
+                    # A paused simulation ends at the last timestep a trajectory reached.
+                    trajectory_base = trajectory_base[:, counts > 0]
+                    timeStopped = 0
+                elif return_code in [0, 33]:
+                    trajectory_base, timeStopped = cutils._parse_binary_output(stdout, number_of_trajectories,
+                                                                               number_timesteps,
+                                                                               len(model.listOfSpecies), pause=pause)
+                else:
+                    raise gillespyError.ExecutionError("Error encountered while running simulation C++ file:"
+                                                       "\nReturn code: {0}.\nError:\n{1}\n".
+                                                       format(simulation.returncode, simulation.stderr))
 
-            if return_code in [0, 33]:
-                trajectory_base, timeStopped = cutils._parse_binary_output(stdout, number_of_trajectories,
-                                                                           number_timesteps, len(model.listOfSpecies), stdout,
-                                                                           pause=pause)
-                if model.tspan[1] - model.tspan[0] == 1:
-                    timeStopped = int(timeStopped)
-                # Format results
-                self.simulation_data = []
-                for trajectory in range(number_of_trajectories):
-                    data = {'time': trajectory_base[trajectory, :, 0]}
-                    for i in range(len(self.species)):
-                        data[self.species[i]] = trajectory_base[trajectory, :, i + 1]
-                    self.simulation_data.append(data)
-            else:
-                raise gillespyError.ExecutionError("Error encountered while running simulation C++ file:"
-                                                   "\nReturn code: {0}.\nError:\n{1}\n".
-                                                   format(simulation.returncode, simulation.stderr))
+            if model.tspan[1] - model.tspan[0] == 1:
+                timeStopped = int(timeStopped)
+            # Format results
+            self.simulation_data = []
+            for trajectory in range(trajectory_base.shape[0]):
+                data = {'time': trajectory_base[trajectory, :, 0]}
+                for i in range(len(self.species)):
+                    data[self.species[i]] = trajectory_base[trajectory, :, i + 1]
+                self.simulation_data.append(data)
             if resume is not None or timeStopped != 0:
                 self.simulation_data = cutils.c_solver_resume(timeStopped, self.simulation_data, t, resume=resume)
 
@@ -0,0 +1,102 @@
+"""
+Summary statistics of trajectories, computed by the C++ engine as each trajectory finishes so that only the summaries
+of a simulation are returned, see the summaries argument of SSACSolver.run(). Each is computed over the output
+timesteps of a trajectory.
+"""
+from gillespy2.core.gillespyError import SimulationError
+
+
+class TrajectorySummary:
+    """
+    A summary statistic of the population of one species, created by the functions of this module.
+
+    :param kind: Statistic computed, a key of TrajectorySummary.KINDS.
+    :param species: Name of the species, or the Species, summarized.
+    :param comparison: For 'first_passage', the comparison of the population to the threshold, a key of
+    TrajectorySummary.COMPARISONS.
+    :param threshold: For 'first_passage', the threshold the population is compared to.
+    """
+    # Values of SummaryKind and Comparison in c_base/summaries.h.
+    KINDS = {'final': 0, 'time_average': 1, 'maximum': 2, 'minimum': 3, 'peak_time': 4, 'first_passage': 5}
+    COMPARISONS = {'>=': 0, '>': 1, '<=': 2, '<': 3}
+
+    def __init__(self, kind, species, comparison='>=', threshold=0):
+        if kind not in TrajectorySummary.KINDS:
+            raise SimulationError('Unknown summary "{0}", the summaries are: {1}.'.format(
+                kind, ', '.join(TrajectorySummary.KINDS)))
+        if comparison not in TrajectorySummary.COMPARISONS:
+            raise SimulationError('Unknown comparison "{0}", the comparisons are: {1}.'.format(
+                comparison, ', '.join(TrajectorySummary.COMPARISONS)))
+        self.kind = kind
+        self.species = species if isinstance(species, str) else species.name
+        self.comparison = comparison
+        self.threshold = float(threshold)
+
+    def __repr__(self):
+        if self.kind == 'first_passage':
+            return "first_passage('{0}', '{1}', {2})".format(self.species, self.comparison, self.threshold)
+        return "{0}('{1}')".format(self.kind, self.species)
+
+
+def final(species):
+    """
+    Population of species at the last timestep.
+    """
+    return TrajectorySummary('final', species)
+
+
+def time_average(species):
+    """
+    Average population of species over time, integrated by the trapezoidal rule.
+    """
+    return TrajectorySummary('time_average', species)
+
+
+def maximum(species):
+    """
+    Largest population of species.
+    """
+    return TrajectorySummary('maximum', species)
+
+
+def minimum(species):
+    """
+    Smallest population of species.
+    """
+    return TrajectorySummary('minimum', species)
+
+
+def peak_time(species):
+    """
+    Earliest time species is at its largest population.
+    """
+    return TrajectorySummary('peak_time', species)
+
+
+def first_passage(species, comparison, threshold):
+    """
+    Earliest time the population of species compares to threshold, NaN if it never does.
+
+    :param comparison: One of '>=', '>', '<=' or '<'.
+    """
+    return TrajectorySummary('first_passage', species, comparison, threshold)
+
+
+def _summary_arguments(summaries, species):
+    """
+    Writes summaries in the form read by read_summaries in c_base/summaries.h.
+
+    :param summaries: List of TrajectorySummary.
+    :param species: Ordered list of the species names of the simulation.
+    :return: String of a "kind species comparison threshold" group for every summary.
+    """
+    groups = []
+    for summary in summaries:
+        if not isinstance(summary, TrajectorySummary):
+            raise SimulationError('summaries must be TrajectorySummary objects, such as final("A"), not '
+                                  '{}.'.format(summary))
+        if summary.species not in species:
+            raise SimulationError('Summary {0} refers to a species not in the model.'.format(summary))
+        groups.append('{0} {1} {2} {3!r}'.format(TrajectorySummary.KINDS[summary.kind], species.index(summary.species),
+                                                 TrajectorySummary.COMPARISONS[summary.comparison], summary.threshold))
+    return ' '.join(groups)
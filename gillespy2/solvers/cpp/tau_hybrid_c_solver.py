@@ -0,0 +1,111 @@
+from gillespy2.core import gillespyError, log
+from gillespy2.solvers.utilities import solverutils as cutils
+from gillespy2.solvers.cpp.ssa_c_solver import SSACSolver
+import signal #for solver timeout implementation
+import os #for getting directories for C++ files
+import subprocess #For calling make and executing c solver
+
+
+class TauHybridCSolver(SSACSolver):
+    """
+    The tau-hybrid method of the TauHybridSolver, compiled to C++. Species are simulated according to their mode:
+    discrete species by stochastic reactions, continuous species by the reaction rate equations, and dynamic species
+    (the default) switched between the two each step by their switch_tol or switch_min. The rate equations, the rate
+    rules and the integrated propensities that fire the stochastic reactions are integrated together by the engine's
+    Rosenbrock method (c_base/hybrid.cpp), with events and assignment rules applied between steps.
+    """
+    name = "TauHybridCSolver"
+    template_file = 'HybridSimulationTemplate.cpp'
+
+    def __init__(self, model=None, output_directory=None, delete_directory=True, resume=None):
+        super(TauHybridCSolver, self).__init__(model, output_directory, delete_directory, resume)
+
+    def get_solver_settings(self):
+        """
+        :return: Tuple of strings, denoting all keyword argument for this solvers run() method.
+        """
+        return ('model', 't', 'number_of_trajectories', 'timeout', 'increment', 'seed', 'debug', 'profile',
+                'num_threads', 'tau_tol', 'rtol', 'atol')
+
+    def run(self=None, model=None, t=20, number_of_trajectories=1, timeout=0, increment=0.05, seed=None, debug=False,
+            profile=False, resume=None, num_threads=1, tau_tol=0.03, rtol=1e-6, atol=1e-9, **kwargs):
+        """
+        :param model: The model being simulated.
+        :param t: End time of the simulation.
+        :param number_of_trajectories: Number of trajectories to simulate.
+        :param timeout: If greater than 0, the simulation is stopped after timeout seconds.
+        :param increment: Time step of the output.
+        :param seed: The random seed for the simulation.
+        :param resume: Result of a previously run simulation, to be resumed.
+        :param num_threads: Number of threads trajectories are simulated on.
+        :param tau_tol: Relative error tolerance, the bound on the relative change in propensities over a step.
+        :param rtol: Relative error tolerance of the integration.
+        :param atol: Absolute error tolerance of the integration.
+        :return: Tuple of the list of trajectories and the return code.
+        """
+        pause = False
+        if resume is not None:
+            if t < resume['time'][-1]:
+                raise gillespyError.ExecutionError(
+                    "'t' must be greater than previous simulations end time, or set in the run() method as the "
+                    "simulations next end time")
+
+        if self is None or self.model is None:
+            self = TauHybridCSolver(model, resume=resume)
+
+        if len(kwargs) > 0:
+            for key in kwargs:
+                log.warning('Unsupported keyword argument to {0} solver: {1}'.format(self.name, key))
+
+        if seed is not None:
+            seed = int(seed)
+            if seed <= 0:
+                raise gillespyError.ModelError("seed must be a positive integer")
+        if not isinstance(num_threads, int) or num_threads < 1:
+            raise gillespyError.SimulationError("num_threads must be a positive integer")
+
+        if resume is not None:
+            t = abs(t - resume['time'][-1])
+        number_timesteps = int(round(t/increment + 1))
+
+        # Execute simulation.
+        args = [os.path.join(self.output_directory, 'UserSimulation'), '-trajectories', str(number_of_trajectories),
+                '-timesteps', str(number_timesteps), '-end', str(t), '-threads', str(num_threads),
+                '-tau_tol', str(tau_tol), '-rtol', str(rtol), '-atol', str(atol)]
+        if seed is not None:
+            args.extend(['-seed', str(seed)])
+
+        # begin subprocess c simulation with timeout (default timeout=0 will not timeout)
+        with subprocess.Popen(args, stdout=subprocess.PIPE, stderr=subprocess.PIPE, start_new_session=True) \
+                as simulation:
+            try:
+                if timeout > 0:
+                    stdout, stderr = simulation.communicate(timeout=timeout)
+                else:
+                    stdout, stderr = simulation.communicate()
+                return_code = simulation.wait()
+            except (KeyboardInterrupt, subprocess.TimeoutExpired):
+                os.killpg(simulation.pid, signal.SIGINT)  # send signal to the process group
+                stdout, stderr = simulation.communicate()
+                pause = True
+                return_code = 33
+
+        # Parse/return results
+        if return_code not in [0, 33]:
+            raise gillespyError.ExecutionError("Error encountered while running simulation C++ file:"
+                                               "\nReturn code: {0}.\nError:\n{1}\n".
+                                               format(return_code, stderr.decode('utf-8')))
+        trajectory_base, timeStopped = cutils._parse_binary_output(stdout, number_of_trajectories, number_timesteps,
+                                                                   len(self.species), pause=pause)
+
+        # Format results
+        self.simulation_data = []
+        for trajectory in range(number_of_trajectories):
+            data = {'time': trajectory_base[trajectory, :, 0]}
+            for i in range(len(self.species)):
+                data[self.species[i]] = trajectory_base[trajectory, :, i + 1]
+            self.simulation_data.append(data)
+        if resume is not None or timeStopped != 0:
+            self.simulation_data = cutils.c_solver_resume(timeStopped, self.simulation_data, t, resume=resume)
+
+        return self.simulation_data, return_code
@@ -0,0 +1,35 @@
+from gillespy2.core import log
+from gillespy2.solvers.cpp.ssa_c_solver import SSACSolver
+
+
+class TauLeapingCSolver(SSACSolver):
+    """
+    A Tau Leaping Solver compiled to C++. It reuses the code generation and simulation of the SSACSolver, running the
+    engine's 'tau' algorithm: leaps are selected by the Cao, Gillespie and Petzold bound on the relative change in
+    propensities, reactions close to exhausting a reactant are fired one at a time, and leaps that would make a
+    population negative are rejected and retried with half the step size.
+    """
+    name = "TauLeapingCSolver"
+
+    def get_solver_settings(self):
+        """
+        :return: Tuple of strings, denoting all keyword argument for this solvers run() method.
+        """
+        return ('model', 't', 'number_of_trajectories', 'timeout', 'increment', 'seed', 'debug', 'profile',
+                'num_threads', 'tau_tol', 'statistics_only', 'summaries')
+
+    def run(self=None, model=None, t=20, number_of_trajectories=1, timeout=0,
+            increment=0.05, seed=None, debug=False, profile=False, resume=None, num_threads=1, tau_tol=0.03,
+            **kwargs):
+        """
+        :param tau_tol: Relative error tolerance, the bound on the relative change in propensities over a leap.
+        See SSACSolver.run() for the other arguments.
+        """
+        if 'algorithm' in kwargs:
+            log.warning('Unsupported keyword argument to {0} solver: algorithm'.format(TauLeapingCSolver.name))
+            del kwargs['algorithm']
+        if self is None or self.model is None:
+            self = TauLeapingCSolver(model, resume=resume)
+        return SSACSolver.run(self, model=model, t=t, number_of_trajectories=number_of_trajectories, timeout=timeout,
+                              increment=increment, seed=seed, debug=debug, profile=profile, resume=resume,
+                              num_threads=num_threads, algorithm='tau', tau_tol=tau_tol, **kwargs)
@@ -1,7 +1,9 @@
 import gillespy2
-from gillespy2.core import Model, Reaction, gillespyError, GillesPySolver, log
+from gillespy2.core import Model, Reaction, gillespyError, GillesPySolver, log, Results, Trajectory
 from gillespy2.solvers.utilities import solverutils as cutils
-import signal # for solver timeout implementation
+from gillespy2.solvers.cpp import build_cache
+from gillespy2.solvers.cpp.summaries import _summary_arguments
+import signal, time # for solver timeout implementation
 import os  #for getting directories for C++ files
 import shutil #for deleting/copying files
 import subprocess #For calling make and executing c solver
@@ -12,6 +14,9 @@ import numpy as np
 GILLESPY_PATH = os.path.dirname(inspect.getfile(gillespy2))
 GILLESPY_C_DIRECTORY = os.path.join(GILLESPY_PATH, 'solvers/cpp/c_base')
 MAKE_FILE = os.path.dirname(os.path.abspath(__file__))+'/c_base/makefile'
+# Header of a worker mode simulation request, see WorkerRequest in VariableSimulationTemplate.cpp.
+_WORKER_REQUEST = np.dtype([('number_trajectories', '<u4'), ('number_timesteps', '<u4'), ('number_threads', '<u4'),
+                            ('random_seed', '<i4'), ('end_time', '<f8'), ('algorithm', 'S16'), ('tau_tol', '<f8')])
 
 
 def _write_variables(outfile, model, reactions, species, parameters, parameter_mappings, resume=None):
@@ -27,7 +32,7 @@ def _write_variables(outfile, model, reactions, species, parameters, parameter_m
    """
 
     outfile.write("double V = {};\n".format(model.volume))
-    outfile.write("std :: string s_names[] = {")
+    outfile.write("const char* s_names[] = {")
     if len(species) > 0:
         # Write model species names.
         for i in range(len(species)-1):
@@ -54,7 +59,7 @@ def _write_variables(outfile, model, reactions, species, parameters, parameter_m
         outfile.write("};\n")
     if len(reactions) > 0:
         # Write reaction names
-        outfile.write("std :: string r_names[] = {")
+        outfile.write("const char* r_names[] = {")
         for i in range(len(reactions)-1):
             outfile.write('"{}", '.format(reactions[i]))
         outfile.write('"{}"'.format(reactions[-1]))
@@ -62,6 +67,7 @@ def _write_variables(outfile, model, reactions, species, parameters, parameter_m
     for param in parameters:
         if param != 'vol':
             outfile.write("double {0} = {1};\n".format(parameter_mappings[param], model.listOfParameters[param].value))
+    outfile.write("const unsigned int number_parameters = {};\n".format(len(parameters)))
 
 
 def _update_parameters(outfile, model, parameters, parameter_mappings):
@@ -72,6 +78,21 @@ def _update_parameters(outfile, model, parameters, parameter_mappings):
             outfile.write('       arg_stream >> V;\n')
 
 
+def _write_parameter_members(outfile, parameters, parameter_mappings):
+    # Members of PropensityFunction, initialized from the global values and shadowing them in its propensities.
+    for param in parameters:
+        name = parameter_mappings[param] if param != 'vol' else 'V'
+        outfile.write('  double {0} = ::{0};\n'.format(name))
+
+
+def _assign_parameters(outfile, parameters, parameter_mappings):
+    for i, param in enumerate(parameters):
+        if param != 'vol':
+            outfile.write('    {0} = parameters[{1}];\n'.format(parameter_mappings[param], i))
+        else:
+            outfile.write('    V = parameters[{}];\n'.format(i))
+
+
 def _write_propensity(outfile, model, species_mappings, parameter_mappings, reactions):
     for i in range(len(reactions)):
         # Write switch statement case for reaction
@@ -82,12 +103,13 @@ def _write_propensity(outfile, model, species_mappings, parameter_mappings, reac
 
 class VariableSSACSolver(GillesPySolver):
     name = "VariableSSACSolver"
-    def __init__(self, model=None, output_directory=None, delete_directory=True, resume=None):
+    def __init__(self, model=None, output_directory=None, delete_directory=True, resume=None, in_process=False):
         super(VariableSSACSolver, self).__init__()
         self.__compiled = False
         self.delete_directory = False
         self.model = model
         self.resume = resume
+        self.in_process = in_process
         if self.model is not None:
             # Create constant, ordered lists for reactions/species/
             self.species_mappings = self.model.sanitized_species_names()
@@ -118,6 +140,7 @@ class VariableSSACSolver(GillesPySolver):
             self.__compile()
         
     def __del__(self):
+        self.stop_worker()
         if self.delete_directory and os.path.isdir(self.output_directory):
             shutil.rmtree(self.output_directory)
         
@@ -141,47 +164,208 @@ class VariableSSACSolver(GillesPySolver):
                            cutils._write_reactions(outfile, self.model, self.reactions, self.species)
                         if line.startswith("PARAMETER_UPDATES"):
                             _update_parameters(outfile, self.model, self.parameters, self.parameter_mappings)
+                        if line.startswith("PARAMETER_MEMBERS"):
+                            _write_parameter_members(outfile, self.parameters, self.parameter_mappings)
+                        if line.startswith("FUNCTIONS"):
+                            cutils._write_functions(outfile, self.model)
+                        if line.startswith("RULES"):
+                            cutils._write_rules(outfile, self.model, self.species_mappings, self.parameter_mappings)
+                        if line.startswith("PARAMETER_ASSIGNMENTS"):
+                            _assign_parameters(outfile, self.parameters, self.parameter_mappings)
                     else:
                         outfile.write(line)
 
     def __compile(self):
-        # Use makefile.
         if self.resume:
             if self.resume[0].model != self.model:
                 raise gillespyError.ModelError('When resuming, one must not alter the model being resumed.')
-            else:
-                built = subprocess.run(
-                    ["make", "-C", self.output_directory, 'UserSimulation'],
-                    stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-        else:
-            try:
-                cleaned = subprocess.run(
-                    ["make", "-C", self.output_directory, '-f', MAKE_FILE,
-                     'cleanSimulation'],
-                    stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-                built = subprocess.run(
-                    ["make", "-C", self.output_directory, '-f', MAKE_FILE,
-                     'UserSimulation'], stdout=subprocess.PIPE,
-                    stderr=subprocess.PIPE)
-            except KeyboardInterrupt:
-                log.warning(
-                    "Solver has been interrupted during compile time, unexpected behavior may occur.")
+
+        # In process simulations are built as a shared library, loaded through ctypes.
+        target = 'UserSimulation.so' if self.in_process else 'UserSimulation'
+        simulation_file = os.path.join(self.output_directory, target)
+
+        # Reuse the simulation of an identical, previously compiled model.
+        cache_key = build_cache.cache_key(self.output_directory, target)
+        if build_cache.fetch(cache_key, simulation_file):
+            self.__compiled = True
+            if self.in_process:
+                self.__library = cutils._load_simulation_library(simulation_file)
+            return
+
+        # Use makefile, linking the prebuilt engine so only the generated model source is compiled.
+        make_args = ["make", "-C", self.output_directory, '-f', MAKE_FILE]
+        engine_library = build_cache.get_engine_library(MAKE_FILE)
+        if engine_library is not None:
+            make_args.append('ENGINE_LIB={}'.format(engine_library))
+        try:
+            cleaned = subprocess.run(make_args + ['cleanSimulation'], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+            built = subprocess.run(make_args + [target], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        except KeyboardInterrupt:
+            log.warning(
+                "Solver has been interrupted during compile time, unexpected behavior may occur.")
+            raise
 
         if built.returncode == 0:
             self.__compiled = True
+            build_cache.store(cache_key, simulation_file)
+            if self.in_process:
+                self.__library = cutils._load_simulation_library(simulation_file)
         else:
             raise gillespyError.BuildError("Error encountered while compiling file:\nReturn code: {0}."
                                            "\nError:\n{1}\n{2}\n".format(built.returncode, built.stdout.decode
             ('utf-8'),built.stderr.decode('utf-8')))
 
+    def __get_variable_values(self, model, variables, resume=None):
+        """
+        :return: Tuple of the initial population of each species and the value of each parameter, in the order the
+        compiled simulation expects them, with variables overriding the model's values.
+        """
+        populations = []
+        for species in self.species:
+            if species in variables:
+                populations.append(int(variables[species]))
+            elif resume is not None:
+                populations.append(int(resume[species][-1]))
+            else:
+                populations.append(int(model.listOfSpecies[species].initial_value))
+        parameter_values = []
+        for parameter in self.parameters:
+            if parameter in variables:
+                parameter_values.append(variables[parameter])
+            elif parameter == 'vol':
+                parameter_values.append(model.volume)
+            else:
+                parameter_values.append(model.listOfParameters[parameter].expression)
+        return populations, parameter_values
+
+    def __validate_variables(self, variables):
+        if not isinstance(variables, dict):
+            raise gillespyError.SimulationError(
+                'argument to variables must be a dictionary.')
+        for v in variables.keys():
+            if v not in self.species+self.parameters:
+                raise gillespyError.SimulationError('Argument to variable "{}" \
+                is not a valid variable.  Variables must be model species or parameters.'.format(v))
+
+    def __start_worker(self):
+        if getattr(self, '_VariableSSACSolver__worker', None) is None or self.__worker.poll() is not None:
+            self.__worker = subprocess.Popen([os.path.join(self.output_directory, 'UserSimulation'), '-worker'],
+                                             stdin=subprocess.PIPE, stdout=subprocess.PIPE, start_new_session=True)
+        return self.__worker
+
+    def stop_worker(self):
+        """
+        Stops the resident simulation process started by run_batch(), if any. It is started again when needed.
+        """
+        worker = getattr(self, '_VariableSSACSolver__worker', None)
+        if worker is not None:
+            self.__worker = None
+            try:
+                worker.stdin.close()
+                worker.wait(timeout=5)
+            except (OSError, subprocess.TimeoutExpired):
+                worker.kill()
+                worker.wait()
+            worker.stdout.close()
+
+    def __simulate_worker(self, populations, parameter_values, number_of_trajectories, number_timesteps, t, seed,
+                          num_threads, algorithm, tau_tol):
+        # Request layout read by serve_requests() in VariableSimulationTemplate.cpp.
+        worker = self.__start_worker()
+        header = np.array([(number_of_trajectories, number_timesteps, num_threads, seed, t, algorithm.encode('utf-8'),
+                            tau_tol)], dtype=_WORKER_REQUEST)
+        try:
+            worker.stdin.write(header.tobytes() + np.array(parameter_values, dtype='<f8').tobytes() +
+                               np.array(populations, dtype='<u4').tobytes())
+            worker.stdin.flush()
+            results_size = cutils._RESULTS_HEADER.itemsize + 8 * number_timesteps + \
+                4 * number_of_trajectories * number_timesteps * len(self.species)
+            results_buffer = worker.stdout.read(results_size)
+        except (OSError, KeyboardInterrupt):
+            # The worker is left in an unknown state, a new one is started for the next request.
+            self.stop_worker()
+            raise
+        if len(results_buffer) < results_size:
+            # The worker exited, _parse_binary_output reports the truncated results.
+            self.stop_worker()
+        trajectory_base, _ = cutils._parse_binary_output(results_buffer, number_of_trajectories, number_timesteps,
+                                                         len(self.species))
+        return trajectory_base
+
+    def run_batch(self, variables_list, t=None, number_of_trajectories=1, increment=None, seed=None, num_threads=1,
+                  algorithm='ssa', tau_tol=0.03):
+        """
+        Simulates the model once for every set of variables, keeping the compiled simulation resident between them.
+        Unless the solver was created with in_process=True, every set is sent to a single long lived simulation
+        process, avoiding a process start and command line per set.
+        :param variables_list: List of dictionaries of species initial values and parameter values, as passed to the
+        variables argument of run().
+        :param t: End time of each simulation, defaults to the end of the model's timespan.
+        :param number_of_trajectories: Number of trajectories simulated for each set of variables.
+        :param increment: Output time step, defaults to the model's timespan increment.
+        :param seed: Seed of the first simulation, the simulation of variables_list[i] is seeded with seed + i.
+        :param num_threads: Number of threads trajectories are simulated on.
+        :param algorithm: Simulation algorithm, as passed to run().
+        :param tau_tol: Relative error tolerance of the 'tau' algorithm, as passed to run().
+        :return: List of Results, one per set of variables.
+        """
+        if self.model is None or not self.__compiled:
+            raise gillespyError.SimulationError('run_batch() requires a VariableSSACSolver created with a model.')
+        if t is None:
+            t = self.model.tspan[-1]
+        if increment is None:
+            increment = self.model.tspan[-1] - self.model.tspan[-2]
+        if not isinstance(num_threads, int) or num_threads < 1:
+            raise gillespyError.SimulationError("num_threads must be a positive integer")
+        cutils._validate_cpp_algorithm(algorithm, self.model)
+        for variables in variables_list:
+            self.__validate_variables(variables)
+        if seed is None:
+            seed = int(time.time())
+
+        number_timesteps = int(round(t/increment + 1))
+        batch_results = []
+        for i, variables in enumerate(variables_list):
+            populations, parameter_values = self.__get_variable_values(self.model, variables)
+            try:
+                parameter_values = np.array(parameter_values, dtype=np.float64)
+            except ValueError as e:
+                raise gillespyError.SimulationError('Batch simulations require numeric parameter values: '
+                                                    '{}'.format(e))
+            if self.in_process:
+                trajectory_base, _, _ = cutils._run_simulation_library(
+                    self.__library, parameter_values, np.array(populations, dtype=np.uint32), number_of_trajectories,
+                    number_timesteps, t, len(self.species), seed + i, num_threads, algorithm=algorithm,
+                    tau_tol=tau_tol)
+            else:
+                trajectory_base = self.__simulate_worker(populations, parameter_values, number_of_trajectories,
+                                                         number_timesteps, t, seed + i, num_threads, algorithm,
+                                                         tau_tol)
+            trajectories = []
+            for trajectory in range(number_of_trajectories):
+                data = {'time': trajectory_base[trajectory, :, 0]}
+                for j in range(len(self.species)):
+                    data[self.species[j]] = trajectory_base[trajectory, :, j + 1]
+                trajectories.append(Trajectory(data=data, model=self.model, solver_name=self.name, rc=0))
+            batch_results.append(Results(trajectories))
+        return batch_results
+
     def get_solver_settings(self):
         """
         :return: Tuple of strings, denoting all keyword argument for this solvers run() method.
         """
-        return ('model', 't', 'number_of_trajectories', 'timeout', 'increment', 'seed', 'debug', 'profile', 'variables')
+        return ('model', 't', 'number_of_trajectories', 'timeout', 'increment', 'seed', 'debug', 'profile', 'variables',
+                'num_threads', 'algorithm', 'tau_tol', 'statistics_only', 'summaries')
 
     def run(self=None, model=None, t=20, number_of_trajectories=1, timeout=0,
-            increment=0.05, seed=None, debug=False, profile=False, variables={}, resume=None, **kwargs):
+            increment=0.05, seed=None, debug=False, profile=False, variables={}, resume=None, num_threads=1,
+            algorithm='ssa', tau_tol=0.03, statistics_only=False, summaries=None, **kwargs):
+        """
+        :param statistics_only: If True, only the mean, standard deviation, minimum and maximum of the trajectories
+        are returned, in place of the trajectories, see SSACSolver.run().
+        :param summaries: List of summaries of gillespy2.solvers.cpp.summaries, computed for every trajectory and
+        returned in place of the trajectories, see SSACSolver.run().
+        """
         pause = False
         if resume is not None:
             if t < resume['time'][-1]:
@@ -195,131 +379,111 @@ class VariableSSACSolver(GillesPySolver):
         if len(kwargs) > 0:
             for key in kwargs:
                 log.warning('Unsupported keyword argument to {0} solver: {1}'.format(self.name, key))
-        
-        unsupported_sbml_features = {
-                        'Rate Rules': len(model.listOfRateRules),
-                        'Assignment Rules': len(model.listOfAssignmentRules), 
-                        'Events': len(model.listOfEvents),
-                        'Function Definitions': len(model.listOfFunctionDefinitions)
-                        }
-        detected_features = []
-        for feature, count in unsupported_sbml_features.items():
-            if count:
-                detected_features.append(feature)
-
-        if len(detected_features):
-                raise gillespyError.ModelError(
-                'Could not run Model.  SBML Feature: {} not supported by SSACSolver.'.format(detected_features))
 
-        if not isinstance(variables, dict):
-            raise gillespyError.SimulationError(
-                'argument to variables must be a dictionary.')
-        for v in variables.keys():
-            if v not in self.species+self.parameters:
-                raise gillespyError.SimulationError('Argument to variable "{}" \
-                is not a valid variable.  Variables must be model species or parameters.'.format(v))
+
+        self.__validate_variables(variables)
 
         if self.__compiled:
-            populations = ''
-            parameter_values = ''
-            # Update Species Initial Values
-            for i in range(len(self.species) - 1):
-                if self.species[i] in variables:
-                    populations += '{} '.format(int(variables[self.species[i]]))
-                else:
-                    if resume is not None:
-                        populations += '{} '.format(int(resume[self.species[i]][-1]))
-                    else:
-                        populations += '{} '.format(int(model.listOfSpecies[self.species[i]].initial_value))
-            if self.species[-1] in variables:
-                populations += '{}'.format(int(variables[self.species[-1]]))
-            else:
-                if resume is not None:
-                    populations += '{} '.format(int(resume[self.species[-1]][-1]))
-                else:
-                    populations += '{}'.format(int(model.listOfSpecies[self.species[-1]].initial_value))
-            # Update Parameter Values
-            for i in range(len(self.parameters) - 1):
-                if self.parameters[i] in variables:
-                    parameter_values += '{} '.format(variables[self.parameters[i]])
-                else:
-                    if self.parameters[i] == 'vol':
-                        parameter_values += '{} '.format(model.volume)
-                    else:
-                        parameter_values += '{} '.format(model.listOfParameters[self.parameters[i]].expression)
-            if self.parameters[-1] in variables:
-                parameter_values += '{}'.format(variables[self.parameters[-1]])
-            else:
-                if self.parameters[-1] == 'vol':
-                    parameter_values += '{}'.format(model.volume)
-                else:
-                    parameter_values += '{}'.format(model.listOfParameters[self.parameters[-1]].expression)
+            populations, parameter_values = self.__get_variable_values(model, variables, resume)
             self.simulation_data = None
 
             if resume is not None:
                 t = abs(t - int(resume['time'][-1]))
 
             number_timesteps = int(round(t/increment + 1))
-            # Execute simulation.
-            args = [os.path.join(self.output_directory, 'UserSimulation'),
-                    '-trajectories', str(number_of_trajectories),
-                    '-timesteps', str(number_timesteps),
-                    '-end', str(t),
-                    '-initial_values', populations,
-                    '-parameters', parameter_values]
-            if seed is not None:
-                if isinstance(seed, int):
+            if seed is not None and not isinstance(seed, int):
+                seed = int(seed)
+                if seed <= 0:
+                    raise gillespyError.ModelError("seed must be a positive integer")
+            if not isinstance(num_threads, int) or num_threads < 1:
+                raise gillespyError.SimulationError("num_threads must be a positive integer")
+            cutils._validate_cpp_algorithm(algorithm, self.model)
+            if (statistics_only or summaries) and (self.in_process or resume is not None):
+                raise gillespyError.SimulationError("statistics_only and summaries are not supported by in process "
+                                                    "or resumed simulations")
+            if statistics_only and summaries:
+                raise gillespyError.SimulationError("statistics_only and summaries can not be combined")
+
+            if self.in_process:
+                # Simulate in this process, the library writes populations straight into a NumPy array.
+                try:
+                    parameter_values = np.array(parameter_values, dtype=np.float64)
+                except ValueError as e:
+                    raise gillespyError.SimulationError('In process simulations require numeric parameter values: '
+                                                        '{}'.format(e))
+                trajectory_base, timeStopped, return_code = cutils._run_simulation_library(
+                    self.__library, parameter_values, np.array(populations, dtype=np.uint32), number_of_trajectories,
+                    number_timesteps, t, len(self.species), seed, num_threads, timeout, algorithm, tau_tol)
+            else:
+                # Execute simulation.
+                args = [os.path.join(self.output_directory, 'UserSimulation'),
+                        '-trajectories', str(number_of_trajectories),
+                        '-timesteps', str(number_timesteps),
+                        '-end', str(t),
+                        '-initial_values', ' '.join(str(population) for population in populations),
+                        '-parameters', ' '.join(str(value) for value in parameter_values),
+                        '-threads', str(num_threads),
+                        '-algorithm', algorithm,
+                        '-tau_tol', str(tau_tol)]
+                if seed is not None:
                     args.append('-seed')
                     args.append(str(seed))
-                else:
-                    seed_int = int(seed)
-                    if seed_int > 0:
-                        args.append('-seed')
-                        args.append(str(seed_int))
-                    else:
-                        raise gillespyError.ModelError("seed must be a positive integer")
+                if statistics_only:
+                    args.extend(['-statistics', '1'])
+                if summaries:
+                    args.extend(['-summaries', _summary_arguments(summaries, self.species)])
 
-            # begin subprocess c simulation with timeout (default timeout=0 will not timeout)
-            with subprocess.Popen(args, stdout=subprocess.PIPE, start_new_session=True) as simulation:
-                try:
-                    if timeout > 0:
-                        stdout, stderr = simulation.communicate(timeout=timeout)
-                    else:
+                # begin subprocess c simulation with timeout (default timeout=0 will not timeout)
+                with subprocess.Popen(args, stdout=subprocess.PIPE, start_new_session=True) as simulation:
+                    try:
+                        if timeout > 0:
+                            stdout, stderr = simulation.communicate(timeout=timeout)
+                        else:
+                            stdout, stderr = simulation.communicate()
+                        return_code = simulation.wait()
+                    except KeyboardInterrupt:
+                        os.killpg(simulation.pid, signal.SIGINT)  # send signal to the process group
                         stdout, stderr = simulation.communicate()
-                    return_code = simulation.wait()
-                except KeyboardInterrupt:
-                    os.killpg(simulation.pid, signal.SIGINT)  # send signal to the process group
-                    stdout, stderr = simulation.communicate()
-                    pause = True
-                    return_code = 33
-                except subprocess.TimeoutExpired:
-                    os.killpg(simulation.pid, signal.SIGINT)  # send signal to the process group
-                    stdout, stderr = simulation.communicate()
-                    pause = True
-                    return_code = 33
-            # Decode from byte, split by comma into array
-            stdout = stdout.decode('utf-8').split(',')
-            # Parse/return results.
-
-            if return_code in [0, 33]:
-                trajectory_base, timeStopped = cutils._parse_binary_output(stdout, number_of_trajectories,
-                                                                           number_timesteps, len(model.listOfSpecies),
-                                                                           stdout, pause=pause)
-                if model.tspan[1] - model.tspan[0] == 1:
-                    timeStopped = int(timeStopped)
-
-                # Format results
-                self.simulation_data = []
-                for trajectory in range(number_of_trajectories):
-                    data = {'time': trajectory_base[trajectory, :, 0]}
-                    for i in range(len(self.species)):
-                        data[self.species[i]] = trajectory_base[trajectory, :, i + 1]
-
-                    self.simulation_data.append(data)
-            else:
-                raise gillespyError.ExecutionError("Error encountered while running simulation C++ file:"
-                                                   "\nReturn code: {0}.\nError:\n{1}\n".
-                                                   format(simulation.returncode, simulation.stderr))
+                        pause = True
+                        return_code = 33
+                    except subprocess.TimeoutExpired:
+                        os.killpg(simulation.pid, signal.SIGINT)  # send signal to the process group
+                        stdout, stderr = simulation.communicate()
+                        pause = True
+                        return_code = 33
+
+                # Parse/return results.
+                if return_code in [0, 33] and summaries:
+                    # One row of summary values per trajectory, returned as is by Model.run().
+                    self.simulation_data = cutils._parse_summary_output(stdout, number_of_trajectories,
+                                                                        len(summaries))
+                    return self.simulation_data, return_code
+                elif return_code in [0, 33] and statistics_only:
+                    trajectory_base, counts, timeStopped = cutils._parse_statistics_output(
+                        stdout, number_of_trajectories, number_timesteps, len(self.species), pause=pause)
+                    # A paused simulation ends at the last timestep a trajectory reached.
+                    trajectory_base = trajectory_base[:, counts > 0]
+                    timeStopped = 0
+                elif return_code in [0, 33]:
+                    trajectory_base, timeStopped = cutils._parse_binary_output(stdout, number_of_trajectories,
+                                                                               number_timesteps,
+                                                                               len(model.listOfSpecies), pause=pause)
+                else:
+                    raise gillespyError.ExecutionError("Error encountered while running simulation C++ file:"
+                                                       "\nReturn code: {0}.\nError:\n{1}\n".
+                                                       format(simulation.returncode, simulation.stderr))
+
+            if model.tspan[1] - model.tspan[0] == 1:
+                timeStopped = int(timeStopped)
+
+            # Format results
+            self.simulation_data = []
+            for trajectory in range(trajectory_base.shape[0]):
+                data = {'time': trajectory_base[trajectory, :, 0]}
+                for i in range(len(self.species)):
+                    data[self.species[i]] = trajectory_base[trajectory, :, i + 1]
+
+                self.simulation_data.append(data)
 
             if resume is not None or timeStopped != 0:
                 self.simulation_data = cutils.c_solver_resume(timeStopped, self.simulation_data, t, resume=resume)
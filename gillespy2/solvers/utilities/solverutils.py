@@ -1,8 +1,12 @@
 import os  # for getting directories for C++ files
 import shutil  # for deleting/copying files
 import ast  # for dependency graphing
+import ctypes  # for in process C++ simulations
+import threading  # for interrupting in process C++ simulations
+import time  # for seeding in process C++ simulations
 import numpy as np
 from gillespy2.core import log, Species
+from gillespy2.core.gillespyError import ExecutionError, ModelError, SimulationError, SpeciesError
 
 
 """
@@ -53,32 +57,393 @@ def _write_propensity(outfile, model, species_mappings, parameter_mappings, reac
                                                                                         parameter_mappings)))
 
 
+def _write_ode_rates(outfile, model, species_mappings, parameter_mappings, reactions):
+    """
+    Writes the deterministic rate of every reaction to a cpp user simulation template, for the ODECSolver.
+    :param outfile: File where the rates will be written to
+    :param model: Model used to access species, reactions
+    :param species_mappings: Sanitized species names
+    :param parameter_mappings: Sanitized parameter names
+    :param reactions: Names of reactions
+    """
+    for i in range(len(reactions)):
+        outfile.write("""
+        case {0}:
+            return {1};
+        """.format(i, model.listOfReactions[reactions[i]].sanitized_propensity_function(species_mappings,
+                                                                                        parameter_mappings,
+                                                                                        ode=True)))
+
+
+def _write_rate_derivatives(outfile, model, species_mappings, parameter_mappings, reactions):
+    """
+    Writes the partial derivatives of the rates of mass-action reactions with respect to their reactants, for the
+    ODECSolver. They are written in the order of the reactant tables of _write_reactions, the Jacobian of the other
+    reactions is computed numerically.
+    :param outfile: File where the derivatives will be written to
+    :param model: Model used to access species, reactions
+    :param species_mappings: Sanitized species names
+    :param parameter_mappings: Sanitized parameter names
+    :param reactions: Names of reactions
+    """
+    species_index = {name: j for j, name in enumerate(species_mappings.values())}
+    for i in range(len(reactions)):
+        reaction = model.listOfReactions[reactions[i]]
+        if not reaction.massaction or reaction.marate is None or reaction.marate.name not in parameter_mappings:
+            continue
+        # The rate is k * prod(S[j]**n_j), reactants are sorted like the reactant tables.
+        reactants = sorted(((species_mappings[reactant.name], int(count))
+                            for reactant, count in reaction.reactants.items()),
+                           key=lambda reactant: species_index[reactant[0]])
+        outfile.write("""
+        case {0}:""".format(i))
+        for j, (name, count) in enumerate(reactants):
+            factors = [str(count), parameter_mappings[reaction.marate.name]] + [name] * (count - 1)
+            for other, other_count in reactants[:j] + reactants[j+1:]:
+                factors.extend([other] * other_count)
+            outfile.write("""
+            derivatives[{0}] = {1};""".format(j, '*'.join(factors)))
+        outfile.write("""
+            return true;
+        """)
+
+
+# SpeciesMode values of c_base/hybrid.h, species without a mode are dynamic.
+_SPECIES_MODES = {'discrete': 0, 'continuous': 1, 'dynamic': 2, None: 2}
+
+
+def _write_species_modes(outfile, model, species):
+    """
+    Writes the mode, switching tolerance and switching minimum of every species to a cpp user simulation template, for
+    the TauHybridCSolver. Constant species are written as fixed, reactions do not change them.
+    :param outfile: File where the modes will be written to
+    :param model: Model used to access species
+    :param species: List of sanitized species names
+    """
+    modes = []
+    for name in species:
+        mode = model.listOfSpecies[name].mode
+        if mode not in _SPECIES_MODES:
+            raise SpeciesError('Species mode must be either \'continuous\', \'dynamic\', \'discrete\', or '
+                               '\'unspecified(default to dynamic for TauHybridCSolver)\'.')
+        modes.append(_SPECIES_MODES[mode])
+    outfile.write("const int species_modes[] = {{{}}};\n".format(', '.join(str(mode) for mode in modes)))
+    outfile.write("const double switch_tols[] = {{{}}};\n".format(
+        ', '.join(repr(float(model.listOfSpecies[name].switch_tol)) for name in species)))
+    outfile.write("const double switch_mins[] = {{{}}};\n".format(
+        ', '.join(repr(float(model.listOfSpecies[name].switch_min)) for name in species)))
+    outfile.write("const bool fixed_species[] = {{{}}};\n".format(
+        ', '.join('true' if model.listOfSpecies[name].constant else 'false' for name in species)))
+
+
+# C++ equivalents of the math functions expressions may call, see _cpp_expression.
+_CPP_FUNCTIONS = {'abs': 'fabs', 'fabs': 'fabs', 'exp': 'exp', 'log': 'log', 'log10': 'log10', 'log2': 'log2',
+                  'sqrt': 'sqrt', 'pow': 'pow', 'sin': 'sin', 'cos': 'cos', 'tan': 'tan', 'asin': 'asin',
+                  'acos': 'acos', 'atan': 'atan', 'atan2': 'atan2', 'sinh': 'sinh', 'cosh': 'cosh', 'tanh': 'tanh',
+                  'asinh': 'asinh', 'acosh': 'acosh', 'atanh': 'atanh', 'floor': 'floor', 'ceil': 'ceil',
+                  'trunc': 'trunc', 'fmod': 'fmod', 'hypot': 'hypot', 'copysign': 'copysign', 'erf': 'erf',
+                  'erfc': 'erfc', 'gamma': 'tgamma', 'lgamma': 'lgamma', 'min': 'fmin', 'max': 'fmax'}
+_CPP_CONSTANTS = {'pi': 'M_PI', 'e': 'M_E', 'inf': 'INFINITY', 'True': 'true', 'False': 'false'}
+_CPP_OPERATORS = {ast.Add: '+', ast.Sub: '-', ast.Mult: '*', ast.Div: '/', ast.USub: '-', ast.UAdd: '+',
+                  ast.Not: '!', ast.And: '&&', ast.Or: '||', ast.Eq: '==', ast.NotEq: '!=', ast.Lt: '<',
+                  ast.LtE: '<=', ast.Gt: '>', ast.GtE: '>='}
+
+
+def _cpp_expression(expression, names, functions=()):
+    """
+    Translates a Python expression of a model, such as an event trigger or a rule formula, to C++.
+    :param expression: The expression, evaluable in the namespace of the model with the math module.
+    :param names: Dictionary of the C++ expression each name of the model is replaced with.
+    :param functions: Names of the model's function definitions, which the expression may call.
+    :return: The C++ expression, evaluated in double precision.
+    """
+    def translate(node):
+        if isinstance(node, ast.Expression):
+            return translate(node.body)
+        if isinstance(node, ast.Constant) and isinstance(node.value, (bool, int, float)):
+            if isinstance(node.value, bool):
+                return _CPP_CONSTANTS[str(node.value)]
+            return repr(float(node.value)) if np.isfinite(node.value) else 'INFINITY'
+        if isinstance(node, ast.Name):
+            if node.id in names:
+                return names[node.id]
+            if node.id in _CPP_CONSTANTS:
+                return _CPP_CONSTANTS[node.id]
+            raise ModelError('Unknown name "{0}" in expression "{1}".'.format(node.id, expression))
+        if isinstance(node, ast.BinOp):
+            left, right = translate(node.left), translate(node.right)
+            if isinstance(node.op, ast.Pow):
+                return 'pow({0}, {1})'.format(left, right)
+            if isinstance(node.op, ast.Mod):
+                return 'fmod({0}, {1})'.format(left, right)
+            if isinstance(node.op, ast.FloorDiv):
+                return 'floor({0} / {1})'.format(left, right)
+            if type(node.op) in _CPP_OPERATORS:
+                return '({0} {1} {2})'.format(left, _CPP_OPERATORS[type(node.op)], right)
+        elif isinstance(node, ast.UnaryOp) and type(node.op) in _CPP_OPERATORS:
+            return '({0}{1})'.format(_CPP_OPERATORS[type(node.op)], translate(node.operand))
+        elif isinstance(node, ast.BoolOp):
+            operator = ' {} '.format(_CPP_OPERATORS[type(node.op)])
+            return '({})'.format(operator.join(translate(value) for value in node.values))
+        elif isinstance(node, ast.Compare) and all(type(op) in _CPP_OPERATORS for op in node.ops):
+            # Chained comparisons compare each operand with the next.
+            operands = [translate(node.left)] + [translate(comparator) for comparator in node.comparators]
+            comparisons = ['({0} {1} {2})'.format(operands[i], _CPP_OPERATORS[type(op)], operands[i + 1])
+                           for i, op in enumerate(node.ops)]
+            return comparisons[0] if len(comparisons) == 1 else '({})'.format(' && '.join(comparisons))
+        elif isinstance(node, ast.IfExp):
+            return '({0} ? {1} : {2})'.format(translate(node.test), translate(node.body), translate(node.orelse))
+        elif isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and not node.keywords:
+            arguments = [translate(argument) for argument in node.args]
+            name = node.func.id
+            if name in functions:
+                return '{0}({1})'.format(name, ', '.join(arguments))
+            if name == 'log' and len(arguments) == 2:
+                return '(log({0}) / log({1}))'.format(*arguments)
+            if name == 'factorial' and len(arguments) == 1:
+                return 'tgamma({} + 1)'.format(arguments[0])
+            if name in ('min', 'max') and len(arguments) > 2:
+                nested = arguments[-1]
+                for argument in reversed(arguments[:-1]):
+                    nested = '{0}({1}, {2})'.format(_CPP_FUNCTIONS[name], argument, nested)
+                return nested
+            if name in _CPP_FUNCTIONS:
+                return '{0}({1})'.format(_CPP_FUNCTIONS[name], ', '.join(arguments))
+            raise ModelError('Unknown function "{0}" in expression "{1}".'.format(name, expression))
+        raise ModelError('Expression "{}" is not supported by the C++ solvers.'.format(expression))
+
+    try:
+        tree = ast.parse(str(expression).strip(), mode='eval')
+    except SyntaxError as e:
+        raise ModelError('Invalid expression "{0}": {1}'.format(expression, e))
+    return translate(tree)
+
+
+def _rule_variable(variable, species_mappings, parameter_mappings):
+    # Variables of events and rules may be given as Species, Parameters or their names.
+    name = getattr(variable, 'name', variable)
+    if name in species_mappings:
+        return species_mappings[name]
+    if name in parameter_mappings:
+        return parameter_mappings[name]
+    raise ModelError('Unknown variable "{}" of an event or rule.'.format(name))
+
+
+def _write_switch(outfile, signature, cases, default):
+    # Writes a member function switching on its event argument, cases maps event numbers to lists of statements.
+    outfile.write('  {}{{\n    switch(event){{\n'.format(signature))
+    for number, statements in cases.items():
+        outfile.write('    case {}:\n'.format(number))
+        for statement in statements:
+            outfile.write('      {}\n'.format(statement))
+    outfile.write('    default:\n      {}\n    }}\n  }}\n'.format(default))
+
+
+def _write_functions(outfile, model):
+    """
+    Writes a model's function definitions as C++ functions, for the SSACSolvers.
+    :param outfile: File where the functions will be written to
+    :param model: Model used to access function definitions
+    """
+    functions = list(model.listOfFunctionDefinitions.keys())
+    for function in model.listOfFunctionDefinitions.values():
+        # Function bodies only read their arguments. Like the Python solvers, which only fail when it is called, a
+        # function that cannot be evaluated does not stop the simulation unless an expression uses it.
+        try:
+            body = _cpp_expression(function.function_string, {arg: arg for arg in function.args}, functions)
+        except ModelError as e:
+            log.warning('Function Definition {0} is not available to the C++ solvers: {1}'.format(function.name, e))
+            continue
+        outfile.write('static double {0}({1}){{\n  return {2};\n}}\n'.format(
+            function.name, ', '.join('double {}'.format(arg) for arg in function.args), body))
+
+
+def _write_rules(outfile, model, species_mappings, parameter_mappings, shadow_parameters=False):
+    """
+    Writes the IModelRules members of a model's events, assignment rules and rate rules into the PropensityFunction of
+    a cpp user simulation template, for the SSACSolvers. Nothing is written if the model has none of them.
+    :param outfile: File where the rules will be written to
+    :param model: Model used to access events and rules
+    :param species_mappings: Sanitized species names
+    :param parameter_mappings: Sanitized parameter names
+    :param shadow_parameters: If True, members are written for the parameters events and rules assign, shadowing the
+    constant global parameters of the template.
+    """
+    events = list(model.listOfEvents.values())
+    assignment_rules = list(model.listOfAssignmentRules.values())
+    rate_rules = list(model.listOfRateRules.values())
+    if not (events or assignment_rules or rate_rules):
+        return
+    names = dict(parameter_mappings)
+    names.update(species_mappings)
+    names.setdefault('t', 't')
+    functions = list(model.listOfFunctionDefinitions.keys())
+
+    def expression(text):
+        return _cpp_expression(text, names, functions)
+
+    def variable(target):
+        return _rule_variable(target, species_mappings, parameter_mappings)
+
+    outfile.write('  IModelRules* rules(){\n    return this;\n  }\n\n')
+    if shadow_parameters:
+        targets = [variable(a.variable) for event in events for a in event.assignments]
+        targets += [variable(rule.variable) for rule in assignment_rules + rate_rules]
+        for name in sorted(set(target for target in targets if target in parameter_mappings.values())):
+            outfile.write('  double {0} = ::{0};\n'.format(name))
+
+    if events:
+        outfile.write('  unsigned int number_events() const{{\n    return {};\n  }}\n'.format(len(events)))
+        outfile.write('  unsigned int max_assignments() const{{\n    return {};\n  }}\n'.format(
+            max(len(event.assignments) for event in events)))
+        _write_switch(outfile, 'bool trigger(unsigned int event, double t, const double* S)',
+                      {i: ['return {};'.format(expression(event.trigger.expression))]
+                       for i, event in enumerate(events)}, 'return false;')
+        _write_switch(outfile, 'bool initial_value(unsigned int event) const',
+                      {i: ['return true;'] for i, event in enumerate(events) if event.trigger.value},
+                      'return false;')
+        _write_switch(outfile, 'bool persistent(unsigned int event) const',
+                      {i: ['return false;'] for i, event in enumerate(events) if not event.trigger.persistent},
+                      'return true;')
+        _write_switch(outfile, 'bool use_values_from_trigger_time(unsigned int event) const',
+                      {i: ['return true;'] for i, event in enumerate(events) if event.use_values_from_trigger_time},
+                      'return false;')
+        _write_switch(outfile, 'double delay(unsigned int event, double t, const double* S)',
+                      {i: ['return {};'.format(expression(event.delay))]
+                       for i, event in enumerate(events) if event.delay is not None}, 'return -1;')
+        _write_switch(outfile, 'double priority(unsigned int event, double t, const double* S)',
+                      {i: ['return {};'.format(expression(event.priority))] for i, event in enumerate(events)},
+                      'return 0;')
+        _write_switch(outfile,
+                      'void evaluate_assignments(unsigned int event, double t, const double* S, double* values)',
+                      {i: ['values[{0}] = {1};'.format(j, expression(a.expression))
+                           for j, a in enumerate(event.assignments)] + ['return;']
+                       for i, event in enumerate(events)}, 'return;')
+        _write_switch(outfile, 'void assign(unsigned int event, const double* values, double* S)',
+                      {i: ['{0} = values[{1}];'.format(variable(a.variable), j)
+                           for j, a in enumerate(event.assignments)] + ['return;']
+                       for i, event in enumerate(events)}, 'return;')
+
+    if assignment_rules:
+        outfile.write('  void apply_assignment_rules(double t, double* S){\n')
+        for rule in assignment_rules:
+            outfile.write('    {0} = {1};\n'.format(variable(rule.variable), expression(rule.formula)))
+        outfile.write('  }\n')
+
+    if rate_rules:
+        outfile.write('  unsigned int number_rate_rules() const{{\n    return {};\n  }}\n'.format(len(rate_rules)))
+        outfile.write('  void get_rate_rule_variables(const double* S, double* y){\n')
+        for i, rule in enumerate(rate_rules):
+            outfile.write('    y[{0}] = {1};\n'.format(i, variable(rule.variable)))
+        outfile.write('  }\n  void set_rate_rule_variables(const double* y, double* S){\n')
+        for i, rule in enumerate(rate_rules):
+            outfile.write('    {0} = y[{1}];\n'.format(variable(rule.variable), i))
+        outfile.write('  }\n  void rate_rule_derivatives(double t, const double* S, double* dydt){\n')
+        for i, rule in enumerate(rate_rules):
+            outfile.write('    dydt[{0}] = {1};\n'.format(i, expression(rule.formula)))
+        outfile.write('  }\n')
+
+
 def _write_reactions(outfile, model, reactions, species):
-    customrxns = {}
+    # Species changes are written as tables applied by a loop, a statement per change makes large models slow to
+    # compile.
+    species_index = {name: j for j, name in enumerate(species)}
+    change_entries = []
     for i in range(len(reactions)):
         reaction = model.listOfReactions[reactions[i]]
-        if reaction.type == 'customized':
-            customrxns[i] = species_parse(model, reaction.propensity_function)
-        for j in range(len(species)):
-            change = (reaction.products.get(model.listOfSpecies[species[j]], 0)) - (reaction.reactants.get
-                                                                                    (model.listOfSpecies[species[j]], 0)
-                                                                                    )
-            if change != 0:
-                outfile.write("model.reactions[{0}].species_change[{1}] = {2};\n".format(i, j, change))
-
-    for i in customrxns.keys():
-        for j in range(len(reactions)):
-            if i == j:
-                continue
-            if any(elem in customrxns[i] for elem in list(model.listOfReactions[reactions[j]].reactants)) or \
-                    any(elem in customrxns[i] for elem in list(model.listOfReactions[reactions[j]].products)):
-                outfile.write("model.reactions[{0}].affected_reactions.push_back({1});\n".format(i, j))
+        # Only the species a reaction consumes or produces can change.
+        changes = {}
+        for reactant, stoichiometry in reaction.reactants.items():
+            changes[species_index[reactant.name]] = changes.get(species_index[reactant.name], 0) - stoichiometry
+        for product, stoichiometry in reaction.products.items():
+            changes[species_index[product.name]] = changes.get(species_index[product.name], 0) + stoichiometry
+        change_entries.extend((i, j, changes[j]) for j in sorted(changes) if changes[j] != 0)
+    if change_entries:
+        outfile.write("static const unsigned int change_reactions[] = {{{}}};\n".format(
+            ', '.join(str(entry[0]) for entry in change_entries)))
+        outfile.write("static const unsigned int change_species[] = {{{}}};\n".format(
+            ', '.join(str(entry[1]) for entry in change_entries)))
+        outfile.write("static const int change_values[] = {{{}}};\n".format(
+            ', '.join(str(int(entry[2])) for entry in change_entries)))
+        outfile.write("for(unsigned int i = 0; i < {}; i++){{\n".format(len(change_entries)))
+        outfile.write("  model.reactions[change_reactions[i]].species_change[change_species[i]] = change_values[i];\n")
+        outfile.write("}\n")
+
+    # Reactants, read by tau-leaping.
+    reactant_offsets = [0]
+    reactant_entries = []
+    for name in reactions:
+        reaction = model.listOfReactions[name]
+        reactant_entries.extend(sorted((species_index[reactant.name], int(count))
+                                       for reactant, count in reaction.reactants.items()))
+        reactant_offsets.append(len(reactant_entries))
+    outfile.write("static const unsigned int reactant_offsets[] = {{{}}};\n".format(
+        ', '.join(str(offset) for offset in reactant_offsets)))
+    if reactant_entries:
+        outfile.write("static const unsigned int reactant_species[] = {{{}}};\n".format(
+            ', '.join(str(entry[0]) for entry in reactant_entries)))
+        outfile.write("static const unsigned int reactant_counts[] = {{{}}};\n".format(
+            ', '.join(str(entry[1]) for entry in reactant_entries)))
+        outfile.write("model.set_reactants(reactant_offsets, reactant_species, reactant_counts);\n")
+    else:
+        outfile.write("model.set_reactants(reactant_offsets, nullptr, nullptr);\n")
+
+    offsets, indices = _get_reaction_dependencies(model, reactions)
+    outfile.write("static const unsigned int affected_offsets[] = {{{}}};\n".format(
+        ', '.join(str(offset) for offset in offsets)))
+    if indices:
+        outfile.write("static const unsigned int affected_reactions[] = {{{}}};\n".format(
+            ', '.join(str(index) for index in indices)))
+        outfile.write("model.set_affected_reactions(affected_offsets, affected_reactions);\n")
+    else:
+        outfile.write("model.set_affected_reactions(affected_offsets, nullptr);\n")
 
 
-def _parse_binary_output(results_buffer, number_of_trajectories, number_timesteps, number_species, data, pause=False):
+def _get_reaction_dependencies(model, reactions):
+    """
+    Builds the reaction dependency graph used by the C++ solvers: firing a reaction changes the propensity of every
+    reaction whose propensity function reads a species the fired reaction changes.
+    :param model: The model that is being simulated
+    :param reactions: List of names of a models reactions, in simulation order
+    :return: Tuple of the graph in compressed sparse row form, offsets (len(reactions) + 1 entries) and indices, the
+    reactions affected by reaction i being indices[offsets[i]:offsets[i+1]], in ascending order.
+    """
+    # Species -> indices of the reactions whose propensity reads it.
+    readers = {}
+    for i, name in enumerate(reactions):
+        for species in species_parse(model, model.listOfReactions[name].propensity_function):
+            readers.setdefault(species.name, set()).add(i)
+
+    offsets = [0]
+    indices = []
+    for name in reactions:
+        reaction = model.listOfReactions[name]
+        affected = set()
+        for species in set(reaction.reactants) | set(reaction.products):
+            if reaction.products.get(species, 0) != reaction.reactants.get(species, 0):
+                affected.update(readers.get(species.name, ()))
+        indices.extend(sorted(affected))
+        offsets.append(len(indices))
+    return offsets, indices
+
+
+# Layout of the header written by Simulation::output_results_buffer, see c_base/model.cpp.
+_RESULTS_MAGIC = 0x32595047
+# Magic of results with double populations, written by the ODECSolver.
+_CONTINUOUS_RESULTS_MAGIC = 0x33595047
+# Magic of ensemble statistics, written in place of the populations when simulating with statistics_only.
+_STATISTICS_RESULTS_MAGIC = 0x34595047
+# Magic of trajectory summaries, written in place of the populations when simulating with summaries.
+_SUMMARY_RESULTS_MAGIC = 0x35595047
+_RESULTS_HEADER = np.dtype([('magic', '<u4'), ('number_trajectories', '<u4'), ('number_timesteps', '<u4'),
+                            ('number_species', '<u4'), ('stop_time', '<f8')])
+
+
+def _parse_binary_output(results_buffer, number_of_trajectories, number_timesteps, number_species, pause=False):
     """
     This function reads binary output from a CPP simulation
     :param results_buffer: stdout of the CPP simulation ran
+    :type results_buffer: bytes
     :param number_of_trajectories: Total number of trajectories for a simulation
     :type number_of_trajectories: int
     :param number_timesteps: How many steps for a given simulation
@@ -89,22 +454,234 @@ def _parse_binary_output(results_buffer, number_of_trajectories, number_timestep
     :return: Trajectories for a simulation, and time that simulation was stopped, if sent a keyboardinterrupt or
     timeout.
     """
-    trajectory_base = np.empty((number_of_trajectories, number_timesteps, number_species+1))
-
-    # Timestopped is added to the end of the data, when a simulation completes or is paused
+    header_size = _RESULTS_HEADER.itemsize
+    timeline_size = 8 * number_timesteps
+    body_count = number_of_trajectories * number_timesteps * number_species
+    if len(results_buffer) < header_size:
+        raise ExecutionError('Simulation output is truncated: expected {0} bytes, received {1}.'.format(
+            header_size + timeline_size + 4 * body_count, len(results_buffer)))
+
+    header = np.frombuffer(results_buffer, dtype=_RESULTS_HEADER, count=1)[0]
+    if header['magic'] == _RESULTS_MAGIC:
+        population_type = '<u4'
+    elif header['magic'] == _CONTINUOUS_RESULTS_MAGIC:
+        population_type = '<f8'
+    else:
+        raise ExecutionError('Simulation output is not in the GillesPy2 binary results format.')
+    body_size = np.dtype(population_type).itemsize * body_count
+    if len(results_buffer) < header_size + timeline_size + body_size:
+        raise ExecutionError('Simulation output is truncated: expected {0} bytes, received {1}.'.format(
+            header_size + timeline_size + body_size, len(results_buffer)))
+    if (header['number_trajectories'], header['number_timesteps'], header['number_species']) != \
+            (number_of_trajectories, number_timesteps, number_species):
+        raise ExecutionError('Simulation output shape {0} does not match the requested shape {1}.'.format(
+            (header['number_trajectories'], header['number_timesteps'], header['number_species']),
+            (number_of_trajectories, number_timesteps, number_species)))
+
+    timeline = np.frombuffer(results_buffer, dtype='<f8', count=number_timesteps, offset=header_size)
+    populations = np.frombuffer(results_buffer, dtype=population_type, count=body_count,
+                                offset=header_size + timeline_size)
+    populations = populations.reshape((number_of_trajectories, number_timesteps, number_species))
+    trajectory_base = _build_trajectory_base(timeline, populations)
+
+    # Timestopped is sent in the header, it is only meaningful when a simulation was paused
     if pause:
-        timeStopped = int(data[-1])
-        data.pop()
+        timeStopped = float(header['stop_time'])
     else:
         timeStopped = 0
-    for t in range(number_of_trajectories):
-        for i in range(number_timesteps*(number_species+1)):
-            index = i + (number_timesteps*(number_species+1)*t)
-            trajectory_base[t][i//(number_species+1)][i % (number_species+1)] = data[index]
 
     return trajectory_base, timeStopped
 
 
+def _parse_statistics_output(results_buffer, number_of_trajectories, number_timesteps, number_species, pause=False):
+    """
+    This function reads the binary ensemble statistics of a CPP simulation ran with statistics_only, see
+    Simulation::output_results_buffer in c_base/model.cpp.
+    :param results_buffer: stdout of the CPP simulation ran
+    :type results_buffer: bytes
+    :param number_of_trajectories: Total number of trajectories for a simulation
+    :param number_timesteps: How many steps for a given simulation
+    :param number_species: Total number of species in a model
+    :param pause: Whether or not a model was paused.
+    :return: Trajectory base of shape (4, number_timesteps, number_species+1) holding the mean, standard deviation,
+    minimum and maximum of the populations, the number of trajectories that reached each timestep, and the time that
+    simulation was stopped, 0 unless paused.
+    """
+    header_size = _RESULTS_HEADER.itemsize
+    timeline_size = 8 * number_timesteps
+    counts_size = 4 * number_timesteps
+    expected_size = header_size + timeline_size + counts_size + 4 * 8 * number_timesteps * number_species
+    if len(results_buffer) < expected_size:
+        raise ExecutionError('Simulation output is truncated: expected {0} bytes, received {1}.'.format(
+            expected_size, len(results_buffer)))
+    header = np.frombuffer(results_buffer, dtype=_RESULTS_HEADER, count=1)[0]
+    if header['magic'] != _STATISTICS_RESULTS_MAGIC:
+        raise ExecutionError('Simulation output is not in the GillesPy2 binary statistics format.')
+    if (header['number_trajectories'], header['number_timesteps'], header['number_species']) != \
+            (number_of_trajectories, number_timesteps, number_species):
+        raise ExecutionError('Simulation output shape {0} does not match the requested shape {1}.'.format(
+            (header['number_trajectories'], header['number_timesteps'], header['number_species']),
+            (number_of_trajectories, number_timesteps, number_species)))
+
+    timeline = np.frombuffer(results_buffer, dtype='<f8', count=number_timesteps, offset=header_size)
+    counts = np.frombuffer(results_buffer, dtype='<u4', count=number_timesteps, offset=header_size + timeline_size)
+    statistics = np.frombuffer(results_buffer, dtype='<f8', count=4 * number_timesteps * number_species,
+                               offset=header_size + timeline_size + counts_size)
+    statistics = statistics.reshape((4, number_timesteps, number_species))
+    trajectory_base = _build_trajectory_base(timeline, statistics)
+    # The engine writes the variance, reported as the standard deviation like Results.stddev_ensemble.
+    trajectory_base[1, :, 1:] = np.sqrt(trajectory_base[1, :, 1:])
+
+    timeStopped = float(header['stop_time']) if pause else 0
+    return trajectory_base, counts, timeStopped
+
+
+def _parse_summary_output(results_buffer, number_of_trajectories, number_summaries):
+    """
+    This function reads the binary trajectory summaries of a CPP simulation ran with summaries, see
+    Simulation::output_results_buffer in c_base/model.cpp.
+    :param results_buffer: stdout of the CPP simulation ran
+    :type results_buffer: bytes
+    :param number_of_trajectories: Total number of trajectories for a simulation
+    :param number_summaries: Number of summaries of every trajectory
+    :return: Array of shape (number_of_trajectories, number_summaries), NaN for the trajectories a pause left
+    unstarted.
+    """
+    header_size = _RESULTS_HEADER.itemsize
+    expected_size = header_size + 8 * number_of_trajectories * number_summaries
+    if len(results_buffer) < expected_size:
+        raise ExecutionError('Simulation output is truncated: expected {0} bytes, received {1}.'.format(
+            expected_size, len(results_buffer)))
+    header = np.frombuffer(results_buffer, dtype=_RESULTS_HEADER, count=1)[0]
+    if header['magic'] != _SUMMARY_RESULTS_MAGIC:
+        raise ExecutionError('Simulation output is not in the GillesPy2 binary summaries format.')
+    if (header['number_trajectories'], header['number_species']) != (number_of_trajectories, number_summaries):
+        raise ExecutionError('Simulation output shape {0} does not match the requested shape {1}.'.format(
+            (header['number_trajectories'], header['number_species']), (number_of_trajectories, number_summaries)))
+    summary_values = np.frombuffer(results_buffer, dtype='<f8', count=number_of_trajectories * number_summaries,
+                                   offset=header_size)
+    return summary_values.reshape((number_of_trajectories, number_summaries)).copy()
+
+
+def _build_trajectory_base(timeline, populations):
+    """
+    Combines a timeline and the populations of every trajectory into a trajectory base.
+    :param timeline: Output times, of shape (number_timesteps,).
+    :param populations: Species populations, of shape (number_of_trajectories, number_timesteps, number_species).
+    :return: Array of shape (number_of_trajectories, number_timesteps, number_species+1), time in the first column.
+    """
+    number_of_trajectories, number_timesteps, number_species = populations.shape
+    # Both copies below are broadcast by NumPy straight from their source into the only array allocated here.
+    trajectory_base = np.empty((number_of_trajectories, number_timesteps, number_species+1))
+    trajectory_base[:, :, 0] = timeline
+    trajectory_base[:, :, 1:] = populations
+    return trajectory_base
+
+
+# Simulation algorithms of the C++ solvers, see run_algorithm in c_base/ssa.cpp.
+_CPP_ALGORITHMS = ('ssa', 'nrm', 'ssa_cr', 'sdm', 'ssa_tree', 'tau')
+
+
+def _validate_cpp_algorithm(algorithm, model=None):
+    if algorithm not in _CPP_ALGORITHMS:
+        raise SimulationError('Unknown algorithm "{0}", the C++ solvers support: {1}.'.format(
+            algorithm, ', '.join(_CPP_ALGORITHMS)))
+    # Only the direct method fires events and applies rules, see ssa_rules in c_base/rules.h.
+    if model is not None and algorithm != 'ssa' and (len(model.listOfEvents) or len(model.listOfAssignmentRules)
+                                                     or len(model.listOfRateRules)):
+        raise SimulationError('Models with Events, Assignment Rules or Rate Rules can only be simulated with the '
+                              '"ssa" algorithm of the C++ solvers, not "{}".'.format(algorithm))
+
+
+def _load_simulation_library(library_file):
+    """
+    Loads a simulation built as a shared library (the UserSimulation.so make target).
+    :param library_file: Path of the shared library.
+    :return: The loaded library, with the signatures of its simulate() and interrupt flag functions declared.
+    """
+    try:
+        library = ctypes.CDLL(library_file)
+    except OSError as e:
+        raise ExecutionError('Unable to load simulation library {0}: {1}'.format(library_file, e))
+    library.simulate.argtypes = [ctypes.POINTER(ctypes.c_double), ctypes.POINTER(ctypes.c_uint), ctypes.c_uint,
+                                 ctypes.c_uint, ctypes.POINTER(ctypes.c_double), ctypes.c_int, ctypes.c_uint,
+                                 ctypes.c_char_p, ctypes.c_double, ctypes.POINTER(ctypes.c_uint),
+                                 ctypes.POINTER(ctypes.c_double),
+                                 ctypes.c_void_p]
+    library.simulate.restype = ctypes.c_int
+    library.new_interrupt_flag.argtypes = []
+    library.new_interrupt_flag.restype = ctypes.c_void_p
+    library.delete_interrupt_flag.argtypes = [ctypes.c_void_p]
+    library.delete_interrupt_flag.restype = None
+    library.interrupt.argtypes = [ctypes.c_void_p]
+    library.interrupt.restype = None
+    return library
+
+
+def _run_simulation_library(library, parameters, initial_state, number_of_trajectories, number_timesteps, t,
+                            number_species, seed=None, num_threads=1, timeout=0, algorithm='ssa', tau_tol=0.03):
+    """
+    Runs a simulation loaded by _load_simulation_library in this process. The simulation writes its populations
+    straight into a NumPy array, so no output is serialized or parsed. Every call has its own interrupt flag, so
+    calls on the same library may run concurrently from different threads.
+    :param library: The loaded simulation library.
+    :param parameters: float64 array of parameter values, or None to use the compiled values.
+    :param initial_state: uint32 array of initial species populations, or None to use the compiled values.
+    :param number_of_trajectories: Total number of trajectories for a simulation
+    :param number_timesteps: How many steps for a given simulation
+    :param t: End time of the simulation.
+    :param number_species: Total number of species in a model
+    :param seed: Random seed, seeded from the clock when None.
+    :param num_threads: Number of threads trajectories are simulated on.
+    :param timeout: Seconds after which the simulation is interrupted, 0 to never time out.
+    :param algorithm: Name of the simulation algorithm, one of _CPP_ALGORITHMS.
+    :param tau_tol: Relative error tolerance of the 'tau' algorithm.
+    :return: Tuple of the trajectory base, the time the simulation was stopped (0 unless it was interrupted by a
+    KeyboardInterrupt or timeout), and the return code of the simulation.
+    """
+    timeline = np.linspace(0, t, number_timesteps)
+    # Zeroed, trajectories left unstarted by an interrupt are never written.
+    populations = np.zeros((number_of_trajectories, number_timesteps, number_species), dtype=np.uint32)
+    stop_time = ctypes.c_double(0)
+    if seed is None:
+        seed = int(time.time())
+    result = {}
+    interrupt_flag = library.new_interrupt_flag()
+
+    def simulate():
+        result['return_code'] = library.simulate(
+            None if parameters is None else parameters.ctypes.data_as(ctypes.POINTER(ctypes.c_double)),
+            None if initial_state is None else initial_state.ctypes.data_as(ctypes.POINTER(ctypes.c_uint)),
+            number_of_trajectories, number_timesteps, timeline.ctypes.data_as(ctypes.POINTER(ctypes.c_double)),
+            seed, num_threads, algorithm.encode('utf-8'), tau_tol,
+            populations.ctypes.data_as(ctypes.POINTER(ctypes.c_uint)),
+            ctypes.byref(stop_time), interrupt_flag)
+
+    # ctypes releases the GIL for the call, the simulation runs on its own thread so this one can keep handling
+    # KeyboardInterrupt and the timeout.
+    simulation = threading.Thread(target=simulate)
+    simulation.start()
+    try:
+        simulation.join(timeout if timeout > 0 else None)
+        if simulation.is_alive():
+            library.interrupt(interrupt_flag)
+            simulation.join()
+    except KeyboardInterrupt:
+        library.interrupt(interrupt_flag)
+        simulation.join()
+    finally:
+        # A second KeyboardInterrupt can leave the call running, and reading the flag.
+        if not simulation.is_alive():
+            library.delete_interrupt_flag(interrupt_flag)
+
+    return_code = result.get('return_code', 33)
+    if return_code not in [0, 33]:
+        raise ExecutionError('Error encountered while running simulation library:\nReturn code: {0}.\n'.format(
+            return_code))
+    trajectory_base = _build_trajectory_base(timeline, populations)
+    timeStopped = stop_time.value if return_code == 33 else 0
+    return trajectory_base, timeStopped, return_code
+
 
 def c_solver_resume(timeStopped, simulation_data, t, resume=None):
     """
@@ -0,0 +1,78 @@
+import sys
+sys.path.insert(0, '..')
+
+import argparse
+from timeit import default_timer as timer
+import numpy as np
+import example_models
+from gillespy2 import Model, Species, Parameter, Reaction, SSACSolver
+from gillespy2.solvers.utilities import solverutils as cutils
+
+# The models listed by gillespy2.solvers.cpp.example_models that simulate in a few seconds, defined in the test tree.
+MODELS = ['Example', 'Dimerization', 'MichaelisMenten', 'ToggleSwitch', 'Schlogl', 'VilarOscillator',
+          'Tyson2StateOscillator', 'Trichloroethylene']
+
+
+def synthetic_model(number_reactions=10000, number_species=1000, seed=0):
+    """
+    Builds a large, loosely coupled network of first order conversions between randomly chosen species, with rates
+    spanning four orders of magnitude.
+    :param number_reactions: the number of reactions in the model.
+    :param number_species: the number of species in the model.
+    :param seed: seed used to generate the network.
+    :return: the model.
+    """
+    random = np.random.RandomState(seed)
+    model = Model(name='Synthetic{}'.format(number_reactions))
+    species = [Species(name='S{}'.format(i), initial_value=100) for i in range(number_species)]
+    model.add_species(species)
+    rates = [Parameter(name='k{}'.format(i), expression=10 ** random.uniform(-3, 1)) for i in range(number_reactions)]
+    model.add_parameter(rates)
+    reactions = []
+    for i in range(number_reactions):
+        source, target = random.choice(number_species, 2, replace=False)
+        reactions.append(Reaction(name='r{}'.format(i), reactants={species[source]: 1},
+                                  products={species[target]: 1}, rate=rates[i]))
+    model.add_reaction(reactions)
+    model.timespan(np.linspace(0, 0.1, 11))
+    return model
+
+
+def simulation_times(model, algorithms, number_of_trajectories=1, number_trials=3):
+    """
+    Times the simulation of a model by each C++ engine, excluding compilation.
+    :param model: the model to simulate.
+    :param algorithms: the names of the engines to time.
+    :param number_of_trajectories: the number of trajectories of each simulation.
+    :param number_trials: the number of times each engine is timed, the fastest trial is reported.
+    :return: Dictionary of the fastest simulation time, in seconds, of each engine.
+    """
+    solver = SSACSolver(model)
+    times = {}
+    for algorithm in algorithms:
+        trials = []
+        for _ in range(number_trials):
+            start = timer()
+            model.run(solver=solver, number_of_trajectories=number_of_trajectories, seed=1, algorithm=algorithm)
+            trials.append(timer() - start)
+        times[algorithm] = min(trials)
+    return times
+
+
+parser = argparse.ArgumentParser(description='Benchmark the C++ simulation engines against the direct method.')
+parser.add_argument('-n', '--trajectories', type=int, default=10)
+parser.add_argument('-r', '--reactions', type=int, default=10000,
+                    help='number of reactions of the synthetic model, 0 to skip it')
+parser.add_argument('--trials', type=int, default=3)
+parser.add_argument('-a', '--algorithms', nargs='+', default=list(cutils._CPP_ALGORITHMS),
+                    choices=cutils._CPP_ALGORITHMS)
+
+if __name__ == '__main__':
+    args = parser.parse_args()
+    models = [(name, getattr(example_models, name)()) for name in MODELS]
+    if args.reactions > 0:
+        models.append(('Synthetic ({} reactions)'.format(args.reactions), synthetic_model(args.reactions)))
+    print(('{:<32}' + '{:>12}' * len(args.algorithms)).format('Model (s)', *args.algorithms))
+    for name, model in models:
+        times = simulation_times(model, args.algorithms, args.trajectories, args.trials)
+        print(('{:<32}' + '{:>12.3f}' * len(args.algorithms)).format(name, *[times[a] for a in args.algorithms]))
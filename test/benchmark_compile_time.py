@@ -0,0 +1,53 @@
+import sys
+sys.path.insert(0, '..')
+
+import os
+import argparse
+from timeit import default_timer as timer
+from unittest import mock
+import numpy as np
+import example_models
+from gillespy2 import SSACSolver
+from gillespy2.solvers.cpp import build_cache
+
+# The models listed by gillespy2.solvers.cpp.example_models, defined in the test tree.
+MODELS = ['Trichloroethylene', 'LacOperon', 'Schlogl', 'MichaelisMenten', 'ToggleSwitch', 'Example',
+          'Tyson2StateOscillator', 'Oregonator', 'VilarOscillator', 'Dimerization']
+
+
+def compile_times(model, number_trials=3):
+    """
+    Times the construction (code generation and compilation) of an SSACSolver, with the simulation cache disabled.
+    :param model: the model to compile.
+    :param number_trials: the number of times each build is timed, the fastest trial is reported.
+    :return: Tuple of the fastest build time, in seconds, when the engine is compiled with the model and when the
+    prebuilt engine library is linked.
+    """
+    times = {False: [], True: []}
+    with mock.patch.dict(os.environ, {'GILLESPY2_CACHE_SIZE': '0'}):
+        # Build the engine library once up front, as an installation would.
+        build_cache.get_engine_library(os.path.join(build_cache.GILLESPY_C_DIRECTORY, 'makefile'))
+        for _ in range(number_trials):
+            for prebuilt in (False, True):
+                with mock.patch.object(build_cache, 'get_engine_library',
+                                       wraps=build_cache.get_engine_library if prebuilt else lambda make_file: None):
+                    start = timer()
+                    SSACSolver(model)
+                    times[prebuilt].append(timer() - start)
+    return min(times[False]), min(times[True])
+
+
+parser = argparse.ArgumentParser(description='Benchmark C++ model compile time with and without the prebuilt engine.')
+parser.add_argument('--trials', type=int, default=3)
+
+if __name__ == '__main__':
+    args = parser.parse_args()
+    print('{0:<24}{1:>12}{2:>12}{3:>10}'.format('Model', 'Full (s)', 'Model (s)', 'Speedup'))
+    full_times, model_times = [], []
+    for name in MODELS:
+        full, model_only = compile_times(getattr(example_models, name)(), args.trials)
+        full_times.append(full)
+        model_times.append(model_only)
+        print('{0:<24}{1:>12.2f}{2:>12.2f}{3:>10.1f}'.format(name, full, model_only, full / model_only))
+    print('{0:<24}{1:>12.2f}{2:>12.2f}{3:>10.1f}'.format('Mean', np.mean(full_times), np.mean(model_times),
+                                                          np.mean(full_times) / np.mean(model_times)))
@@ -0,0 +1,56 @@
+import sys
+sys.path.insert(0, '..')
+
+import argparse
+from timeit import default_timer as timer
+import numpy as np
+from gillespy2.solvers.utilities import solverutils as cutils
+
+
+def make_results_buffer(number_of_trajectories, number_timesteps, number_species, seed=0):
+    """
+    Builds a results buffer in the binary format written by the C++ simulations.
+    :param number_of_trajectories: the number of trajectories in the buffer.
+    :param number_timesteps: the number of output timepoints of each trajectory.
+    :param number_species: the number of species in the model.
+    :param seed: seed used to generate the random populations.
+    :return: the buffer as bytes.
+    """
+    header = np.array([(cutils._RESULTS_MAGIC, number_of_trajectories, number_timesteps, number_species, 0)],
+                      dtype=cutils._RESULTS_HEADER)
+    timeline = np.linspace(0, number_timesteps - 1, number_timesteps, dtype='<f8')
+    populations = np.random.RandomState(seed).randint(0, 1000, size=number_of_trajectories * number_timesteps *
+                                                      number_species).astype('<u4')
+    return header.tobytes() + timeline.tobytes() + populations.tobytes()
+
+
+def parse_throughput(number_of_trajectories, number_timesteps, number_species, number_trials=5):
+    """
+    Measures how fast _parse_binary_output turns a results buffer into the trajectory array.
+    :param number_of_trajectories: the number of trajectories in the buffer.
+    :param number_timesteps: the number of output timepoints of each trajectory.
+    :param number_species: the number of species in the model.
+    :param number_trials: the number of times to parse the buffer, the fastest trial is reported.
+    :return: Tuple of the buffer size in MB, and the best parse throughput in MB/s.
+    """
+    buffer = make_results_buffer(number_of_trajectories, number_timesteps, number_species)
+    times = []
+    for _ in range(number_trials):
+        start = timer()
+        cutils._parse_binary_output(buffer, number_of_trajectories, number_timesteps, number_species)
+        times.append(timer() - start)
+    megabytes = len(buffer) / 1e6
+    return megabytes, megabytes / min(times)
+
+
+parser = argparse.ArgumentParser(description='Benchmark parsing of C++ solver output.')
+parser.add_argument('-n', '--trajectories', type=int, default=1000)
+parser.add_argument('-t', '--timesteps', type=int, default=4001)
+parser.add_argument('-s', '--species', type=int, default=20)
+parser.add_argument('--trials', type=int, default=5)
+
+if __name__ == '__main__':
+    args = parser.parse_args()
+    size, throughput = parse_throughput(args.trajectories, args.timesteps, args.species, args.trials)
+    print('Parsed {0:.1f} MB of solver output ({1} x {2} x {3}) at {4:.1f} MB/s'.format(
+        size, args.trajectories, args.timesteps, args.species, throughput))
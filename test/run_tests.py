@@ -20,10 +20,15 @@ if __name__ == '__main__':
     import test_empty_model
     import test_model
     import test_ode_solver
+    import test_ode_c_solver
     import test_hybrid_solver
     import test_simple_model
     import test_ssa_c_solver
     import test_variable_ssa_c_solver
+    import test_tau_leaping_c_solver
+    import test_c_solver_rules
+    import test_tau_hybrid_c_solver
+    import test_c_solver_summaries
     import test_SBML
     import test_example_models
     import test_all_solvers
@@ -32,15 +37,21 @@ if __name__ == '__main__':
     import test_propensity_parser
     import test_pause_resume
     import test_check_cpp_support
+    import test_build_cache
 
     modules = [
         test_empty_model,
         test_model,
         test_ode_solver,
+        test_ode_c_solver,
         test_hybrid_solver,
         test_simple_model,
         test_ssa_c_solver,
         test_variable_ssa_c_solver,
+        test_tau_leaping_c_solver,
+        test_c_solver_rules,
+        test_tau_hybrid_c_solver,
+        test_c_solver_summaries,
         test_pause_resume,
         test_SBML,
         test_example_models,
@@ -48,7 +59,8 @@ if __name__ == '__main__':
         test_sys_init,
         test_results,
         test_propensity_parser,
-        test_check_cpp_support
+        test_check_cpp_support,
+        test_build_cache
     ]
 
     for module in modules:
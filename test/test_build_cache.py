@@ -0,0 +1,107 @@
+import unittest
+import os
+import tempfile
+import subprocess
+from unittest import mock
+from example_models import Example
+from gillespy2 import SSACSolver, VariableSSACSolver
+from gillespy2.solvers.cpp import build_cache, clear_cache
+
+
+class TestBuildCache(unittest.TestCase):
+    def setUp(self):
+        self.cache_directory = tempfile.TemporaryDirectory()
+        self.environment = mock.patch.dict(os.environ, {'GILLESPY2_CACHE_DIR': self.cache_directory.name})
+        self.environment.start()
+
+    def tearDown(self):
+        self.environment.stop()
+        self.cache_directory.cleanup()
+
+    def cached_simulations(self):
+        return [name for name in os.listdir(self.cache_directory.name)
+                if os.path.isfile(os.path.join(self.cache_directory.name, name))]
+
+    def test_identical_models_share_simulation(self):
+        model = Example()
+        solver = SSACSolver(model)
+        self.assertEqual(len(self.cached_simulations()), 1)
+        with mock.patch('subprocess.run') as make:
+            cached_solver = SSACSolver(Example())
+            make.assert_not_called()
+        results = Example().run(solver=cached_solver)
+        self.assertEqual(results['Sp'][0], model.listOfSpecies['Sp'].initial_value)
+
+    def test_different_models_are_cached_separately(self):
+        model = Example()
+        SSACSolver(model)
+        model.listOfSpecies['Sp'].initial_value = 50
+        SSACSolver(model)
+        VariableSSACSolver(model)
+        self.assertEqual(len(self.cached_simulations()), 3)
+
+    def test_eviction(self):
+        model = Example()
+        SSACSolver(model)
+        oldest = self.cached_simulations()[0]
+        os.utime(os.path.join(self.cache_directory.name, oldest), (0, 0))
+        model.listOfSpecies['Sp'].initial_value = 50
+        SSACSolver(model)
+        size = os.path.getsize(os.path.join(self.cache_directory.name, oldest))
+        build_cache.evict(max_size=size)
+        self.assertEqual(len(self.cached_simulations()), 1)
+        self.assertNotIn(oldest, self.cached_simulations())
+
+    def test_disabled_cache(self):
+        with mock.patch.dict(os.environ, {'GILLESPY2_CACHE_SIZE': '0'}):
+            solver = SSACSolver(Example())
+            results = Example().run(solver=solver)
+        # Neither the simulation nor the engine library is written to the cache.
+        self.assertEqual(os.listdir(self.cache_directory.name), [])
+        self.assertEqual(results['Sp'][0], Example().listOfSpecies['Sp'].initial_value)
+
+    def test_engine_library_prebuilt(self):
+        solver = SSACSolver(Example())
+        engine_directory = os.path.join(self.cache_directory.name, 'engine')
+        self.assertEqual(len([name for name in os.listdir(engine_directory) if name.endswith('.a')]), 1)
+        self.assertFalse(os.path.exists(os.path.join(solver.output_directory, 'ssa.o')))
+        self.assertTrue(os.path.exists(os.path.join(solver.output_directory, 'UserSimulation.o')))
+
+    def test_engine_library_eviction(self):
+        SSACSolver(Example())
+        engine_directory = os.path.join(self.cache_directory.name, 'engine')
+        engine_library = os.path.join(engine_directory, os.listdir(engine_directory)[0])
+        stale_library = os.path.join(engine_directory, '0' * 64 + '.a')
+        with open(stale_library, 'wb') as stale:
+            stale.write(b'\0' * 1024)
+        os.utime(stale_library, (0, 0))
+        # Engine libraries count towards the size limit, the stale one is the least recently used entry.
+        simulation = os.path.join(self.cache_directory.name, self.cached_simulations()[0])
+        build_cache.evict(max_size=os.path.getsize(engine_library) + os.path.getsize(simulation))
+        self.assertFalse(os.path.exists(stale_library))
+        self.assertTrue(os.path.exists(engine_library))
+        build_cache.evict(max_size=0, keep=engine_library)
+        self.assertEqual(os.listdir(engine_directory), [os.path.basename(engine_library)])
+
+    def test_interrupted_compile(self):
+        run = subprocess.run
+
+        def interrupt_simulation_build(args, **kwargs):
+            if args[0] == 'make' and args[-1].startswith('UserSimulation'):
+                raise KeyboardInterrupt
+            return run(args, **kwargs)
+        for solver in [SSACSolver, VariableSSACSolver]:
+            with self.subTest(solver=solver.name):
+                with mock.patch('subprocess.run', side_effect=interrupt_simulation_build):
+                    with self.assertRaises(KeyboardInterrupt):
+                        solver(Example())
+        self.assertEqual(self.cached_simulations(), [])
+
+    def test_clear_cache(self):
+        SSACSolver(Example())
+        clear_cache()
+        self.assertFalse(os.path.exists(self.cache_directory.name))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,150 @@
+import unittest
+import numpy as np
+from gillespy2.core import Model, Species, Parameter, Reaction, Event, EventTrigger, EventAssignment, \
+    AssignmentRule, RateRule, FunctionDefinition
+from gillespy2.core.gillespyError import ModelError, SimulationError
+from gillespy2.solvers.utilities import solverutils as cutils
+from gillespy2 import SSACSolver, VariableSSACSolver, TauLeapingCSolver
+
+
+def create_decay_model(name, initial_value=100, rate=0.5):
+    model = Model(name=name)
+    A = Species(name='A', initial_value=initial_value)
+    B = Species(name='B', initial_value=0)
+    model.add_species([A, B])
+    k = Parameter(name='k', expression=rate)
+    model.add_parameter(k)
+    model.add_reaction(Reaction(name='decay', reactants={A: 1}, products={}, rate=k))
+    model.timespan(np.linspace(0, 10, 11))
+    return model
+
+
+class TestCSolverRules(unittest.TestCase):
+    solvers = [SSACSolver, VariableSSACSolver]
+
+    def test_time_event(self):
+        model = create_decay_model('TimeEvent')
+        model.add_event(Event(name='refill', trigger=EventTrigger(expression='t >= 5'),
+                              assignments=[EventAssignment(variable='A', expression='1000'),
+                                           EventAssignment(variable='k', expression='0')]))
+        for solver in self.solvers:
+            with self.subTest(solver=solver.name):
+                results = model.run(solver=solver, number_of_trajectories=3, seed=1)
+                for trajectory in results:
+                    self.assertLess(trajectory['A'][4], 100)
+                    self.assertTrue(np.all(trajectory['A'][5:] == 1000))
+
+    def test_species_event(self):
+        model = create_decay_model('SpeciesEvent')
+        model.add_event(Event(name='mark', trigger=EventTrigger(expression='A <= 50'),
+                              assignments=EventAssignment(variable='B', expression='B + 1')))
+        results = model.run(solver=SSACSolver, number_of_trajectories=5, seed=2)
+        for trajectory in results:
+            crossed = trajectory['A'] <= 50
+            self.assertTrue(np.all(trajectory['B'][crossed] == 1))
+            self.assertTrue(np.all(trajectory['B'][~crossed] == 0))
+
+    def test_delayed_event(self):
+        model = create_decay_model('DelayedEvent', rate=0)
+        model.add_parameter(Parameter(name='p', expression=0))
+        # The assignment is evaluated when the event is triggered, before the change to p.
+        model.add_event(Event(name='delayed', trigger=EventTrigger(expression='t >= 2', persistent=True),
+                              delay='3', use_values_from_trigger_time=True,
+                              assignments=EventAssignment(variable='A', expression='A + 10 * p')))
+        model.add_event(Event(name='change', trigger=EventTrigger(expression='t >= 3'),
+                              assignments=EventAssignment(variable='p', expression='5')))
+        results = model.run(solver=SSACSolver, seed=1)
+        self.assertTrue(np.all(results['A'][:5] == 100))
+        self.assertTrue(np.all(results['A'][5:] == 100))
+        model.listOfEvents['delayed'].use_values_from_trigger_time = False
+        results = model.run(solver=SSACSolver, seed=1)
+        self.assertTrue(np.all(results['A'][5:] == 150))
+
+    def test_cancelled_event(self):
+        model = create_decay_model('CancelledEvent', rate=0)
+        model.add_event(Event(name='delayed', trigger=EventTrigger(expression='t >= 2 and t < 3', persistent=False),
+                              delay='3', assignments=EventAssignment(variable='A', expression='0')))
+        results = model.run(solver=SSACSolver, seed=1)
+        self.assertTrue(np.all(results['A'] == 100))
+        model.listOfEvents['delayed'].trigger.persistent = True
+        results = model.run(solver=SSACSolver, seed=1)
+        self.assertTrue(np.all(results['A'][5:] == 0))
+
+    def test_event_priority(self):
+        model = create_decay_model('EventPriority', rate=0)
+        model.add_event([Event(name='first', trigger=EventTrigger(expression='t >= 1'), priority='2',
+                               assignments=EventAssignment(variable='B', expression='10')),
+                         Event(name='second', trigger=EventTrigger(expression='t >= 1'), priority='1',
+                               assignments=EventAssignment(variable='B', expression='20'))])
+        results = model.run(solver=SSACSolver, seed=1)
+        self.assertEqual(results['B'][-1], 20)
+
+    def test_assignment_rule(self):
+        model = create_decay_model('AssignmentRule')
+        model.add_function_definition(FunctionDefinition(name='twice', function='2 * x', args=['x']))
+        model.add_assignment_rule(AssignmentRule(name='rule', variable='B', formula='twice(A) + t'))
+        for solver in self.solvers:
+            with self.subTest(solver=solver.name):
+                results = model.run(solver=solver, number_of_trajectories=3, seed=1)
+                for trajectory in results:
+                    self.assertTrue(np.all(trajectory['B'] == 2 * trajectory['A'] + trajectory['time']))
+
+    def test_rate_rules(self):
+        model = Model(name='RateRules')
+        A = Species(name='A', initial_value=0)
+        B = Species(name='B', initial_value=0)
+        model.add_species([A, B])
+        growth = Parameter(name='growth', expression=0)
+        model.add_parameter(growth)
+        model.add_reaction(Reaction(name='birth', reactants={}, products={B: 1}, propensity_function='growth'))
+        model.add_rate_rule([RateRule(name='linear', variable='A', formula='10'),
+                             RateRule(name='ramp', variable=growth, formula='2')])
+        model.timespan(np.linspace(0, 10, 11))
+        for solver in self.solvers:
+            with self.subTest(solver=solver.name):
+                results = model.run(solver=solver, number_of_trajectories=100, seed=1)
+                self.assertTrue(np.all(results[0]['A'] == 10 * results[0]['time']))
+                # B counts the births of a Poisson process with rate 2t, its mean is t**2.
+                mean = np.mean([trajectory['B'] for trajectory in results], axis=0)
+                self.assertTrue(np.allclose(mean[1:], results[0]['time'][1:] ** 2, rtol=0.2, atol=2))
+
+    def test_variables(self):
+        model = create_decay_model('Variables', rate=0)
+        model.add_event(Event(name='set', trigger=EventTrigger(expression='t >= k'),
+                              assignments=EventAssignment(variable='B', expression='1')))
+        results = model.run(solver=VariableSSACSolver, variables={'k': 4}, seed=1)
+        self.assertTrue(np.all(results['B'][:4] == 0))
+        self.assertTrue(np.all(results['B'][4:] == 1))
+
+    def test_unsupported_algorithm(self):
+        model = create_decay_model('UnsupportedAlgorithm')
+        model.add_event(Event(name='refill', trigger=EventTrigger(expression='t >= 5'),
+                              assignments=EventAssignment(variable='A', expression='100')))
+        solver = SSACSolver(model=model)
+        with self.assertRaises(SimulationError):
+            model.run(solver=solver, algorithm='nrm')
+        with self.assertRaises(SimulationError):
+            model.run(solver=TauLeapingCSolver)
+
+    def test_best_solver(self):
+        model = create_decay_model('BestSolver')
+        model.add_event(Event(name='refill', trigger=EventTrigger(expression='t >= 5'),
+                              assignments=EventAssignment(variable='A', expression='100')))
+        self.assertIs(model.get_best_solver(), VariableSSACSolver)
+        self.assertIs(model.get_best_solver(precompile=False), SSACSolver)
+
+    def test_cpp_expression(self):
+        names = {'A': 'S[0]', 'k': 'P0', 't': 't'}
+        self.assertEqual(cutils._cpp_expression('A**2', names), 'pow(S[0], 2.0)')
+        self.assertEqual(cutils._cpp_expression('1 < A <= k', names), '((1.0 < S[0]) && (S[0] <= P0))')
+        self.assertEqual(cutils._cpp_expression('t > 1 and not A', names), '((t > 1.0) && (!S[0]))')
+        self.assertEqual(cutils._cpp_expression('A if k else abs(t)', names), '(P0 ? S[0] : fabs(t))')
+        self.assertEqual(cutils._cpp_expression('f(A)', names, ['f']), 'f(S[0])')
+        with self.assertRaises(ModelError):
+            cutils._cpp_expression('B + 1', names)
+        with self.assertRaises(ModelError):
+            cutils._cpp_expression('g(A)', names)
+
+
+if __name__ == '__main__':
+    unittest.main()
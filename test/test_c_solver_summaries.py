@@ -0,0 +1,53 @@
+import unittest
+import numpy as np
+from gillespy2.core.gillespyError import SimulationError
+from example_models import Example, Dimerization
+from gillespy2.solvers.cpp.ssa_c_solver import SSACSolver
+from gillespy2.solvers.cpp.variable_ssa_c_solver import VariableSSACSolver
+from gillespy2.solvers.cpp.summaries import (TrajectorySummary, final, time_average, maximum, minimum, peak_time,
+                                             first_passage, _summary_arguments)
+
+
+class TestCSolverSummaries(unittest.TestCase):
+    def test_summaries_match_trajectories(self):
+        model = Dimerization()
+        solver = SSACSolver(model)
+        summaries = [final('monomer'), time_average('dimer'), maximum('dimer'), minimum('monomer'),
+                     peak_time('dimer'), first_passage('dimer', '>=', 10), first_passage('monomer', '<', 0)]
+        results = model.run(solver=solver, number_of_trajectories=20, seed=4)
+        for num_threads in [1, 3]:
+            with self.subTest(num_threads=num_threads):
+                values = model.run(solver=solver, number_of_trajectories=20, seed=4, num_threads=num_threads,
+                                   summaries=summaries)
+                self.assertEqual(values.shape, (20, len(summaries)))
+                for trajectory, row in zip(results, values):
+                    time, monomer, dimer = trajectory['time'], trajectory['monomer'], trajectory['dimer']
+                    passed = time[dimer >= 10]
+                    expected = [monomer[-1], np.trapz(dimer, time) / time[-1], dimer.max(), monomer.min(),
+                                time[np.argmax(dimer)], passed[0] if len(passed) else np.nan, np.nan]
+                    self.assertTrue(np.allclose(row, expected, equal_nan=True))
+
+    def test_variable_solver_summaries(self):
+        model = Example()
+        solver = VariableSSACSolver(model)
+        results = model.run(solver=solver, number_of_trajectories=5, seed=2, variables={'k1': 2})
+        values = model.run(solver=solver, number_of_trajectories=5, seed=2, variables={'k1': 2},
+                           summaries=[final('Sp')])
+        self.assertTrue(np.array_equal(values[:, 0], [trajectory['Sp'][-1] for trajectory in results]))
+
+    def test_invalid_summaries(self):
+        with self.assertRaises(SimulationError):
+            TrajectorySummary('median', 'A')
+        with self.assertRaises(SimulationError):
+            first_passage('A', '==', 1)
+        with self.assertRaises(SimulationError):
+            _summary_arguments([final('B')], ['A'])
+        self.assertEqual(_summary_arguments([final('A'), first_passage('B', '<', 3)], ['A', 'B']),
+                         '0 0 0 0.0 5 1 3 3.0')
+        model = Example()
+        with self.assertRaises(SimulationError):
+            model.run(solver=SSACSolver(model), summaries=[final('Sp')], statistics_only=True)
+
+
+if __name__ == '__main__':
+    unittest.main()
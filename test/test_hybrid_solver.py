@@ -15,7 +15,7 @@ class TestBasicTauHybridSolver(unittest.TestCase):
         model.add_species([species])
         model.add_rate_rule([rule])
         results = model.run()
-        self.assertEqual(results[0].solver_name, 'TauHybridSolver')
+        self.assertEqual(results[0].solver_name, 'VariableSSACSolver')
 
     def test_add_rate_rule_dict(self):
         model = Example()
@@ -43,14 +43,14 @@ class TestBasicTauHybridSolver(unittest.TestCase):
         results = model.run()
         self.assertEquals(results[species.name][0], 2) 
         self.assertEquals(results[species.name][-1], 2)
-        self.assertEqual(results[0].solver_name,'TauHybridSolver')
+        self.assertEqual(results[0].solver_name,'VariableSSACSolver')
 
     def test_add_function_definition(self):
         model = Example()
         funcdef = gillespy2.FunctionDefinition(name='fun', function='Sp+1')
         model.add_function_definition(funcdef)
         results = model.run()
-        self.assertEqual(results[0].solver_name,'TauHybridSolver')
+        self.assertEqual(results[0].solver_name,'VariableSSACSolver')
 
     def test_add_continuous_species_dependent_event(self):
         model = Example()
@@ -0,0 +1,99 @@
+import io
+import unittest
+import numpy as np
+from gillespy2.core import Model, Species, Parameter, Reaction
+from gillespy2.core.gillespyError import ExecutionError
+from gillespy2.solvers.utilities import solverutils as cutils
+from example_models import Example, Dimerization, MichaelisMenten
+from gillespy2 import ODECSolver, ODESolver
+
+
+class Robertson(Model):
+    """
+    Robertson's chemical kinetics problem, a standard stiff test problem.
+    """
+
+    def __init__(self, parameter_values=None):
+        Model.__init__(self, name="Robertson")
+        A = Species(name='A', initial_value=1, mode='continuous')
+        B = Species(name='B', initial_value=0, mode='continuous')
+        C = Species(name='C', initial_value=0, mode='continuous')
+        self.add_species([A, B, C])
+        k1 = Parameter(name='k1', expression=0.04)
+        k2 = Parameter(name='k2', expression=3e7)
+        k3 = Parameter(name='k3', expression=1e4)
+        self.add_parameter([k1, k2, k3])
+        self.add_reaction([Reaction(name='r1', reactants={A: 1}, products={B: 1}, rate=k1),
+                           Reaction(name='r2', reactants={B: 2}, products={B: 1, C: 1}, rate=k2),
+                           Reaction(name='r3', reactants={B: 1, C: 1}, products={A: 1, C: 1}, rate=k3)])
+        self.timespan(np.linspace(0, 40, 41))
+
+
+class TestODECSolver(unittest.TestCase):
+    def test_run_example(self):
+        model = Example()
+        results = model.run(solver=ODECSolver)
+        expected = 100 * np.exp(-3.0 * results['time'])
+        self.assertTrue(np.allclose(results['Sp'], expected, rtol=1e-3, atol=1e-6))
+
+    def test_duplicate_trajectories(self):
+        model = Example()
+        with self.assertLogs(level='WARN'):
+            results = model.run(solver=ODECSolver, number_of_trajectories=3)
+        self.assertEqual(len(results), 3)
+        self.assertTrue(np.array_equal(results[0]['Sp'], results[2]['Sp']))
+
+    def test_matches_ode_solver(self):
+        for model in [Dimerization(), MichaelisMenten()]:
+            compiled = model.run(solver=ODECSolver, rtol=1e-8, atol=1e-10)
+            reference = model.run(solver=ODESolver)
+            for species in model.listOfSpecies:
+                with self.subTest(model=model.name, species=species):
+                    self.assertTrue(np.allclose(compiled[species], reference[species], rtol=1e-4, atol=1e-4))
+
+    def test_stiff(self):
+        model = Robertson()
+        results = model.run(solver=ODECSolver, rtol=1e-6, atol=1e-12)
+        total = results['A'] + results['B'] + results['C']
+        self.assertTrue(np.allclose(total, 1, atol=1e-6))
+        # Reference values at t=40 from Hairer and Wanner.
+        self.assertAlmostEqual(results['A'][-1], 0.7158271, places=4)
+        self.assertAlmostEqual(results['B'][-1] * 1e5, 0.9185535, places=2)
+
+    def test_write_rate_derivatives(self):
+        model = Robertson()
+        outfile = io.StringIO()
+        cutils._write_rate_derivatives(outfile, model, model.sanitized_species_names(),
+                                       model.sanitized_parameter_names(), ['r1', 'r2', 'r3'])
+        self.assertIn('derivatives[0] = 1*P0;', outfile.getvalue())
+        self.assertIn('derivatives[0] = 2*P1*S[1];', outfile.getvalue())
+        self.assertIn('derivatives[0] = 1*P2*S[2];', outfile.getvalue())
+        self.assertIn('derivatives[1] = 1*P2*S[1];', outfile.getvalue())
+
+    def test_custom_propensity(self):
+        # Rates without analytic derivatives use a numerical Jacobian.
+        model = Model()
+        A = Species(name='A', initial_value=100, mode='continuous')
+        B = Species(name='B', initial_value=0, mode='continuous')
+        model.add_species([A, B])
+        model.add_parameter([Parameter(name='vmax', expression=2), Parameter(name='km', expression=10)])
+        model.add_reaction(Reaction(name='convert', reactants={A: 1}, products={B: 1},
+                                    propensity_function='vmax*A/(km+A)'))
+        model.timespan(np.linspace(0, 50, 51))
+        compiled = model.run(solver=ODECSolver, rtol=1e-8, atol=1e-10)
+        reference = model.run(solver=ODESolver)
+        self.assertTrue(np.allclose(compiled['A'], reference['A'], rtol=1e-4, atol=1e-4))
+
+    def test_parse_continuous_output(self):
+        timeline = np.linspace(0, 1, 3)
+        populations = np.linspace(0, 1, 2 * 3 * 4).astype('<f8')
+        header = np.array([(cutils._CONTINUOUS_RESULTS_MAGIC, 2, 3, 4, 1)], dtype=cutils._RESULTS_HEADER)
+        buffer = header.tobytes() + timeline.astype('<f8').tobytes() + populations.tobytes()
+        trajectory_base, _ = cutils._parse_binary_output(buffer, 2, 3, 4)
+        self.assertTrue(np.array_equal(trajectory_base[:, :, 1:], populations.reshape((2, 3, 4))))
+        with self.assertRaises(ExecutionError):
+            cutils._parse_binary_output(buffer[:-1], 2, 3, 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
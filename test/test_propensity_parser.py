@@ -55,3 +55,23 @@ class TestPropensityFunctions(unittest.TestCase):
         correct_graph = {'r1': {'dependencies': ['r2', 'r3']}, 'r2': {'dependencies': ['r1', 'r3']},
                          'r3': {'dependencies': ['r1', 'r2']}}
         self.assertEqual(correct_graph, dependencies)
+
+    def test_sanitized_propensity_function(self):
+        reaction = Reaction(name='r11', reactants={s:1}, propensity_function="k")
+        species_mappings = {'e': 'S[0]', 's': 'S[1]'}
+        parameter_mappings = {'vol': 'V', 'k': 'P0', 'k1': 'P1'}
+
+        # Names that are prefixes of other names are only replaced as whole identifiers.
+        reaction.propensity_function = "k*k1*s+k1/k"
+        self.assertEqual(reaction.sanitized_propensity_function(species_mappings, parameter_mappings),
+                         "P0*P1*S[1]+P1/P0")
+
+        # The exponent of a numeric literal is not a species name.
+        reaction.propensity_function = "1e5*e+2.5E-3*e/vol"
+        self.assertEqual(reaction.sanitized_propensity_function(species_mappings, parameter_mappings),
+                         "1e5*S[0]+2.5E-3*S[0]/V")
+
+        # Names without a mapping, such as functions, are left untouched.
+        reaction.propensity_function = "pow(s,2)*exp(k)"
+        self.assertEqual(reaction.sanitized_propensity_function(species_mappings, parameter_mappings),
+                         "pow(S[1],2)*exp(P0)")
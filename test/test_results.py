@@ -86,6 +86,16 @@ class TestResults(unittest.TestCase):
             _plotplotly_iterate(trajectory_unpickled)
         assert mock_method_before_pickle.call_args_list == mock_method_after_pickle.call_args_list
 
+    def test_to_array(self):
+        model = Model('test_model')
+        trajectories = [Trajectory(data={'time':[0., 1.], 'foo':[i, i + 1.]}, model=model) for i in range(3)]
+        results = Results(data=trajectories)
+        arrays = results.to_array()
+        self.assertEqual(len(arrays), 3)
+        # Each trajectory has its own array, not a view of the last one.
+        for i, array in enumerate(arrays):
+            self.assertEqual(array.tolist(), [[0., i], [1., i + 1.]])
+
     def test_to_csv_single_result_no_data(self):
         result = Results(data=None)
         test_nametag = "test_nametag"
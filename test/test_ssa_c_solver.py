@@ -1,8 +1,12 @@
+import io
 import unittest
 import tempfile
-from gillespy2.core.gillespyError import DirectoryError
-from example_models import Example
-from gillespy2.solvers.cpp.ssa_c_solver import SSACSolver
+import numpy as np
+from gillespy2.core.gillespyError import DirectoryError, ExecutionError, SimulationError
+from gillespy2 import Model, Species, Parameter, Reaction
+from example_models import Example, Dimerization
+from gillespy2.solvers.cpp.ssa_c_solver import SSACSolver, _write_constants
+from gillespy2.solvers.utilities import solverutils as cutils
 
 
 class TestSSACSolver(unittest.TestCase):
@@ -25,6 +29,148 @@ class TestSSACSolver(unittest.TestCase):
         model = Example()
         results = model.run(solver=SSACSolver)
 
+    def test_parse_binary_output(self):
+        timeline = np.linspace(0, 1, 3)
+        populations = np.arange(2 * 3 * 4, dtype='<u4')
+        header = np.array([(cutils._RESULTS_MAGIC, 2, 3, 4, 0.5)], dtype=cutils._RESULTS_HEADER)
+        buffer = header.tobytes() + timeline.astype('<f8').tobytes() + populations.tobytes()
+        trajectory_base, timeStopped = cutils._parse_binary_output(buffer, 2, 3, 4, pause=True)
+        self.assertEqual(trajectory_base.shape, (2, 3, 5))
+        self.assertTrue(np.array_equal(trajectory_base[1, :, 0], timeline))
+        self.assertTrue(np.array_equal(trajectory_base[:, :, 1:], populations.reshape((2, 3, 4))))
+        self.assertEqual(timeStopped, 0.5)
+        with self.assertRaises(ExecutionError):
+            cutils._parse_binary_output(buffer[:-1], 2, 3, 4)
+        with self.assertRaises(ExecutionError):
+            cutils._parse_binary_output(b'\0' * len(buffer), 2, 3, 4)
+
+    def test_binary_output_matches_model(self):
+        model = Example()
+        results = model.run(solver=SSACSolver, number_of_trajectories=3, seed=1)
+        for trajectory in results:
+            self.assertTrue(np.allclose(trajectory['time'], model.tspan))
+            self.assertEqual(trajectory['Sp'][0], model.listOfSpecies['Sp'].initial_value)
+
+    def test_write_constants(self):
+        model = Example()
+        outfile = io.StringIO()
+        _write_constants(outfile, model, list(model.listOfReactions.keys()), list(model.listOfSpecies.keys()),
+                         model.sanitized_parameter_names(), None)
+        # Names are plain C strings, std::string arrays need a constructor call per name and compile slowly.
+        self.assertIn('const char* s_names[] = {"Sp"};', outfile.getvalue())
+        self.assertIn('const char* r_names[] = {"S degradation"};', outfile.getvalue())
+
+    def test_reaction_dependencies(self):
+        model = Model()
+        A = Species(name='A', initial_value=10)
+        B = Species(name='B', initial_value=0)
+        C = Species(name='C', initial_value=0)
+        k = Parameter(name='k', expression=1)
+        model.add_species([A, B, C])
+        model.add_parameter(k)
+        convert = Reaction(name='convert', reactants={A: 1}, products={B: 1}, rate=k)
+        produce = Reaction(name='produce', reactants={}, products={C: 1}, propensity_function='k*B')
+        degrade = Reaction(name='degrade', reactants={C: 1}, products={}, rate=k)
+        model.add_reaction([convert, produce, degrade])
+        offsets, indices = cutils._get_reaction_dependencies(model, ['convert', 'produce', 'degrade'])
+        affected = [indices[offsets[i]:offsets[i + 1]] for i in range(3)]
+        # convert changes A and B, read by itself and produce; produce and degrade both change only C.
+        self.assertEqual(affected, [[0, 1], [2], [2]])
+        results = model.run(solver=SSACSolver(model), seed=1)
+        self.assertEqual(results['A'][-1] + results['B'][-1], 10)
+
+    def test_write_reactions(self):
+        model = Model()
+        A = Species(name='A', initial_value=100)
+        B = Species(name='B', initial_value=0)
+        C = Species(name='C', initial_value=5)
+        k = Parameter(name='k', expression=0.1)
+        model.add_species([A, B, C])
+        model.add_parameter(k)
+        dimerize = Reaction(name='dimerize', reactants={A: 2, C: 1}, products={B: 1, C: 1},
+                            propensity_function='k*A*(A-1)*C/vol')
+        dissociate = Reaction(name='dissociate', reactants={B: 1}, products={A: 2}, rate=k)
+        model.add_reaction([dimerize, dissociate])
+        outfile = io.StringIO()
+        cutils._write_reactions(outfile, model, ['dimerize', 'dissociate'], ['A', 'B', 'C'])
+        # One table entry per nonzero change, the catalyst C has none.
+        self.assertIn('change_reactions[] = {0, 0, 1, 1};', outfile.getvalue())
+        self.assertIn('change_species[] = {0, 1, 0, 1};', outfile.getvalue())
+        self.assertIn('change_values[] = {-2, 1, 2, -1};', outfile.getvalue())
+        results = model.run(solver=SSACSolver(model), seed=1)
+        self.assertTrue(np.all(results['A'] + 2 * results['B'] == 100))
+        self.assertTrue(np.all(results['C'] == 5))
+
+    def test_threads_reproducible(self):
+        model = Example()
+        solver = SSACSolver(model)
+        serial = model.run(solver=solver, number_of_trajectories=8, seed=3)
+        threaded = model.run(solver=solver, number_of_trajectories=8, seed=3, num_threads=4)
+        self.assertTrue(np.array_equal(serial.to_array(), threaded.to_array()))
+
+    def test_in_process_matches_executable(self):
+        model = Example()
+        executable = model.run(solver=SSACSolver(model), number_of_trajectories=4, seed=5)
+        in_process = model.run(solver=SSACSolver(model, in_process=True), number_of_trajectories=4, seed=5)
+        self.assertTrue(np.allclose(executable.to_array(), in_process.to_array()))
+
+    def test_interrupted_threads(self):
+        model = Dimerization()
+        solver = SSACSolver(model, in_process=True)
+        library = solver._SSACSolver__library
+        trajectory_base, timeStopped, return_code = cutils._run_simulation_library(
+            library, None, None, 40, 1001, 1e7, 2, seed=1, num_threads=2, timeout=0.5)
+        self.assertEqual(return_code, 33)
+        started = trajectory_base[:, 0, 1:].sum(axis=1) > 0
+        self.assertFalse(np.all(started))
+        # Trajectories left unstarted are zeros, and as they were not simulated at all the stop time is 0.
+        self.assertTrue(np.all(trajectory_base[~started, :, 1:] == 0))
+        self.assertEqual(timeStopped, 0)
+        trajectory_base, timeStopped, return_code = cutils._run_simulation_library(
+            library, None, None, 1, 1001, 1e7, 2, seed=1, timeout=0.5)
+        self.assertEqual(return_code, 33)
+        self.assertTrue(0 < timeStopped < 1e7)
+
+    def test_algorithms(self):
+        model = Dimerization()
+        solver = SSACSolver(model)
+        direct = np.array(model.run(solver=solver, number_of_trajectories=200, seed=11).to_array())
+        for algorithm in ['nrm', 'ssa_cr', 'sdm', 'ssa_tree']:
+            with self.subTest(algorithm=algorithm):
+                results = np.array(model.run(solver=solver, number_of_trajectories=200, seed=11,
+                                             algorithm=algorithm).to_array())
+                self.assertEqual(results.shape, direct.shape)
+                self.assertTrue(np.array_equal(results, model.run(
+                    solver=solver, number_of_trajectories=200, seed=11, num_threads=3,
+                    algorithm=algorithm).to_array()))
+                # Same distribution as the direct method: mean final populations agree within sampling error.
+                final, direct_final = results[:, -1, 1:], direct[:, -1, 1:]
+                error = np.sqrt(final.var(axis=0) / 200 + direct_final.var(axis=0) / 200)
+                self.assertTrue(np.all(np.abs(final.mean(axis=0) - direct_final.mean(axis=0)) < 5 * error + 1e-9))
+
+    def test_statistics_only(self):
+        model = Dimerization()
+        solver = SSACSolver(model)
+        trajectories = np.array(model.run(solver=solver, number_of_trajectories=50, seed=2).to_array())
+        for num_threads in [1, 3]:
+            with self.subTest(num_threads=num_threads):
+                statistics = np.array(model.run(solver=solver, number_of_trajectories=50, seed=2,
+                                                num_threads=num_threads, statistics_only=True).to_array())
+                self.assertEqual(statistics.shape, (4,) + trajectories.shape[1:])
+                self.assertTrue(np.array_equal(statistics[:, :, 0], trajectories[:4, :, 0]))
+                populations = trajectories[:, :, 1:]
+                self.assertTrue(np.allclose(statistics[0, :, 1:], populations.mean(axis=0)))
+                self.assertTrue(np.allclose(statistics[1, :, 1:], populations.std(axis=0)))
+                self.assertTrue(np.array_equal(statistics[2, :, 1:], populations.min(axis=0)))
+                self.assertTrue(np.array_equal(statistics[3, :, 1:], populations.max(axis=0)))
+        with self.assertRaises(SimulationError):
+            model.run(solver=SSACSolver(model, in_process=True), statistics_only=True)
+
+    def test_unknown_algorithm(self):
+        model = Example()
+        with self.assertRaises(SimulationError):
+            model.run(solver=SSACSolver(model), algorithm='unknown')
+
 
 if __name__ == '__main__':
     unittest.main()
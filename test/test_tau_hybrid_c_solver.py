@@ -0,0 +1,80 @@
+import io
+import unittest
+import numpy as np
+from gillespy2.core import Model, Species, Parameter, Reaction, Event, EventTrigger, EventAssignment, RateRule
+from gillespy2.solvers.utilities import solverutils as cutils
+from gillespy2 import TauHybridCSolver
+
+
+def create_decay_model(mode, initial_value=100):
+    model = Model(name='Decay')
+    A = Species(name='A', initial_value=initial_value, mode=mode)
+    B = Species(name='B', initial_value=0, mode=mode)
+    model.add_species([A, B])
+    k = Parameter(name='k', expression=0.5)
+    model.add_parameter(k)
+    model.add_reaction(Reaction(name='decay', reactants={A: 1}, products={B: 1}, rate=k))
+    model.timespan(np.linspace(0, 5, 11))
+    return model
+
+
+class TestTauHybridCSolver(unittest.TestCase):
+    def test_continuous(self):
+        model = create_decay_model('continuous')
+        results = model.run(solver=TauHybridCSolver, rtol=1e-8, atol=1e-10)
+        expected = 100 * np.exp(-0.5 * results['time'])
+        self.assertTrue(np.allclose(results['A'], expected, rtol=1e-5))
+        self.assertTrue(np.allclose(results['A'] + results['B'], 100))
+
+    def test_discrete(self):
+        model = create_decay_model('discrete')
+        results = model.run(solver=TauHybridCSolver, number_of_trajectories=200, seed=1)
+        for trajectory in results:
+            self.assertTrue(np.all(trajectory['A'] == np.round(trajectory['A'])))
+            self.assertTrue(np.all(trajectory['A'] + trajectory['B'] == 100))
+        mean = np.mean([trajectory['A'] for trajectory in results], axis=0)
+        self.assertTrue(np.allclose(mean, 100 * np.exp(-0.5 * results[0]['time']), rtol=0.1, atol=1))
+
+    def test_dynamic(self):
+        # Large populations are deterministic, so their amounts are fractional.
+        model = create_decay_model('dynamic', initial_value=100000)
+        results = model.run(solver=TauHybridCSolver, seed=1)
+        self.assertTrue(np.any(results['A'] != np.round(results['A'])))
+        # Below the switching minimum species are stochastic.
+        model.listOfSpecies['A'].switch_min = 1e6
+        model.listOfSpecies['B'].switch_min = 1e6
+        results = model.run(solver=TauHybridCSolver, seed=1)
+        self.assertTrue(np.all(results['A'] == np.round(results['A'])))
+
+    def test_seed(self):
+        model = create_decay_model('dynamic')
+        solver = TauHybridCSolver(model=model)
+        first = model.run(solver=solver, number_of_trajectories=4, seed=7)
+        second = model.run(solver=solver, number_of_trajectories=4, seed=7, num_threads=2)
+        for trajectory, other in zip(first, second):
+            self.assertTrue(np.array_equal(trajectory['A'], other['A']))
+
+    def test_events_and_rate_rules(self):
+        model = create_decay_model('continuous')
+        model.add_species(Species(name='C', initial_value=0, mode='continuous'))
+        model.add_rate_rule(RateRule(name='linear', variable='C', formula='2'))
+        model.add_event(Event(name='refill', trigger=EventTrigger(expression='t >= 2'),
+                              assignments=EventAssignment(variable='A', expression='100')))
+        results = model.run(solver=TauHybridCSolver, rtol=1e-8, atol=1e-10)
+        self.assertTrue(np.allclose(results['C'], 2 * results['time']))
+        after = results['time'] >= 2
+        self.assertTrue(np.allclose(results['A'][after], 100 * np.exp(-0.5 * (results['time'][after] - 2)),
+                                    rtol=1e-5))
+
+    def test_write_species_modes(self):
+        model = create_decay_model('discrete')
+        model.listOfSpecies['B'].mode = None
+        model.listOfSpecies['B'].constant = True
+        outfile = io.StringIO()
+        cutils._write_species_modes(outfile, model, ['A', 'B'])
+        self.assertIn('species_modes[] = {0, 2};', outfile.getvalue())
+        self.assertIn('fixed_species[] = {false, true};', outfile.getvalue())
+
+
+if __name__ == '__main__':
+    unittest.main()
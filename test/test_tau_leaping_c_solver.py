@@ -0,0 +1,84 @@
+import io
+import unittest
+import numpy as np
+from gillespy2.core import Model, Species, Parameter, Reaction
+from gillespy2.solvers.utilities import solverutils as cutils
+from example_models import Example, Dimerization
+from gillespy2 import TauLeapingCSolver, SSACSolver, VariableSSACSolver
+
+
+class TestTauLeapingCSolver(unittest.TestCase):
+    def test_run_example(self):
+        model = Example()
+        results = model.run(solver=TauLeapingCSolver, seed=1)
+        self.assertEqual(results['Sp'][0], model.listOfSpecies['Sp'].initial_value)
+        self.assertTrue(np.all(np.diff(results['Sp']) <= 0))
+
+    def test_write_reactant_tables(self):
+        model = Dimerization()
+        outfile = io.StringIO()
+        reactions = list(model.listOfReactions.keys())
+        species = list(model.listOfSpecies.keys())
+        cutils._write_reactions(outfile, model, reactions, species)
+        offsets = [0]
+        for name in reactions:
+            offsets.append(offsets[-1] + len(model.listOfReactions[name].reactants))
+        self.assertIn('reactant_offsets[] = {{{}}};'.format(', '.join(str(offset) for offset in offsets)),
+                      outfile.getvalue())
+        self.assertIn('model.set_reactants(reactant_offsets, reactant_species, reactant_counts);', outfile.getvalue())
+
+    def test_seed_reproducible(self):
+        model = Dimerization()
+        solver = TauLeapingCSolver(model)
+        first = model.run(solver=solver, number_of_trajectories=4, seed=7)
+        second = model.run(solver=solver, number_of_trajectories=4, seed=7)
+        self.assertTrue(np.array_equal(first.to_array(), second.to_array()))
+
+    def test_matches_ssa(self):
+        # Large enough populations that most steps are leaps.
+        model = Dimerization()
+        model.listOfSpecies['monomer'].initial_value = 3000
+        tau_results = model.run(solver=TauLeapingCSolver(model), number_of_trajectories=200, seed=3)
+        ssa_results = model.run(solver=SSACSolver(model), number_of_trajectories=200, seed=3)
+        for species in model.listOfSpecies:
+            tau_final = np.array([trajectory[species][-1] for trajectory in tau_results])
+            ssa_final = np.array([trajectory[species][-1] for trajectory in ssa_results])
+            standard_error = np.sqrt((tau_final.var() + ssa_final.var()) / 200)
+            with self.subTest(species=species):
+                self.assertLess(abs(tau_final.mean() - ssa_final.mean()), 4 * standard_error + 0.5)
+
+    def test_no_negative_populations(self):
+        # A fast, second order reaction on a small population forces leaps to be rejected and critical reactions
+        # to be fired one at a time.
+        model = Model()
+        A = Species(name='A', initial_value=50)
+        B = Species(name='B', initial_value=0)
+        k = Parameter(name='k', expression=100)
+        model.add_species([A, B])
+        model.add_parameter(k)
+        model.add_reaction(Reaction(name='dimerize', reactants={A: 2}, products={B: 1}, rate=k))
+        model.timespan(np.linspace(0, 1, 11))
+        results = model.run(solver=TauLeapingCSolver, number_of_trajectories=10, seed=2, tau_tol=0.5)
+        for trajectory in results:
+            self.assertTrue(np.all(trajectory['A'] + 2 * trajectory['B'] == 50))
+            self.assertTrue(np.all(trajectory['A'] <= 50))
+
+    def test_in_process(self):
+        model = Dimerization()
+        executable = model.run(solver=TauLeapingCSolver(model), number_of_trajectories=4, seed=5)
+        in_process = model.run(solver=TauLeapingCSolver(model, in_process=True), number_of_trajectories=4, seed=5)
+        self.assertTrue(np.array_equal(executable.to_array(), in_process.to_array()))
+
+    def test_variable_batch(self):
+        model = Dimerization()
+        solver = VariableSSACSolver(model)
+        try:
+            batch = solver.run_batch([{'k_c': 0.005}, {'k_c': 0}], seed=4, algorithm='tau', tau_tol=0.05)
+        finally:
+            solver.stop_worker()
+        self.assertTrue(np.all(batch[1]['dimer'] == 0))
+        self.assertGreater(batch[0]['dimer'][-1], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
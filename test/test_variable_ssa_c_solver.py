@@ -1,8 +1,11 @@
+import io
 import unittest
 import tempfile
+import numpy as np
 from gillespy2.core.gillespyError import DirectoryError, SimulationError
 from example_models import Example
 from gillespy2 import VariableSSACSolver
+from gillespy2.solvers.cpp.variable_ssa_c_solver import _write_variables
 
 
 class TestVariableSSACSolver(unittest.TestCase):
@@ -21,6 +24,14 @@ class TestVariableSSACSolver(unittest.TestCase):
         solver = VariableSSACSolver(model)
         results = model.run(solver=solver)
 
+    def test_write_variables(self):
+        model = Example()
+        outfile = io.StringIO()
+        _write_variables(outfile, model, list(model.listOfReactions.keys()), list(model.listOfSpecies.keys()),
+                         list(model.listOfParameters.keys()), model.sanitized_parameter_names())
+        self.assertIn('const char* s_names[] = {"Sp"};', outfile.getvalue())
+        self.assertIn('const char* r_names[] = {"S degradation"};', outfile.getvalue())
+
     def test_change_species(self):
         model = Example()
         initial_value = model.listOfSpecies['Sp'].initial_value
@@ -51,6 +62,83 @@ class TestVariableSSACSolver(unittest.TestCase):
         model = Example()
         results = model.run(solver=VariableSSACSolver)
 
+    def test_threads_reproducible(self):
+        model = Example()
+        solver = VariableSSACSolver(model)
+        serial = model.run(solver=solver, number_of_trajectories=8, seed=3, variables={'k1': 1})
+        threaded = model.run(solver=solver, number_of_trajectories=8, seed=3, variables={'k1': 1}, num_threads=3)
+        self.assertTrue(np.array_equal(serial.to_array(), threaded.to_array()))
+
+    def test_statistics_only(self):
+        model = Example()
+        solver = VariableSSACSolver(model)
+        trajectories = np.array(model.run(solver=solver, number_of_trajectories=20, seed=3, variables={'k1': 1},
+                                          algorithm='tau').to_array())
+        statistics = np.array(model.run(solver=solver, number_of_trajectories=20, seed=3, variables={'k1': 1},
+                                        algorithm='tau', num_threads=2, statistics_only=True).to_array())
+        self.assertTrue(np.allclose(statistics[0, :, 1:], trajectories[:, :, 1:].mean(axis=0)))
+        self.assertTrue(np.allclose(statistics[1, :, 1:], trajectories[:, :, 1:].std(axis=0)))
+
+    def test_in_process_matches_executable(self):
+        model = Example()
+        variables = {'k1': 2, 'Sp': 50}
+        executable = model.run(solver=VariableSSACSolver(model), number_of_trajectories=4, seed=5,
+                               variables=variables)
+        in_process_solver = VariableSSACSolver(model, in_process=True)
+        in_process = model.run(solver=in_process_solver, number_of_trajectories=4, seed=5, variables=variables)
+        self.assertTrue(np.allclose(executable.to_array(), in_process.to_array()))
+        # Variables only apply to the run they were given to.
+        default = model.run(solver=in_process_solver, number_of_trajectories=4, seed=5)
+        self.assertTrue(np.allclose(model.run(solver=VariableSSACSolver(model), number_of_trajectories=4,
+                                              seed=5).to_array(), default.to_array()))
+
+    def test_in_process_concurrent_runs(self):
+        from concurrent.futures import ThreadPoolExecutor
+        model = Example()
+        solver = VariableSSACSolver(model, in_process=True)
+        variables = [{'k1': 1, 'Sp': 50}, {'k1': 5, 'Sp': 200}] * 4
+
+        def run(i):
+            return model.run(solver=solver, number_of_trajectories=20, seed=i, variables=variables[i]).to_array()
+        # Calls on the same library only read their own parameters and initial populations.
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            concurrent = list(executor.map(run, range(len(variables))))
+        for i in range(len(variables)):
+            self.assertTrue(np.array_equal(concurrent[i], run(i)))
+
+    def test_run_batch(self):
+        model = Example()
+        solver = VariableSSACSolver(model)
+        variables_list = [{'k1': 1}, {'k1': 4, 'Sp': 50}, {}]
+        batch = solver.run_batch(variables_list, number_of_trajectories=2, seed=7)
+        self.assertEqual(len(batch), len(variables_list))
+        for i, variables in enumerate(variables_list):
+            single = model.run(solver=solver, number_of_trajectories=2, seed=7 + i, variables=variables)
+            self.assertTrue(np.allclose(single.to_array(), batch[i].to_array()))
+        solver.stop_worker()
+
+    def test_run_batch_in_process(self):
+        model = Example()
+        solver = VariableSSACSolver(model, in_process=True)
+        batch = solver.run_batch([{'k1': 1}, {'k1': 4}], seed=7)
+        single = model.run(solver=solver, seed=8, variables={'k1': 4})
+        self.assertTrue(np.allclose(single.to_array(), batch[1].to_array()))
+
+    def test_algorithm_in_process_and_batch(self):
+        model = Example()
+        executable = model.run(solver=VariableSSACSolver(model), seed=4, variables={'k1': 2}, algorithm='nrm')
+        in_process = model.run(solver=VariableSSACSolver(model, in_process=True), seed=4, variables={'k1': 2},
+                               algorithm='nrm')
+        batch = VariableSSACSolver(model).run_batch([{'k1': 2}], seed=4, algorithm='nrm')
+        self.assertTrue(np.allclose(executable.to_array(), in_process.to_array()))
+        self.assertTrue(np.allclose(executable.to_array(), batch[0].to_array()))
+
+    def test_invalid_num_threads(self):
+        model = Example()
+        solver = VariableSSACSolver(model)
+        with self.assertRaises(SimulationError):
+            model.run(solver=solver, num_threads=0)
+
 
 if __name__ == '__main__':
     unittest.main()